@@ -0,0 +1,15 @@
+# __main__.py
+"""
+`python -m visualize report portfolios.json` (저장소 상위 폴더에서) 또는
+`python . report portfolios.json` (저장소 폴더에서)로 배치 리포트를 실행합니다.
+"""
+import os
+import sys
+
+# 모듈들이 서로를 최상위 이름(config, data_fetcher, ...)으로 임포트하므로 이 폴더를 경로에 추가합니다.
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from report import main  # noqa: E402
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,130 @@
+# analytics_context.py
+import threading
+import numpy as np
+import pandas as pd
+from portfolio_analyzer import calculate_returns, estimate_moments, get_portfolio_performance_batch
+from price_panel import PricePanel
+
+# 새 봉을 반영할 때 휴장일 빈 값을 직전 가격으로 채우기 위해 함께 읽는 직전 행 수
+_SYNC_LOOKBACK_ROWS = 10
+
+
+class AnalyticsContext:
+    """
+    자산 구성과 조회 기간이 정해지면 한 번만 계산해 두는 분석 데이터 묶음입니다.
+    수익률 행렬, 자산별 평균, 공분산, 벤치마크와의 공분산을 미리 계산해 두므로
+    비중(슬라이더)만 바뀔 때는 O(자산 수²) 행렬 연산만으로 성과 지표를 다시 구할 수 있습니다.
+    실시간 갱신 모드에서는 sync()로 새로 들어온 봉만 반영합니다.
+    """
+
+    def __init__(self, prices, benchmark: pd.Series = None):
+        self.version = None
+        self._lock = threading.Lock()
+        self._build(prices, benchmark)
+
+    def _build(self, prices, benchmark: pd.Series = None):
+        # PricePanel을 받으면 수익률은 패널에서 한 번만 계산하고, 가격은 복사 없이 DataFrame으로 감쌉니다.
+        self.daily_returns, _ = calculate_returns(prices)
+        self.prices = prices.to_frame() if isinstance(prices, PricePanel) else prices
+        self.tickers = list(self.daily_returns.columns)
+        self.moments = estimate_moments(self.daily_returns)
+        self._sums = None
+        self._set_benchmark(benchmark)
+
+    def _set_benchmark(self, benchmark: pd.Series = None):
+        self._benchmark = benchmark
+        self.benchmark_returns = pd.Series(dtype='float64')
+        self.benchmark_cumulative = pd.Series(dtype='float64')
+        self.benchmark_cov = None
+        self.benchmark_var = None
+        if benchmark is not None and not benchmark.empty:
+            self.benchmark_cumulative = (1 + benchmark.pct_change().dropna()).cumprod()
+
+            # 자산 수익률과 같은 날짜 기준으로 맞춘 벤치마크 수익률 (휴장일은 직전 종가 사용)
+            aligned = benchmark.reindex(benchmark.index.union(self.prices.index)).ffill().reindex(self.prices.index)
+            self.benchmark_returns = aligned.pct_change().reindex(self.daily_returns.index)
+            valid = self.benchmark_returns.notna().to_numpy()
+            if valid.sum() > 1:
+                asset_returns = self.daily_returns.to_numpy(dtype='float64')[valid]
+                bench = self.benchmark_returns.to_numpy(dtype='float64')[valid]
+                bench_centered = bench - bench.mean()
+                self.benchmark_cov = (asset_returns - asset_returns.mean(axis=0)).T @ bench_centered / len(bench)
+                self.benchmark_var = bench_centered @ bench_centered / len(bench)
+
+    @property
+    def empty(self) -> bool:
+        return self.daily_returns.empty
+
+    def performance(self, weights, risk_free_rate: float = 0.0):
+        """비중 하나에 대한 (연간 수익률, 연간 변동성, 샤프 지수)를 미리 계산된 평균·공분산으로 구합니다."""
+        annual_returns, volatilities, sharpe_ratios = get_portfolio_performance_batch(
+            [weights], risk_free_rate=risk_free_rate, moments=self.moments)
+        return annual_returns[0], volatilities[0], sharpe_ratios[0]
+
+    def beta(self, weights) -> float:
+        """벤치마크 대비 포트폴리오 베타 (w · Cov(자산, 벤치마크) / Var(벤치마크))."""
+        if self.benchmark_cov is None or not self.benchmark_var:
+            return float('nan')
+        return float(np.asarray(weights, dtype='float64') @ self.benchmark_cov / self.benchmark_var)
+
+    def sync(self, prices, benchmark: pd.Series = None, version=None) -> bool:
+        """
+        최신 가격으로 컨텍스트를 갱신합니다. 바뀐 구간(마지막 봉 수정 + 새로 추가된 봉)의 수익률만 다시 계산하고,
+        평균·공분산은 누적 합계에서 빠진 행을 빼고 새 행을 더해 갱신합니다. (전체 수익률을 다시 훑지 않습니다)
+        과거 데이터가 바뀌었거나 종목 구성이 다르면 처음부터 다시 계산합니다.
+        version: 데이터 버전 (data_fetcher.data_version()), 이전 sync와 같으면 아무 것도 하지 않습니다.
+        반환값: 갱신 여부
+        """
+        if version is not None and version == self.version:
+            return False
+        prices = prices.to_frame() if isinstance(prices, PricePanel) else prices
+        with self._lock:
+            self.version = version
+            old = self.prices
+            same_history = (list(prices.columns) == list(old.columns) and len(prices) >= len(old) > 1
+                            and prices.index[:len(old) - 1].equals(old.index[:-1])
+                            and prices.index[len(old) - 1] == old.index[-1])
+            if not same_history:
+                self._build(prices, benchmark if benchmark is not None else self._benchmark)
+                return True
+
+            # 마지막 봉(장중 값이 바뀌었을 수 있음)부터 비교합니다.
+            last_row_changed = not np.array_equal(prices.iloc[len(old) - 1].to_numpy(), old.iloc[-1].to_numpy(), equal_nan=True)
+            first_changed = len(old) - 1 if last_row_changed else len(old)
+            if first_changed == len(prices):
+                if benchmark is not None:
+                    self._set_benchmark(benchmark)
+                return benchmark is not None
+
+            changed_from = prices.index[first_changed]
+            lookback = prices.iloc[max(first_changed - 1 - _SYNC_LOOKBACK_ROWS, 0):].ffill()
+            new_returns = lookback.pct_change().loc[changed_from:].dropna()
+            removed = self.daily_returns.loc[changed_from:]
+            self._update_moments(removed.to_numpy(dtype='float64'), new_returns.to_numpy(dtype='float64'))
+
+            self.daily_returns = pd.concat([self.daily_returns.iloc[:len(self.daily_returns) - len(removed)], new_returns])
+            self.prices = pd.concat([old.iloc[:first_changed], prices.iloc[first_changed:]])
+            self._set_benchmark(benchmark if benchmark is not None else self._benchmark)
+            return True
+
+    def _update_moments(self, removed: np.ndarray, added: np.ndarray):
+        """행 수·합계·제곱합 누적값에서 빠진 행을 빼고 새 행을 더해 평균과 공분산(ddof=0)을 갱신합니다."""
+        if self._sums is None:
+            returns = self.daily_returns.to_numpy(dtype='float64')
+            self._sums = [len(returns), returns.sum(axis=0), returns.T @ returns]
+        n, total, total_sq = self._sums
+        n = n - len(removed) + len(added)
+        total = total - removed.sum(axis=0) + added.sum(axis=0)
+        total_sq = total_sq - removed.T @ removed + added.T @ added
+        self._sums = [n, total, total_sq]
+        if n > 0:
+            mean = total / n
+            self.moments = (mean, total_sq / n - np.outer(mean, mean))
+
+
+def build_context(prices, benchmark: pd.Series = None, start=None, end=None) -> AnalyticsContext:
+    """가격 데이터(DataFrame 또는 PricePanel)를 [start, end] 기간으로 자른 뒤 분석 컨텍스트를 만듭니다."""
+    prices = prices.slice(start, end) if isinstance(prices, PricePanel) else prices.loc[start:end]
+    if benchmark is not None:
+        benchmark = benchmark.loc[start:end]
+    return AnalyticsContext(prices, benchmark)
@@ -3,19 +3,65 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from scipy.signal import find_peaks
-from config import ASSETS, BENCHMARK_CONFIG
-from data_fetcher import fetch_data, fetch_benchmark_data, fetch_risk_free_rate 
-from portfolio_analyzer import calculate_returns, get_portfolio_performance
+from config import ASSETS, BENCHMARK_CONFIG, ASSET_CLASS_BOUNDS, LIVE_REFRESH_SECONDS, resolve_end_date
+from data_fetcher import (fetch_benchmark_data, fetch_risk_free_rate, cache_stats, prefetch, fetch_price_panel,
+                          data_version)
+from live_refresh import get_live_refresher
+from analytics_context import build_context
+import optimizer
+from backtester import REBALANCE_FREQUENCIES, run_backtest, rolling_metrics
+from risk_analyzer import risk_metrics, risk_contributions, format_risk_table
+from chart_data import downsample, find_extrema
+from portfolio_store import get_portfolio_store
+from comparison import compare_saved
+from profiling import profile_stage, profile_records, enabled_modes
 from datetime import datetime
+import uuid
 
 # --- 1. 페이지 기본 설정 ---
 st.set_page_config(page_title="금융 포트폴리오 대시보드", layout="wide")
 st.title("📈 나만의 금융 포트폴리오 대시보드")
 
+@st.cache_resource(show_spinner=False, max_entries=32)
+def load_analytics_context(tickers: tuple, data_end: str, live: bool = False, start=None, end=None):
+    """
+    자산 구성·기간별 분석 컨텍스트(수익률·평균·공분산·벤치마크)를 캐시합니다. 비중만 바뀌는 재실행에서는 다시 계산하지 않습니다.
+    data_end(resolve_end_date()의 값)는 캐시 키로만 쓰여, 날짜가 바뀌면 새 데이터로 다시 만듭니다.
+    """
+    price_panel = fetch_price_panel(list(tickers), live=live)
+    if price_panel.empty:
+        return None
+    return build_context(price_panel, fetch_benchmark_data(BENCHMARK_CONFIG['ticker'], live), start, end)
+
+def get_context(tickers: tuple, live: bool):
+    """캐시된 컨텍스트를 가져오고, 실시간 갱신 모드에서는 새로 들어온 봉만 반영합니다."""
+    context = load_analytics_context(tickers, resolve_end_date(include_today=live), live)
+    # 데이터 버전이 같으면 가격 패널을 만들지 않고 바로 돌려줍니다.
+    if context is None or not live or context.version == data_version():
+        return context
+    context.sync(fetch_price_panel(context.tickers, live=True), fetch_benchmark_data(BENCHMARK_CONFIG['ticker'], True), data_version())
+    return context
+
+@st.fragment(run_every=LIVE_REFRESH_SECONDS)
+def live_status(tickers: list):
+    """구독을 갱신하고 백그라운드 폴러의 상태를 보여주며, 새 봉이 반영됐으면 화면 전체를 다시 그립니다."""
+    refresher = get_live_refresher()
+    refresher.subscribe(st.session_state['session_id'], tickers)
+    status = refresher.status()
+    if st.session_state.get('live_data_version', status['data_version']) != status['data_version']:
+        st.session_state['live_data_version'] = status['data_version']
+        st.rerun()
+    st.session_state['live_data_version'] = status['data_version']
+    last_poll = status['last_poll'].strftime('%H:%M:%S') if status['last_poll'] is not None else '-'
+    st.caption(f"마지막 확인 {last_poll} · 반영한 봉 {status['bars_received']}개 · 종목 {len(status['tickers'])}개 · 화면 {status['sessions']}개")
+    if status['last_error']:
+        st.caption(f"⚠️ 최근 갱신 실패: {status['last_error']}")
+
 # --- 2. Session State 초기화 ---
-if 'saved_portfolios' not in st.session_state:
-    st.session_state['saved_portfolios'] = []
+# 저장된 포트폴리오는 세션이 아닌 SQLite 저장소에 보관하므로 새로 고쳐도 유지됩니다.
+portfolio_store = get_portfolio_store()
+if 'session_id' not in st.session_state:
+    st.session_state['session_id'] = uuid.uuid4().hex
 if 'selected_assets' not in st.session_state:
     st.session_state['selected_assets'] = [asset for asset_class in ASSETS.values() for asset in asset_class]
 
@@ -64,22 +110,58 @@ with st.sidebar:
         portfolio_name = st.text_input("저장할 포트폴리오 이름을 입력하세요", "나의 첫 포트폴리오")
         if st.button("💾 현재 포트폴리오 저장"):
             if total_weight == 100:
-                saved_port = {'name': portfolio_name, 'weights': weights, 'assets': current_portfolio_assets}
-                st.session_state['saved_portfolios'].append(saved_port)
-                st.success(f"'{portfolio_name}'이(가) 저장되었습니다!")
+                version = portfolio_store.save(portfolio_name, weights, current_portfolio_assets)
+                st.success(f"'{portfolio_name}'이(가) 저장되었습니다! (버전 {version})")
             else:
                 st.error("비중의 총합이 100%일 때만 저장할 수 있습니다.")
 
+    st.write("---")
+    st.header("🔁 백테스트 설정")
+    rebalance = st.selectbox("리밸런싱 주기", options=list(REBALANCE_FREQUENCIES.keys()), index=2,
+                             format_func=lambda key: REBALANCE_FREQUENCIES[key])
+    transaction_cost = st.number_input("거래 비용 (%, 매매 금액 대비)", min_value=0.0, max_value=2.0, value=0.1, step=0.05) / 100
+
+    st.write("---")
+    st.header("📡 실시간 갱신")
+    # 모드는 세션마다 따로 두고(st.session_state), 조회 함수에 live 인자로 넘깁니다.
+    live_mode = st.toggle("실시간 갱신 모드", key='live_mode',
+                          help=f"{LIVE_REFRESH_SECONDS}초마다 보유 종목의 최신 봉만 받아 지표와 차트에 이어 붙입니다.")
+    if live_mode:
+        live_status([asset['ticker'] for asset in current_portfolio_assets] + [BENCHMARK_CONFIG['ticker']])
+    else:
+        # 다른 세션이 아직 실시간 모드라면 폴러는 계속 돕니다.
+        get_live_refresher().unsubscribe(st.session_state['session_id'])
+
+    stats = cache_stats()
+    st.caption(f"티커 캐시: 적중 {stats['hits']} · 실패 {stats['misses']} · 보관 {stats['size']}개")
+
+    # 환경 변수(VISUALIZE_PROFILE)로 프로파일링을 켠 경우에만 이전 실행까지의 단계별 기록을 보여줍니다.
+    if enabled_modes() and profile_records():
+        with st.expander("⏱️ 단계별 프로파일링"):
+            profile_df = pd.DataFrame(profile_records()[-30:]).drop(columns=['top_functions', 'profile_path'], errors='ignore')
+            st.dataframe(profile_df, use_container_width=True)
+
 # --- 4. 메인 페이지 (탭으로 구분) ---
-tab1, tab2 = st.tabs(["📊 내 포트폴리오 분석", "🗂️ 저장된 포트폴리오 비교"])
+tab1, tab2, tab3 = st.tabs(["📊 내 포트폴리오 분석", "🗂️ 저장된 포트폴리오 비교", "🎯 포트폴리오 최적화"])
 
 with tab1:
-    current_assets_config = {'Current': current_portfolio_assets}
-    asset_data = fetch_data(current_assets_config)
+    # 자산·벤치마크·무위험 금리를 한 번에 동시 다운로드해 캐시를 채웁니다.
+    current_tickers = tuple(asset['ticker'] for asset in current_portfolio_assets)
+    with profile_stage('fetch'):
+        missing_tickers = [t for t in prefetch(current_tickers, live=live_mode) if t in current_tickers]
+    if missing_tickers:
+        st.warning(f"다음 티커의 데이터를 가져오지 못해 제외했습니다: {', '.join(missing_tickers)}")
+    with profile_stage('analyze'):
+        context = get_context(current_tickers, live_mode) if current_tickers else None
 
-    if not asset_data.empty and total_weight == 100:
-        daily_returns, _ = calculate_returns(asset_data)
-        weight_list = [weights.get(col, 0) / 100 for col in asset_data.columns]
+    if context is not None and not context.empty and total_weight == 100:
+        ticker_to_name = {asset['ticker']: asset['name'] for asset in current_portfolio_assets}
+        weight_list = [weights.get(ticker_to_name[t], 0) / 100 for t in context.tickers]
+        # 데이터를 받지 못해 빠진 종목의 비중은 나머지 종목에 비례해 다시 배분합니다. (그대로 두면 현금으로 계산됩니다)
+        covered_weight = sum(weight_list)
+        if 0 < covered_weight < 1 - 1e-9:
+            weight_list = [w / covered_weight for w in weight_list]
+            st.info(f"제외된 종목의 비중 {(1 - covered_weight)*100:.0f}%는 나머지 종목에 비례해 다시 배분했습니다.")
         
         st.header("📊 포트폴리오 구성")
         asset_to_class = {asset['name']: class_name for class_name, assets_list in ASSETS.items() for asset in assets_list}
@@ -95,77 +177,151 @@ with tab1:
         
         st.header("📈 포트폴리오 주요 성과")
         risk_free_rate = fetch_risk_free_rate()
-        annual_return, volatility, sharpe = get_portfolio_performance(weight_list, daily_returns, risk_free_rate)
-        col1, col2, col3 = st.columns(3)
+        # 💡 비중만 바뀐 경우 미리 계산된 평균·공분산으로 지표를 구하므로 전체 수익률을 다시 훑지 않습니다.
+        annual_return, volatility, sharpe = context.performance(weight_list, risk_free_rate)
+        col1, col2, col3, col4 = st.columns(4)
         col1.metric("연평균 수익률", f"{annual_return*100:.2f}%")
         col2.metric("연간 변동성", f"{volatility*100:.2f}%")
         col3.metric("샤프 지수", f"{sharpe:.2f}", help=f"무위험 수익률 {risk_free_rate*100:.2f}% 기준")
+        col4.metric("베타", f"{context.beta(weight_list):.2f}", help=f"{BENCHMARK_CONFIG['name']} 대비")
+
+        st.header("⚠️ 위험 분석")
+        with profile_stage('risk'):
+            risk_df = format_risk_table(risk_metrics([weight_list], context.daily_returns, context.benchmark_returns, risk_free_rate, names=['내 포트폴리오']))
+        st.dataframe(risk_df.T.rename(columns={'내 포트폴리오': '값'}).style.format("{:.2f}"), use_container_width=True)
+        contribution_df = pd.DataFrame({'자산': [ticker_to_name[t] for t in context.tickers],
+                                        '위험 기여도 (%)': risk_contributions([weight_list], context.moments[1])[0] * 100})
+        st.plotly_chart(px.bar(contribution_df, x='자산', y='위험 기여도 (%)', title='자산별 위험 기여도 (변동성 기준)'), use_container_width=True)
         
         st.header("🆚 포트폴리오 vs. 벤치마크")
-        benchmark_data = fetch_benchmark_data(BENCHMARK_CONFIG['ticker'])
-        if not benchmark_data.empty:
+        if not context.benchmark_cumulative.empty:
             
-            # 💡💡💡 ValueError 오류 해결: 두 변수 모두 1차원으로 변환 💡💡💡
-            portfolio_cum_returns_np = (1 + daily_returns.dot(weight_list)).cumprod().values
-            portfolio_series = pd.Series(portfolio_cum_returns_np.flatten(), index=daily_returns.index)
-
-            benchmark_daily_returns = benchmark_data.pct_change().dropna()
-            benchmark_cum_returns_np = (1 + benchmark_daily_returns).cumprod().values
-            benchmark_series = pd.Series(benchmark_cum_returns_np.flatten(), index=benchmark_daily_returns.index)
+            # 리밸런싱 주기와 거래 비용을 반영한 백테스트 결과를 사용합니다.
+            with profile_stage('backtest'):
+                backtest = run_backtest(context.prices, weight_list, rebalance, transaction_cost)
+            portfolio_series = backtest['value']
+            benchmark_series = context.benchmark_cumulative
             
             comparison_df = pd.DataFrame({'My Portfolio': portfolio_series, 'Benchmark': benchmark_series}).dropna()
             normalized_df = comparison_df / comparison_df.iloc[0]
 
+            # 고점/저점은 전체 데이터에서 찾고, 선은 극값을 포함하도록 줄인 점들로 그립니다.
+            peaks, troughs = find_extrema(normalized_df['My Portfolio'], distance=100)
+            chart_df = downsample(normalized_df, keep=peaks.index.append(troughs.index))
+
             fig_line = go.Figure()
-            fig_line.add_trace(go.Scatter(x=normalized_df.index, y=normalized_df['My Portfolio'], mode='lines', name='My Portfolio'))
-            fig_line.add_trace(go.Scatter(x=normalized_df.index, y=normalized_df['Benchmark'], mode='lines', name='Benchmark', line=dict(dash='dot')))
+            fig_line.add_trace(go.Scatter(x=chart_df.index, y=chart_df['My Portfolio'], mode='lines', name='My Portfolio'))
+            fig_line.add_trace(go.Scatter(x=chart_df.index, y=chart_df['Benchmark'], mode='lines', name='Benchmark', line=dict(dash='dot')))
             
-            peaks, _ = find_peaks(normalized_df['My Portfolio'], distance=100)
-            fig_line.add_trace(go.Scatter(x=normalized_df.index[peaks], y=normalized_df['My Portfolio'].iloc[peaks], mode='markers', name='고점', marker=dict(color='red', size=8, symbol='triangle-down')))
-            troughs, _ = find_peaks(-normalized_df['My Portfolio'], distance=100)
-            fig_line.add_trace(go.Scatter(x=normalized_df.index[troughs], y=normalized_df['My Portfolio'].iloc[troughs], mode='markers', name='저점', marker=dict(color='blue', size=8, symbol='triangle-up')))
+            fig_line.add_trace(go.Scatter(x=peaks.index, y=peaks, mode='markers', name='고점', marker=dict(color='red', size=8, symbol='triangle-down')))
+            fig_line.add_trace(go.Scatter(x=troughs.index, y=troughs, mode='markers', name='저점', marker=dict(color='blue', size=8, symbol='triangle-up')))
             
             st.write(f"내 포트폴리오와 **{BENCHMARK_CONFIG['name']}** 지수의 성과를 비교합니다.")
             st.plotly_chart(fig_line, use_container_width=True)
 
+            st.header("📉 롤링 성과 지표")
+            rolling_window = st.select_slider("롤링 구간 (거래일)", options=[63, 126, 252], value=126)
+            rolling_df = rolling_metrics(portfolio_series, rolling_window, risk_free_rate)
+            col1, col2 = st.columns(2)
+            col1.line_chart(downsample(rolling_df[['rolling_sharpe']].rename(columns={'rolling_sharpe': '롤링 샤프 지수'})))
+            col2.line_chart(downsample(rolling_df[['rolling_volatility']].rename(columns={'rolling_volatility': '롤링 변동성'})))
+            # 낙폭은 급락 구간의 바닥이 잘리지 않도록 구간별 최솟값·최댓값을 남기는 방식으로 줄입니다.
+            st.area_chart(downsample(rolling_df[['drawdown']].rename(columns={'drawdown': '낙폭 (Drawdown)'}), method='minmax'))
+            st.caption(f"리밸런싱 {len(backtest['turnover'])}회 · 누적 회전율 {backtest['turnover'].sum():.2f}")
+
     elif not current_portfolio_assets: st.info("사이드바에서 분석할 자산을 선택해주세요.")
+    elif context is None or context.empty: st.error("데이터를 가져오는 데 실패했습니다. 티커가 올바른지 확인해주세요.")
     else: st.info("사이드바에서 비중의 총합을 100%로 맞춰주세요.")
 
 with tab2:
     st.header("🗂️ 저장된 포트폴리오 비교")
-    if not st.session_state['saved_portfolios']:
+    saved_versions = portfolio_store.versions()
+    if not saved_versions:
         st.info("저장된 포트폴리오가 없습니다.")
     else:
         col1, col2 = st.columns(2)
         start_date = col1.date_input("시작일", value=pd.to_datetime("2018-01-01"), min_value=pd.to_datetime("2010-01-01"), max_value=datetime.today())
         end_date = col2.date_input("종료일", value=datetime.today(), min_value=pd.to_datetime("2010-01-01"), max_value=datetime.today())
         
-        results = []
-        all_comparison_returns = pd.DataFrame()
-        
-        for port in st.session_state['saved_portfolios']:
-            port_assets_config = {'Portfolio': port['assets']}
-            port_asset_data = fetch_data(port_assets_config)
-            
-            if not port_asset_data.empty:
-                filtered_data = port_asset_data.loc[start_date:end_date]
-                if not filtered_data.empty:
-                    port_daily_returns, _ = calculate_returns(filtered_data)
-                    port_weight_list = [port['weights'].get(col, 0) / 100 for col in filtered_data.columns]
-                    
-                    ann_ret, vol, shp = get_portfolio_performance(port_weight_list, port_daily_returns)
-                    results.append({'포트폴리오 이름': port['name'], '연평균 수익률 (%)': ann_ret*100, '연간 변동성 (%)': vol*100, '샤프 지수': shp})
-                    
-                    cum_returns = (1 + port_daily_returns.dot(port_weight_list)).cumprod()
-                    all_comparison_returns[port['name']] = cum_returns
+        # 모든 포트폴리오의 티커를 한 번에 받아 가중치 행렬 곱 한 번으로 비교합니다. 결과는 (버전, 기간)별로 캐시됩니다.
+        with profile_stage('compare'):
+            prefetch([asset['ticker'] for port in portfolio_store.list() for asset in port['assets']], live=live_mode)
+            comparison = compare_saved(saved_versions, start_date, end_date, rebalance, transaction_cost,
+                                       live=live_mode, data_version=data_version() if live_mode else 0)
+        excluded = {name: tickers for name, tickers in comparison['missing'].items() if tickers}
+        if excluded:
+            st.warning("데이터를 가져오지 못해 제외한 티커 (비중은 나머지 티커에 비례해 다시 배분): "
+                       + " · ".join(f"{name}({', '.join(tickers)}, {comparison['missing_weight'][name]*100:.0f}%)" for name, tickers in excluded.items()))
         
         st.subheader("성과 지표 비교")
-        st.dataframe(pd.DataFrame(results).set_index('포트폴리오 이름').style.format("{:.2f}"))
+        if not comparison['metrics'].empty:
+            comparison_metrics = format_risk_table(comparison['metrics'])
+            comparison_metrics.index.name = '포트폴리오 이름'
+            st.dataframe(comparison_metrics.style.format("{:.2f}"))
         
         st.subheader("누적 수익률 비교")
-        if not all_comparison_returns.empty:
-            normalized_returns = all_comparison_returns / all_comparison_returns.iloc[0]
-            st.line_chart(normalized_returns)
+        if not comparison['cumulative'].empty:
+            # 포트폴리오마다 시작일이 다를 수 있으므로 각자의 첫 값으로 나눕니다.
+            st.line_chart(downsample(comparison['cumulative'] / comparison['cumulative'].bfill().iloc[0]))
+
+        with st.expander("저장된 포트폴리오 관리"):
+            delete_name = st.selectbox("삭제할 포트폴리오", options=[name for name, _ in saved_versions])
+            if st.button("🗑️ 삭제"):
+                portfolio_store.delete(delete_name)
+                st.rerun()
+
+with tab3:
+    st.header("🎯 포트폴리오 최적화")
+    opt_context = get_context(tuple(asset['ticker'] for asset in current_portfolio_assets), live_mode) if current_portfolio_assets else None
+    if opt_context is None or len(opt_context.tickers) < 2:
+        st.info("사이드바에서 최적화할 자산을 2개 이상 선택해주세요.")
+    else:
+        opt_tickers, moments = opt_context.tickers, opt_context.moments
+        ticker_to_name = {asset['ticker']: asset['name'] for asset in current_portfolio_assets}
+        opt_names = [ticker_to_name.get(t, t) for t in opt_tickers]
+        risk_free_rate = fetch_risk_free_rate()
+
+        col1, col2, col3 = st.columns(3)
+        objective = col1.radio("최적화 목표", ["최대 샤프 지수", "최소 변동성", "목표 수익률", "리스크 패리티"])
+        max_weight = col2.slider("자산별 최대 비중 (%)", 10, 100, 100, 5) / 100
+        use_class_bounds = col3.checkbox("자산군별 비중 한도 적용", value=False, help=str(ASSET_CLASS_BOUNDS))
+        target = None
+        if objective == "목표 수익률":
+            target = col1.number_input("연간 목표 수익률 (%)", value=10.0, step=1.0) / 100
+
+        constraints = optimizer.class_constraints(opt_tickers, ASSETS, ASSET_CLASS_BOUNDS) if use_class_bounds else []
+        with profile_stage('optimize'):
+            if objective == "최대 샤프 지수":
+                best = optimizer.max_sharpe(moments, risk_free_rate, max_weight, constraints)
+            elif objective == "최소 변동성":
+                best = optimizer.min_variance(moments, risk_free_rate, max_weight, constraints)
+            elif objective == "목표 수익률":
+                best = optimizer.target_return(moments, target, risk_free_rate, max_weight, constraints)
+            else:
+                best = optimizer.risk_parity(moments, risk_free_rate, max_weight, constraints)
+
+        if not best['success']:
+            st.warning(f"조건을 만족하는 해를 찾지 못했습니다. 비중 한도를 완화해 보세요. ({best['message']})")
+        else:
+            col1, col2, col3 = st.columns(3)
+            col1.metric("연평균 수익률", f"{best['annual_return']*100:.2f}%")
+            col2.metric("연간 변동성", f"{best['volatility']*100:.2f}%")
+            col3.metric("샤프 지수", f"{best['sharpe']:.2f}", help=f"무위험 수익률 {risk_free_rate*100:.2f}% 기준")
+
+            weights_df = pd.DataFrame({'자산': opt_names, '비중 (%)': best['weights'] * 100})
+            st.plotly_chart(px.bar(weights_df[weights_df['비중 (%)'] > 0.05], x='자산', y='비중 (%)', title='최적 비중'), use_container_width=True)
+
+            _, mc_returns, mc_volatilities, mc_sharpes = optimizer.random_portfolios(moments, 5000, risk_free_rate)
+            frontier_returns, frontier_volatilities = optimizer.efficient_frontier(moments, 15, risk_free_rate, max_weight, constraints)
+
+            fig_frontier = go.Figure()
+            fig_frontier.add_trace(go.Scattergl(x=mc_volatilities*100, y=mc_returns*100, mode='markers', name='무작위 포트폴리오',
+                                                marker=dict(size=3, color=mc_sharpes, colorscale='Viridis', showscale=True, colorbar=dict(title='샤프'))))
+            fig_frontier.add_trace(go.Scatter(x=frontier_volatilities*100, y=frontier_returns*100, mode='lines', name='효율적 투자선', line=dict(color='black')))
+            fig_frontier.add_trace(go.Scatter(x=[best['volatility']*100], y=[best['annual_return']*100], mode='markers', name='최적 포트폴리오',
+                                              marker=dict(color='red', size=14, symbol='star')))
+            fig_frontier.update_layout(xaxis_title='연간 변동성 (%)', yaxis_title='연평균 수익률 (%)')
+            st.plotly_chart(fig_frontier, use_container_width=True)
 
 st.header("🗺️ 프로젝트 전체 흐름도")
 with st.expander("플로우차트로 전체 과정 보기"):
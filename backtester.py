@@ -0,0 +1,183 @@
+# backtester.py
+import numpy as np
+import pandas as pd
+from portfolio_analyzer import TRADING_DAYS
+
+# 리밸런싱 주기: 해당 기간의 첫 거래일에 목표 비중으로 되돌립니다.
+# 숫자(예: 0.05)를 넘기면 어느 한 자산의 비중이 목표에서 그만큼 벗어날 때 리밸런싱합니다.
+# 💡 비중의 합이 1보다 작으면 나머지(1 - 합)는 수익률 0인 현금으로 보유합니다.
+#    평균·공분산 기반 지표(w·μ, w'Σw)도 같은 가정이므로 두 결과가 서로 맞습니다.
+REBALANCE_FREQUENCIES = {
+    'D': '매일',
+    'W': '매주',
+    'M': '매월',
+    'Q': '분기',
+    'Y': '매년',
+    'none': '리밸런싱 없음 (매수 후 보유)'
+}
+
+_PERIOD_CODES = {'W': 'W', 'M': 'M', 'Q': 'Q', 'Y': 'Y'}
+_THRESHOLD_CHUNK = 252
+
+
+def prepare_prices(prices: pd.DataFrame) -> pd.DataFrame:
+    """휴장일 차이로 생긴 빈 값은 직전 가격으로 채우고, 모든 자산의 가격이 존재하는 날부터 사용합니다."""
+    return prices.ffill().dropna()
+
+
+def rebalance_indices(dates: pd.DatetimeIndex, rebalance) -> np.ndarray:
+    """리밸런싱이 일어나는 행 번호를 반환합니다. 첫 행(최초 매수)은 항상 포함됩니다."""
+    n_days = len(dates)
+    if rebalance == 'D':
+        return np.arange(n_days)
+    if rebalance in (None, 'none'):
+        return np.array([0])
+    if rebalance not in _PERIOD_CODES:
+        raise ValueError(f"지원하지 않는 리밸런싱 주기입니다: {rebalance}")
+    periods = dates.to_period(_PERIOD_CODES[rebalance]).asi8
+    starts = np.flatnonzero(np.diff(periods) != 0) + 1
+    return np.concatenate(([0], starts))
+
+
+def _cash(weights: np.ndarray):
+    """비중(또는 가중치 행렬의 각 행)에서 자산에 배분되지 않은 현금 비중"""
+    return 1 - weights.sum(axis=-1)
+
+
+def _threshold_indices(price_matrix: np.ndarray, weights: np.ndarray, threshold: float) -> np.ndarray:
+    """
+    비중 이탈 기준 리밸런싱 시점을 찾습니다.
+    리밸런싱 사이 구간은 한 번에 행렬로 계산하고, 루프는 '리밸런싱 횟수'만큼만 돕니다.
+    """
+    n_days = len(price_matrix)
+    cash = _cash(weights)
+    indices = [0]
+    base = 0
+    chunk_start = 1
+    while chunk_start < n_days:
+        chunk_end = min(chunk_start + _THRESHOLD_CHUNK, n_days)
+        growth = price_matrix[chunk_start:chunk_end] / price_matrix[base]
+        holdings = growth * weights
+        drifted = holdings / (holdings.sum(axis=1, keepdims=True) + cash)
+        breached = np.abs(drifted - weights).max(axis=1) > threshold
+        if breached.any():
+            base = chunk_start + int(np.argmax(breached))
+            indices.append(base)
+            chunk_start = base + 1
+        else:
+            chunk_start = chunk_end
+    return np.array(indices)
+
+
+def run_backtest(prices: pd.DataFrame, weights, rebalance='M', transaction_cost: float = 0.0) -> dict:
+    """
+    주기적(또는 비중 이탈 기준) 리밸런싱 백테스트를 수행합니다.
+    - 리밸런싱 사이에는 가격 변화에 따라 비중이 자연스럽게 변합니다(drift).
+    - 리밸런싱(최초 매수 포함) 때마다 회전율 × transaction_cost 만큼 비용을 차감합니다.
+    - 비중의 합이 1보다 작으면 나머지는 현금(수익률 0)으로 보유합니다.
+    반환값: {'value': 포트폴리오 가치(시작=1), 'weights': 일별 실제 비중, 'turnover': 리밸런싱일별 회전율}
+    """
+    prices = prepare_prices(prices)
+    price_matrix = prices.to_numpy(dtype='float64')
+    weights = np.asarray(weights, dtype='float64')
+    if len(price_matrix) == 0:
+        empty = pd.Series(dtype='float64')
+        return {'value': empty, 'weights': pd.DataFrame(columns=prices.columns), 'turnover': empty}
+
+    if isinstance(rebalance, (int, float)) and not isinstance(rebalance, bool):
+        indices = _threshold_indices(price_matrix, weights, float(rebalance))
+    else:
+        indices = rebalance_indices(prices.index, rebalance)
+
+    # 각 날짜가 속한 리밸런싱 구간과, 구간 시작일 대비 가격 비율
+    segment = np.searchsorted(indices, np.arange(len(price_matrix)), side='right') - 1
+    growth = price_matrix / price_matrix[indices][segment]
+    holdings = growth * weights
+    cash = _cash(weights)
+    segment_growth = holdings.sum(axis=1) + cash
+
+    # 리밸런싱 직전의 비중과 회전율, 그리고 구간별 시작 가치(비용 차감 후)를 누적곱으로 연결합니다.
+    period_ratio = price_matrix[indices[1:]] / price_matrix[indices[:-1]]
+    period_growth = period_ratio @ weights + cash
+    drifted = period_ratio * weights / period_growth[:, None]
+    turnover = np.concatenate(([np.abs(weights).sum()], np.abs(drifted - weights).sum(axis=1)))
+    cost_factor = 1 - transaction_cost * turnover
+    start_values = np.cumprod(np.concatenate(([1.0], period_growth)) * cost_factor)
+
+    value = start_values[segment] * segment_growth
+    return {
+        'value': pd.Series(value, index=prices.index),
+        'weights': pd.DataFrame(holdings / segment_growth[:, None], index=prices.index, columns=prices.columns),
+        'turnover': pd.Series(turnover, index=prices.index[indices])
+    }
+
+
+def run_backtest_batch(prices: pd.DataFrame, weight_matrix, rebalance='M', transaction_cost: float = 0.0) -> pd.DataFrame:
+    """
+    같은 가격 데이터로 여러 포트폴리오(가중치 행렬의 각 행)를 한 번에 백테스트합니다.
+    주기 리밸런싱은 모든 포트폴리오가 같은 날 리밸런싱하므로 행렬곱으로 한 번에 계산하고,
+    비중 이탈 기준(숫자)은 포트폴리오마다 시점이 달라 run_backtest()를 하나씩 실행합니다.
+    반환값: (날짜 x 포트폴리오) 포트폴리오 가치(시작=1)
+    """
+    weight_matrix = np.atleast_2d(np.asarray(weight_matrix, dtype='float64'))
+    if isinstance(rebalance, (int, float)) and not isinstance(rebalance, bool):
+        return pd.DataFrame({i: run_backtest(prices, w, rebalance, transaction_cost)['value']
+                             for i, w in enumerate(weight_matrix)})
+
+    prices = prepare_prices(prices)
+    price_matrix = prices.to_numpy(dtype='float64')
+    if len(price_matrix) == 0:
+        return pd.DataFrame(columns=range(len(weight_matrix)), dtype='float64')
+
+    indices = rebalance_indices(prices.index, rebalance)
+    segment = np.searchsorted(indices, np.arange(len(price_matrix)), side='right') - 1
+    growth = price_matrix / price_matrix[indices][segment]
+    cash = _cash(weight_matrix)
+    segment_growth = growth @ weight_matrix.T + cash
+
+    period_ratio = price_matrix[indices[1:]] / price_matrix[indices[:-1]]
+    period_growth = period_ratio @ weight_matrix.T + cash
+    drifted = period_ratio[:, None, :] * weight_matrix[None, :, :] / period_growth[:, :, None]
+    turnover = np.concatenate((np.abs(weight_matrix).sum(axis=1)[None, :],
+                               np.abs(drifted - weight_matrix[None, :, :]).sum(axis=2)))
+    cost_factor = 1 - transaction_cost * turnover
+    start_values = np.cumprod(np.concatenate((np.ones((1, len(weight_matrix))), period_growth)) * cost_factor, axis=0)
+
+    return pd.DataFrame(start_values[segment] * segment_growth, index=prices.index)
+
+
+def run_backtests(prices: pd.DataFrame, weights, schedules: list, transaction_cost: float = 0.0) -> pd.DataFrame:
+    """여러 리밸런싱 주기를 한 번에 비교합니다. 컬럼은 주기, 값은 포트폴리오 가치입니다."""
+    return pd.DataFrame({schedule: run_backtest(prices, weights, schedule, transaction_cost)['value'] for schedule in schedules})
+
+
+def rolling_metrics(value: pd.Series, window: int = 126, risk_free_rate: float = 0.0) -> pd.DataFrame:
+    """
+    포트폴리오 가치 시계열로부터 롤링 연수익률·변동성·샤프 지수와 낙폭(drawdown)을 계산합니다.
+    누적합을 이용해 창 크기와 상관없이 한 번의 패스로 계산합니다.
+    """
+    values = value.to_numpy(dtype='float64')
+    returns = np.diff(values) / values[:-1]
+    n_returns = len(returns)
+
+    rolling_return = np.full(len(values), np.nan)
+    rolling_volatility = np.full(len(values), np.nan)
+    if n_returns >= window:
+        cumsum = np.concatenate(([0.0], np.cumsum(returns)))
+        cumsum_sq = np.concatenate(([0.0], np.cumsum(returns**2)))
+        window_mean = (cumsum[window:] - cumsum[:-window]) / window
+        window_var = np.maximum((cumsum_sq[window:] - cumsum_sq[:-window]) / window - window_mean**2, 0)
+        # 수익률 i번째는 가치 i+1번째 날에 해당하므로 한 칸 밀어서 채웁니다.
+        rolling_return[window:] = (1 + window_mean)**TRADING_DAYS - 1
+        rolling_volatility[window:] = np.sqrt(window_var) * np.sqrt(TRADING_DAYS)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rolling_sharpe = np.where(rolling_volatility > 0, (rolling_return - risk_free_rate) / rolling_volatility, np.nan)
+    drawdown = values / np.maximum.accumulate(values) - 1
+
+    return pd.DataFrame({
+        'rolling_return': rolling_return,
+        'rolling_volatility': rolling_volatility,
+        'rolling_sharpe': rolling_sharpe,
+        'drawdown': drawdown
+    }, index=value.index)
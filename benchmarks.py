@@ -0,0 +1,246 @@
+# benchmarks.py
+"""
+fetch → analyze → predict 파이프라인의 성능 측정 스크립트입니다.
+합성(또는 KRX CSV 예제) 가격 패널로 각 단계의 실행 시간과 최대 메모리를 표로 출력합니다.
+네트워크를 사용하지 않으며, 가격 공급자는 메모리의 가짜 공급자로, 저장소는 임시 폴더로 바꿔서 실행합니다.
+
+사용 예:
+    python benchmarks.py --assets 50 --days 2520
+    python benchmarks.py --fixture-dir . --only create_features train_and_predict
+    python benchmarks.py --assets 500 --only compute_indicators indicator_engine_append
+    python benchmarks.py --save baseline.json            # 기준 결과 저장
+    python benchmarks.py --compare baseline.json         # 기준보다 느려진 항목이 있으면 종료 코드 1
+    python benchmarks.py --profile                       # 항목별 cProfile 결과를 .profiles/에 저장
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import tracemalloc
+import numpy as np
+import pandas as pd
+from config import START_DATE, PROFILE_ENV_VAR, FETCH_MAX_WORKERS, resolve_end_date
+from price_store import PriceProvider, PriceStore
+from fetch_scheduler import ConcurrentProvider
+from local_data import scan_directory, load_krx_files
+from price_panel import PricePanel
+import data_fetcher
+from portfolio_analyzer import calculate_returns, get_portfolio_performance, get_portfolio_performance_batch
+from profiling import profile_stage, profile_records
+
+
+# --- 입력 데이터 ---
+
+def synthetic_ohlcv(n_assets: int, n_days: int, seed: int = 0) -> dict:
+    """기하 브라운 운동으로 만든 {티커: OHLCV DataFrame}입니다. 마지막 날짜가 조회 종료일 직전이 되도록 만듭니다."""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end=pd.Timestamp(resolve_end_date()) - pd.Timedelta(days=1), periods=n_days)
+    drift = rng.normal(0.0003, 0.0002, n_assets)
+    vol = rng.uniform(0.01, 0.03, n_assets)
+    close = 100 * np.exp(np.cumsum(drift + vol * rng.standard_normal((n_days, n_assets)), axis=0))
+    frames = {}
+    for j in range(n_assets):
+        spread = np.abs(rng.normal(0, vol[j], n_days)) * close[:, j]
+        frames[f"SYN{j:04d}"] = pd.DataFrame({
+            'Open': close[:, j] + rng.normal(0, 0.3, n_days) * spread,
+            'High': close[:, j] + spread,
+            'Low': close[:, j] - spread,
+            'Close': close[:, j],
+            'Volume': rng.integers(10_000, 1_000_000, n_days).astype('float64')
+        }, index=dates)
+    return frames
+
+
+def fixture_ohlcv(directory: str) -> dict:
+    """폴더 안의 KRX CSV 파일(예: data_3618_20250703.csv)을 {티커: OHLCV}로 읽습니다."""
+    return {ticker: load_krx_files(paths) for ticker, paths in scan_directory(directory).items()}
+
+
+class FakeProvider(PriceProvider):
+    """메모리에 들고 있는 OHLCV를 돌려주는 가짜 공급자입니다. latency로 요청당 네트워크 지연을 흉내 낼 수 있습니다."""
+
+    def __init__(self, frames: dict, latency: float = 0.0):
+        self.frames = frames
+        self.latency = latency
+        self.calls = 0
+
+    def download(self, tickers: list, start: str, end: str) -> dict:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        start, end = pd.Timestamp(start), pd.Timestamp(end) - pd.Timedelta(days=1)
+        return {t: self.frames[t].loc[start:end] for t in tickers if t in self.frames}
+
+
+# --- 측정 ---
+
+def measure(func, repeat: int = 5, setup=None) -> dict:
+    """
+    func를 repeat번 실행해 시간(ms)을 재고, 한 번 더 실행해 tracemalloc 최대 메모리(MB)를 잽니다.
+    setup이 있으면 매 실행 전에 호출하고, 그 반환값(튜플)을 func의 인자로 넘깁니다. (setup 시간은 제외)
+    """
+    times = []
+    for _ in range(repeat):
+        args = setup() if setup else ()
+        start = time.perf_counter()
+        func(*args)
+        times.append((time.perf_counter() - start) * 1000)
+
+    args = setup() if setup else ()
+    tracemalloc.start()
+    try:
+        func(*args)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {'min_ms': min(times), 'median_ms': float(np.median(times)), 'mean_ms': float(np.mean(times)),
+            'peak_mb': peak / 2**20}
+
+
+def _use_fake_data(frames: dict, root: str, latency: float = 0.0):
+    """임시 폴더의 빈 저장소와 가짜 공급자로 교체합니다. (티커 캐시도 함께 비워집니다)"""
+    if os.path.exists(root):
+        shutil.rmtree(root)
+    data_fetcher.set_price_store(PriceStore(root))
+    data_fetcher.set_provider(ConcurrentProvider(FakeProvider(frames, latency), max_workers=FETCH_MAX_WORKERS))
+
+
+def build_cases(frames: dict, workdir: str, n_portfolios: int = 1000, ml_tickers: int = 3, latency: float = 0.0) -> dict:
+    """{항목 이름: (실행 함수, setup 함수)}를 만듭니다."""
+    tickers = list(frames)
+    store_root = os.path.join(workdir, 'store')
+    close = pd.DataFrame({t: df['Close'] for t, df in frames.items()})
+    daily_returns, _ = calculate_returns(close)
+    rng = np.random.default_rng(1)
+    weight_matrix = rng.dirichlet(np.ones(len(tickers)), n_portfolios)
+
+    def cold_store():
+        _use_fake_data(frames, store_root, latency)
+        return ()
+
+    def warm_store():
+        # 디스크 저장소는 채워 둔 채 티커 캐시만 비웁니다.
+        data_fetcher.set_price_store(PriceStore(store_root))
+        return ()
+
+    def fresh_panel():
+        return (PricePanel.from_frame(close),)
+
+    from ml_predictor import create_features, create_panel_features, stack_ohlcv, train_and_predict
+    from indicators import IndicatorEngine, compute_indicators
+
+    def appended_bar():
+        # 마지막 날을 뺀 데이터로 캐시를 채운 엔진에 하루치 새 행을 넣었을 때의 증분 계산 시간
+        engine = IndicatorEngine()
+        engine.compute({t: df.iloc[:-1] for t, df in frames.items()})
+        return engine, frames
+
+    ml_frames = dict(list(frames.items())[:ml_tickers])
+    stacked = stack_ohlcv(frames)
+
+    return {
+        'fetch_cold': (lambda: data_fetcher.fetch_close_prices(tickers), cold_store),
+        'fetch_store': (lambda: data_fetcher.fetch_close_prices(tickers), warm_store),
+        'fetch_cached': (lambda: data_fetcher.fetch_close_prices(tickers), None),
+        'calculate_returns': (lambda: calculate_returns(close), None),
+        'calculate_returns_panel': (lambda p: calculate_returns(p), fresh_panel),
+        'get_portfolio_performance': (lambda: get_portfolio_performance(weight_matrix[0], daily_returns), None),
+        'get_portfolio_performance_batch': (lambda: get_portfolio_performance_batch(weight_matrix, daily_returns), None),
+        'create_features': (lambda: [create_features(df) for df in frames.values()], None),
+        'create_panel_features': (lambda: create_panel_features(stacked), None),
+        'compute_indicators': (lambda: compute_indicators(frames), None),
+        'indicator_engine_append': (lambda engine, latest: engine.compute(latest), appended_bar),
+        'train_and_predict': (lambda: [train_and_predict(df) for df in ml_frames.values()], None),
+    }
+
+
+def run_suite(frames: dict, repeat: int = 5, only: list = None, profile: bool = False, **case_kwargs) -> pd.DataFrame:
+    workdir = tempfile.mkdtemp(prefix='visualize_bench_')
+    try:
+        cases = build_cases(frames, workdir, **case_kwargs)
+        # 'fetch_store'/'fetch_cached'는 앞 항목이 채운 저장소·캐시를 사용하므로 정의된 순서대로 실행합니다.
+        if only:
+            if any(name.startswith('fetch_') for name in only):
+                only = ['fetch_cold'] + [name for name in only if name != 'fetch_cold']
+            cases = {name: case for name, case in cases.items() if name in only}
+        rows = {}
+        for name, (func, setup) in cases.items():
+            if profile:
+                func = _profiled(name, func)
+            rows[name] = measure(func, repeat, setup)
+            print(f"  {name:<32} {rows[name]['median_ms']:>10.2f} ms", file=sys.stderr)
+        return pd.DataFrame.from_dict(rows, orient='index')
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def _profiled(name, func):
+    def wrapper(*args):
+        with profile_stage(f"bench_{name}"):
+            return func(*args)
+    return wrapper
+
+
+def compare_results(result: pd.DataFrame, baseline: pd.DataFrame, tolerance: float) -> pd.DataFrame:
+    """기준 결과 대비 중앙값 실행 시간 비율을 붙이고, tolerance보다 느려진 항목을 표시합니다."""
+    table = result.copy()
+    table['baseline_ms'] = baseline['median_ms'].reindex(table.index)
+    table['ratio'] = table['median_ms'] / table['baseline_ms']
+    table['regression'] = table['ratio'] > 1 + tolerance
+    return table
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="파이프라인 성능 측정 (시간·최대 메모리)")
+    parser.add_argument('--assets', type=int, default=20, help="합성 자산 수")
+    parser.add_argument('--days', type=int, default=1260, help="합성 거래일 수")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--fixture-dir', help="합성 데이터 대신 이 폴더의 KRX CSV 파일을 사용합니다")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--portfolios', type=int, default=1000, help="일괄 성과 계산에 사용할 포트폴리오 수")
+    parser.add_argument('--ml-tickers', type=int, default=3, help="train_and_predict를 실행할 종목 수")
+    parser.add_argument('--latency', type=float, default=0.0, help="가짜 공급자의 요청당 지연(초)")
+    parser.add_argument('--only', nargs='+', help="실행할 항목 이름")
+    parser.add_argument('--profile', action='store_true', help="항목별 cProfile·tracemalloc 결과를 기록합니다")
+    parser.add_argument('--save', help="결과를 JSON으로 저장할 경로")
+    parser.add_argument('--compare', help="비교할 기준 결과(JSON) 경로")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="허용하는 속도 저하 비율 (기본 20%%)")
+    args = parser.parse_args(argv)
+
+    if args.profile:
+        os.environ[PROFILE_ENV_VAR] = 'all'
+    frames = fixture_ohlcv(args.fixture_dir) if args.fixture_dir else synthetic_ohlcv(args.assets, args.days, args.seed)
+    if not frames:
+        parser.error("측정할 가격 데이터가 없습니다.")
+    n_days = max(len(df) for df in frames.values())
+    print(f"자산 {len(frames)}개 x 거래일 {n_days}일 (기간 {START_DATE} ~ {resolve_end_date()})", file=sys.stderr)
+
+    result = run_suite(frames, args.repeat, args.only, args.profile, n_portfolios=args.portfolios,
+                       ml_tickers=args.ml_tickers, latency=args.latency)
+    table = result
+    failed = False
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = pd.DataFrame(json.load(f)['results']).T
+        table = compare_results(result, baseline, args.tolerance)
+        failed = bool(table['regression'].any())
+
+    with pd.option_context('display.float_format', '{:.2f}'.format, 'display.width', 160):
+        print(table.to_string())
+    if args.profile:
+        for record in profile_records():
+            print(f"\n[{record['stage']}] {record.get('profile_path', '')}")
+            for row in record.get('top_functions', []):
+                print(f"  {row['cumulative_seconds']:>8.4f}s  {row['function']}")
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({'assets': len(frames), 'days': n_days, 'results': result.to_dict(orient='index')}, f, indent=1)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,72 @@
+# cache_backend.py
+import sys
+import logging
+import threading
+import functools
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+def streamlit_running() -> bool:
+    """현재 프로세스가 `streamlit run`으로 실행 중인지 확인합니다. (streamlit을 새로 임포트하지 않습니다)"""
+    if 'streamlit' not in sys.modules:
+        return False
+    try:
+        from streamlit import runtime
+        return runtime.exists()
+    except ImportError:
+        return False
+
+
+def cache_data(func=None, **st_kwargs):
+    """
+    Streamlit 앱에서는 st.cache_data로, 그 밖(CLI·배치 작업·프로세스 풀)에서는 프로세스 메모리 캐시로 동작하는 데코레이터입니다.
+    두 경우 모두 캐시를 비우는 .clear()를 제공합니다.
+    메모리 캐시는 max_entries를 지켜, 넘치면 가장 오래 쓰지 않은 항목부터 버립니다. (그 밖의 st.cache_data 옵션은 무시)
+    """
+    def decorator(f):
+        if streamlit_running():
+            import streamlit as st
+            return st.cache_data(**st_kwargs)(f)
+
+        cache = OrderedDict()
+        lock = threading.Lock()
+        max_entries = st_kwargs.get('max_entries')
+
+        @functools.wraps(f)
+        def wrapper(*args, **kwargs):
+            key = (args, tuple(sorted(kwargs.items())))
+            with lock:
+                if key in cache:
+                    cache.move_to_end(key)
+                    return cache[key]
+            result = f(*args, **kwargs)
+            with lock:
+                cache[key] = result
+                cache.move_to_end(key)
+                if max_entries is not None:
+                    while len(cache) > max_entries:
+                        cache.popitem(last=False)
+            return result
+
+        def clear():
+            with lock:
+                cache.clear()
+
+        wrapper.clear = clear
+        return wrapper
+
+    return decorator(func) if func is not None else decorator
+
+
+def notify(level: str, message: str):
+    """
+    사용자에게 보여줄 메시지를 남깁니다. Streamlit 앱에서는 st.error/st.warning 등으로 화면에 표시하고,
+    그 밖에서는 로그로 남깁니다. level: 'error' | 'warning' | 'info'
+    """
+    if streamlit_running():
+        import streamlit as st
+        getattr(st, level)(message)
+    else:
+        getattr(logger, level)(message)
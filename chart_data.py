@@ -0,0 +1,158 @@
+# chart_data.py
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from scipy.signal import find_peaks
+from config import CHART_MAX_POINTS
+
+# 💡 차트에는 전체 데이터가 아니라 모양을 보존하도록 골라낸 최대 max_points개의 점만 보냅니다.
+# 기간이 10년이든 30년이든 브라우저로 보내는 데이터 크기와 그리는 시간은 거의 같습니다.
+# 고점/저점 탐지는 항상 전체 데이터로 하고, 찾은 극값은 줄인 선에도 반드시 포함시킵니다.
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    LTTB(Largest-Triangle-Three-Buckets)로 n_out개의 점 위치를 고릅니다.
+    첫 점과 마지막 점은 항상 포함하고, 나머지는 구간마다 이웃 구간과 가장 큰 삼각형을 만드는 점을 고릅니다.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    anchor = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_hi = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x, avg_y = x[hi:next_hi].mean(), y[hi:next_hi].mean()
+        area = np.abs((x[anchor] - avg_x) * (y[lo:hi] - y[anchor]) - (x[anchor] - x[lo:hi]) * (avg_y - y[anchor]))
+        anchor = lo + int(np.argmax(area))
+        selected[i + 1] = anchor
+    return selected
+
+
+def minmax_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """구간마다 최솟값과 최댓값 위치를 남기는 방식으로 약 n_out개의 점 위치를 고릅니다. (급등락을 놓치지 않습니다)"""
+    n = len(y)
+    if n_out >= n or n_out < 4:
+        return np.arange(n)
+    edges = np.linspace(0, n, n_out // 2 + 1).astype(np.int64)
+    picks = [0, n - 1]
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        if hi > lo:
+            picks.extend((lo + int(np.argmin(y[lo:hi])), lo + int(np.argmax(y[lo:hi]))))
+    return np.unique(picks)
+
+
+_METHODS = {
+    'lttb': lambda x, y, n_out: lttb_indices(x, y, n_out),
+    'minmax': lambda x, y, n_out: minmax_indices(y, n_out)
+}
+
+
+def _x_values(index: pd.Index) -> np.ndarray:
+    if isinstance(index, pd.DatetimeIndex):
+        return index.asi8.astype('float64')
+    if pd.api.types.is_numeric_dtype(index):
+        return index.to_numpy(dtype='float64')
+    return np.arange(len(index), dtype='float64')
+
+
+def _select_positions(data, max_points: int, method: str) -> np.ndarray:
+    """컬럼마다 (빈 값을 뺀) 점을 골라 그 위치를 합칩니다. 모든 컬럼을 같은 행에서 자르므로 선이 끊기지 않습니다."""
+    frame = data.to_frame() if isinstance(data, pd.Series) else data
+    x = _x_values(frame.index)
+    positions = []
+    for column in frame.columns:
+        y = frame[column].to_numpy(dtype='float64')
+        valid = np.flatnonzero(~np.isnan(y))
+        positions.append(valid[_METHODS[method](x[valid], y[valid], max_points)])
+    return np.unique(np.concatenate(positions)) if positions else np.arange(0)
+
+
+class ChartCache:
+    """
+    데이터 내용의 지문(hash)을 키로, 줄인 차트 데이터와 극값을 보관하는 LRU 캐시입니다.
+    재실행마다 같은 데이터가 들어오면 다시 계산하지 않고, 데이터가 바뀐 경우에만 새로 계산합니다.
+    """
+
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+            self.misses += 1
+        value = compute()
+        with self._lock:
+            self._items[key] = value
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._items)}
+
+
+_cache = ChartCache()
+
+
+def get_chart_cache() -> ChartCache:
+    return _cache
+
+
+def fingerprint(data) -> str:
+    """Series/DataFrame의 인덱스·컬럼·값으로 만든 지문입니다. 값이 하나라도 바뀌면 지문도 바뀝니다."""
+    hashed = pd.util.hash_pandas_object(data, index=True).to_numpy()
+    digest = hashlib.sha1(hashed.tobytes())
+    digest.update(repr(list(data.columns) if isinstance(data, pd.DataFrame) else data.name).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def downsample(data, max_points: int = CHART_MAX_POINTS, method: str = 'lttb', keep=None):
+    """
+    Series/DataFrame을 컬럼당 최대 max_points개의 점으로 줄여 반환합니다. (method: 'lttb' | 'minmax')
+    keep에 인덱스 라벨(예: 고점/저점 날짜)을 주면 그 행은 항상 남깁니다.
+    """
+    if method not in _METHODS:
+        raise ValueError(f"지원하지 않는 다운샘플링 방식입니다: {method}")
+    if len(data) <= max_points:
+        return data
+    keep = tuple(keep) if keep is not None else ()
+
+    def compute():
+        positions = _select_positions(data, max_points, method)
+        if keep:
+            kept = data.index.get_indexer(list(keep))
+            positions = np.union1d(positions, kept[kept >= 0])
+        return data.iloc[positions]
+
+    return _cache.get_or_compute(('downsample', fingerprint(data), max_points, method, keep), compute)
+
+
+def find_extrema(series: pd.Series, distance: int = 100) -> tuple:
+    """전체 데이터에서 고점과 저점을 찾아 (고점 시리즈, 저점 시리즈)로 반환합니다."""
+    def compute():
+        values = series.to_numpy(dtype='float64')
+        peaks, _ = find_peaks(values, distance=distance)
+        troughs, _ = find_peaks(-values, distance=distance)
+        return series.iloc[peaks], series.iloc[troughs]
+
+    return _cache.get_or_compute(('extrema', fingerprint(series), distance), compute)
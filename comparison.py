@@ -0,0 +1,117 @@
+# comparison.py
+import numpy as np
+import pandas as pd
+from config import BENCHMARK_CONFIG
+from data_fetcher import fetch_price_panel, fetch_benchmark_data
+from backtester import run_backtest_batch
+from risk_analyzer import risk_metrics
+from portfolio_store import get_portfolio_store
+from cache_backend import cache_data
+
+# 💡 여러 포트폴리오를 비교할 때 포트폴리오마다 데이터를 받고 계산하지 않습니다.
+# 모든 포트폴리오의 티커를 합쳐 가격을 한 번에 불러오고, (포트폴리오 x 티커) 가중치 행렬과의
+# 행렬곱 한 번으로 모든 포트폴리오의 수익률을 만듭니다. 100개를 비교해도 1개와 거의 같은 시간이 걸립니다.
+
+
+def ticker_weights(portfolio: dict) -> dict:
+    """앱 형식(자산 이름 기준 %)의 포트폴리오 비중을 {티커: 비중(0~1)}로 바꿉니다. 'assets'가 없으면 키를 티커로 봅니다."""
+    name_to_ticker = {asset['name']: asset['ticker'] for asset in portfolio.get('assets', [])}
+    weights = {}
+    for key, value in portfolio['weights'].items():
+        ticker = name_to_ticker.get(key, key)
+        weights[ticker] = weights.get(ticker, 0.0) + value / 100
+    return weights
+
+
+def duplicate_names(portfolios: list) -> list:
+    """두 번 이상 나오는 포트폴리오 이름 목록 (결과를 이름으로 구분하므로 이름은 겹치면 안 됩니다)"""
+    names = [port['name'] for port in portfolios]
+    return sorted({name for name in names if names.count(name) > 1})
+
+
+def compare_portfolios(portfolios: list, start=None, end=None, rebalance='M', transaction_cost: float = 0.0,
+                       risk_free_rate: float = 0.0, live: bool = False, unavailable=()) -> dict:
+    """
+    여러 포트폴리오를 [start, end] 기간에 대해 한 번에 비교합니다.
+    반환값: {'metrics': 포트폴리오별 위험·성과 지표, 'cumulative': (날짜 x 포트폴리오) 백테스트 가치(시작=1),
+            'missing': {포트폴리오 이름: 데이터를 가져오지 못해 제외한 티커 목록},
+            'missing_weight': {포트폴리오 이름: 제외한 티커의 비중 합(0~1)}}
+    포트폴리오마다 비중이 있는 티커가 모두 거래되기 시작한 날부터 계산합니다. (그 전 구간의 누적 가치는 빈 값)
+    제외한 티커의 비중은 같은 포트폴리오의 나머지 티커에 비례해 다시 배분하고, 남은 티커가 없는 포트폴리오는 결과에서 뺍니다.
+    unavailable: 이미 받지 못한 것으로 확인된 티커 (prefetch()의 반환값), 다시 요청하지 않고 바로 제외합니다.
+    """
+    duplicated = duplicate_names(portfolios)
+    if duplicated:
+        raise ValueError(f"포트폴리오 이름이 중복되었습니다: {', '.join(map(str, duplicated))}")
+    names = [port['name'] for port in portfolios]
+    weights = [ticker_weights(port) for port in portfolios]
+    unavailable = set(unavailable)
+    tickers = list(dict.fromkeys(t for port_weights in weights for t in port_weights if t not in unavailable))
+    # 휴장일 차이로 생긴 빈 값은 직전 가격으로 채웁니다. 상장 전 구간만 빈 값으로 남습니다.
+    prices = fetch_price_panel(tickers, live=live).slice(start, end).to_frame('prices').ffill()
+    listed = prices.notna().to_numpy()
+    available = [t for t, has_prices in zip(prices.columns, listed.any(axis=0)) if has_prices]
+    missing = {name: [t for t in port_weights if t not in available] for name, port_weights in zip(names, weights)}
+    missing_weight = {name: sum(port_weights[t] for t in missing[name]) for name, port_weights in zip(names, weights)}
+    empty = {'metrics': pd.DataFrame(), 'cumulative': pd.DataFrame(), 'missing': missing, 'missing_weight': missing_weight}
+    if not available or len(prices) < 2:
+        return empty
+
+    prices = prices[available]
+    weight_matrix = np.array([[port_weights.get(t, 0.0) for t in available] for port_weights in weights])
+    # 빠진 비중을 그대로 두면 백테스트에서는 현금으로 계산되므로, 원래 비중 합이 되도록 나머지 티커에 비례 배분합니다.
+    covered = weight_matrix.sum(axis=1)
+    totals = np.array([sum(port_weights.values()) for port_weights in weights])
+    valid = covered > 0
+    if not valid.any():
+        return empty
+    weight_matrix = weight_matrix[valid] * (totals[valid] / covered[valid])[:, None]
+    names = [name for name, keep in zip(names, valid) if keep]
+
+    # 포트폴리오마다 비중이 있는 티커가 모두 거래되기 시작한 행부터 비교합니다. (다른 포트폴리오의 티커 때문에 기간이 줄지 않습니다)
+    # 시작 행이 같은 포트폴리오끼리는 한 번의 행렬곱으로 계산합니다.
+    active = weight_matrix != 0
+    first_rows = prices.notna().to_numpy().argmax(axis=0)
+    start_rows = np.where(active, first_rows, 0).max(axis=1)
+
+    benchmark_returns = None
+    benchmark_prices = (fetch_benchmark_data(BENCHMARK_CONFIG['ticker'], live)
+                        if BENCHMARK_CONFIG['ticker'] not in unavailable else pd.Series(dtype='float64'))
+    if not benchmark_prices.empty:
+        benchmark_returns = benchmark_prices.reindex(benchmark_prices.index.union(prices.index)).ffill().pct_change().reindex(prices.index)
+
+    metrics, cumulative = [], []
+    for start_row in np.unique(start_rows):
+        members = np.flatnonzero(start_rows == start_row)
+        columns = active[members].any(axis=0)
+        group_prices = prices.iloc[start_row:, columns]
+        if len(group_prices) < 2:
+            continue
+        group_weights = weight_matrix[members][:, columns]
+        group_names = [names[i] for i in members]
+        group_returns = group_prices.pct_change().iloc[1:]
+        group_benchmark = benchmark_returns.reindex(group_returns.index) if benchmark_returns is not None else None
+        metrics.append(risk_metrics(group_weights, group_returns, group_benchmark, risk_free_rate, names=group_names))
+        value = run_backtest_batch(group_prices, group_weights, rebalance, transaction_cost)
+        value.columns = group_names
+        cumulative.append(value)
+
+    if not metrics:
+        return empty
+    metrics = pd.concat(metrics)
+    order = [name for name in names if name in metrics.index]
+    return {'metrics': metrics.loc[order], 'cumulative': pd.concat(cumulative, axis=1)[order],
+            'missing': missing, 'missing_weight': missing_weight}
+
+
+@cache_data(show_spinner=False, max_entries=32)
+def compare_saved(keys: tuple, start=None, end=None, rebalance='M', transaction_cost: float = 0.0,
+                  risk_free_rate: float = 0.0, live: bool = False, data_version: int = 0) -> dict:
+    """
+    저장소의 포트폴리오들을 비교합니다. keys는 ((이름, 버전), ...)이며, 결과는 (버전, 기간, 백테스트 설정)별로 캐시됩니다.
+    포트폴리오를 다시 저장하면 버전이 바뀌므로 캐시된 예전 결과는 사용되지 않습니다.
+    live=True면 장중인 오늘 봉까지 사용합니다. data_version은 캐시 키로만 쓰입니다.
+    (실시간 갱신으로 새 봉이 들어오면 data_fetcher.data_version()이 바뀌어 다시 계산합니다)
+    """
+    return compare_portfolios(get_portfolio_store().get_many(keys), start, end, rebalance, transaction_cost,
+                              risk_free_rate, live)
@@ -1,9 +1,59 @@
 # config.py
-from datetime import datetime
+from datetime import datetime, timedelta
 
 # 데이터 조회 기간
 START_DATE = "2018-01-01"
-END_DATE = datetime.today().strftime('%Y-%m-%d')
+
+
+def resolve_end_date(include_today: bool = False) -> str:
+    """
+    조회 종료일(이 날짜는 포함하지 않음)을 호출 시점 기준으로 계산합니다. 서버를 며칠씩 띄워 두어도 날짜가 고정되지 않습니다.
+    include_today=True(실시간 갱신 모드)면 장중인 오늘 봉까지 포함하도록 내일 날짜를 반환합니다.
+    """
+    end = datetime.today() + (timedelta(days=1) if include_today else timedelta(0))
+    return end.strftime('%Y-%m-%d')
+
+
+# 내려받은 가격 데이터를 보관하는 로컬 저장소 폴더 (다음 실행부터는 부족한 최근 구간만 받습니다)
+PRICE_STORE_DIR = ".price_store"
+
+# 가격 데이터 출처: 'yahoo'(yfinance), 'local'(LOCAL_DATA_DIR 폴더의 KRX CSV 파일, 오프라인 실행)
+# 또는 'replay'(LOCAL_DATA_DIR의 기록된 봉을 LIVE_REFRESH_SECONDS초마다 한 개씩 다시 공개, 실시간 모드 확인용)
+DATA_SOURCE = "yahoo"
+# KRX CSV 파일을 모아 두는 전용 폴더 (하위 폴더까지 훑으므로 저장소 루트처럼 큰 폴더는 지정하지 않습니다)
+LOCAL_DATA_DIR = "data"
+# KRX 파일 이름의 종목 코드 → 티커 (예: {'3618': '003618.KS'}), 없으면 파일의 코드를 그대로 사용
+LOCAL_TICKER_MAP = {}
+
+# 실시간 갱신 모드: 보유 종목의 최신 봉을 확인하는 주기(초)와, 'replay' 출처에서 처음에 숨겨 둘 최근 봉 개수
+LIVE_REFRESH_SECONDS = 60
+REPLAY_HOLDBACK_BARS = 20
+
+# 다운로드 동시 실행 수 / 재시도 횟수 / 티커당 제한 시간(초, 재시도 포함)
+# 요청 한 번의 제한 시간은 모든 시도와 재시도 대기가 FETCH_TIMEOUT 안에 들어가도록 나눠 정합니다. (fetch_scheduler.request_timeout)
+FETCH_MAX_WORKERS = 8
+FETCH_MAX_RETRIES = 3
+FETCH_TIMEOUT = 30
+
+# 학습된 예측 모델 저장 폴더 / 사용하지 않은 모델 보관 기간(일)
+MODEL_STORE_DIR = ".model_store"
+MODEL_MAX_AGE_DAYS = 30
+# 새 데이터가 추가됐을 때 기존 모델에 이어서 학습할 라운드 수와, 다시 처음부터 학습하기 전까지의 최대 라운드 수
+MODEL_INCREMENT_ROUNDS = 10
+MODEL_MAX_ROUNDS = 300
+
+# 저장된 포트폴리오를 보관하는 SQLite 파일 (브라우저를 새로 고쳐도 유지됩니다)
+PORTFOLIO_DB_PATH = ".portfolios.sqlite3"
+
+# 선택형 프로파일링: 이 환경 변수를 켜면 (예: VISUALIZE_PROFILE=1) 단계별 시간·메모리·cProfile 결과를 기록합니다.
+PROFILE_ENV_VAR = "VISUALIZE_PROFILE"
+PROFILE_DIR = ".profiles"
+
+# 무위험 수익률로 사용할 미국 10년 국채 금리 티커 (값이 10배로 제공됩니다)
+RISK_FREE_TICKER = "^TNX"
+
+# 차트 한 선(trace)에 그릴 최대 점 개수 (기간이 길어도 이 개수로 줄여 브라우저로 보냅니다)
+CHART_MAX_POINTS = 800
 
 
 # 💡 분석할 자산 목록 (자유롭게 추가/수정/삭제 가능)
@@ -38,6 +88,14 @@ ASSETS = {
     ]
 }
 
+# 최적화 탭에서 사용할 자산군별 비중 한도 (하한, 상한)
+ASSET_CLASS_BOUNDS = {
+    '국내주식': (0.0, 0.6),
+    '해외주식': (0.0, 0.6),
+    '채권': (0.0, 0.5),
+    '원자재/암호화폐': (0.0, 0.2)
+}
+
 # 백테스팅 비교 기준 지수 (코스피: ^KS11, S&P 500: ^GSPC, 나스닥: ^IXIC)
 BENCHMARK_CONFIG = {
     'name': 'S&P 500',    # 화면에 표시될 이름
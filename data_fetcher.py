@@ -1,43 +1,282 @@
 # data_fetcher.py
-import yfinance as yf
+import threading
 import pandas as pd
-import streamlit as st
-from curl_cffi import requests as curl_requests 
-# 💡 curl_cffi 라이브러리의 requests를 임포트
-from config import START_DATE, END_DATE
+from config import (START_DATE, PRICE_STORE_DIR, RISK_FREE_TICKER, BENCHMARK_CONFIG,
+                    FETCH_MAX_WORKERS, FETCH_MAX_RETRIES, FETCH_TIMEOUT,
+                    DATA_SOURCE, LOCAL_DATA_DIR, LOCAL_TICKER_MAP,
+                    LIVE_REFRESH_SECONDS, REPLAY_HOLDBACK_BARS, resolve_end_date)
+from price_store import PriceProvider, PriceStore
+from fetch_scheduler import ConcurrentProvider, request_timeout
+from local_data import LocalFileProvider, ReplayProvider
+from price_panel import PricePanel
+from cache_backend import cache_data, notify
+
+
+def _new_session():
+    # 💡 curl_cffi 라이브러리의 requests를 임포트 (CLI·배치 작업의 시작 속도를 위해 Yahoo를 실제로 쓸 때만 임포트합니다)
+    from curl_cffi import requests as curl_requests
+    # 💡💡💡 curl_cffi를 사용하여 세션 객체를 만들고 SSL 검증을 비활성화합니다.
+    new_session = curl_requests.Session(impersonate="chrome110", verify=False)
+    new_session.headers['User-Agent'] = 'Mozilla/5.0'
+    return new_session
+
+
+class YahooProvider(PriceProvider):
+    """
+    yfinance로 가격 데이터를 내려받는 기본 공급자입니다.
+    curl_cffi 세션은 스레드 간에 공유할 수 없으므로 스레드마다 세션을 하나씩 만들어 재사용합니다.
+    yf.download()는 결과를 모듈 전역 dict에 모았다가 돌려주므로 여러 스레드에서 동시에 부르면 서로의 결과를 덮어씁니다.
+    그래서 티커마다 독립된 yf.Ticker(...).history()를 사용합니다.
+    """
+
+    def __init__(self, timeout: float = 10):
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _session(self):
+        if not hasattr(self._local, 'session'):
+            self._local.session = _new_session()
+        return self._local.session
+
+    def download(self, tickers: list, start: str, end: str) -> dict:
+        import yfinance as yf
+        from yfinance.exceptions import YFPricesMissingError
+        frames = {}
+        for ticker in tickers:
+            try:
+                frames[ticker] = yf.Ticker(ticker, session=self._session()).history(
+                    start=start, end=end, auto_adjust=False, actions=False, timeout=self.timeout, raise_errors=True)
+            except YFPricesMissingError:
+                # 요청 구간에 거래일이 없으면(주말·휴장일) 새 데이터가 없는 것으로 봅니다.
+                # 그 밖의 오류는 그대로 올려 ConcurrentProvider가 재시도하게 합니다.
+                frames[ticker] = pd.DataFrame()
+        return frames
+
+
+class TickerCache:
+    """
+    티커 단위로 종가 시리즈를 메모리에 보관하는 캐시입니다.
+    자산 구성이 바뀌어도 이미 불러온 티커는 다시 받지 않고, 빠진 티커만 한 번에 요청합니다.
+    항목은 티커당 하나(불러온 구간과 함께 보관)이고 요청 구간은 읽을 때 잘라 내므로,
+    오래 띄워 둔 서버에서 종료일이 매일 바뀌어도 항목이 늘어나지 않습니다.
+    """
+
+    def __init__(self):
+        self._series = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, tickers: list, start: str, end: str) -> tuple:
+        """
+        (캐시에 있던 {티커: [start, end) 구간 시리즈}, 다시 불러와야 하는 티커 목록)을 반환합니다.
+        불러온 구간이 요청 구간을 덮지 못하면(예: 날짜가 바뀜) 캐시에 없는 것으로 봅니다.
+        """
+        with self._lock:
+            found = {}
+            for t in tickers:
+                entry = self._series.get(t)
+                if entry is not None and entry[1] <= start and entry[2] >= end:
+                    found[t] = entry[0]
+            missing = [t for t in tickers if t not in found]
+            self.hits += len(found)
+            self.misses += len(missing)
+        last = pd.Timestamp(end) - pd.Timedelta(days=1)
+        return {t: series.loc[start:last] for t, series in found.items()}, missing
+
+    def put_many(self, items: dict, start: str, end: str):
+        """{티커: 시리즈}를 [start, end) 구간을 불러온 결과로 저장합니다."""
+        with self._lock:
+            self._series.update({t: (series, start, end) for t, series in items.items()})
+
+    def merge_many(self, updates: dict):
+        """
+        {티커: 새로 받은 종가 시리즈}를 이미 캐시된 티커의 시리즈에 이어 붙입니다.
+        겹치는 날짜(장중에 값이 바뀐 마지막 봉)는 새 값으로 바꿉니다.
+        """
+        with self._lock:
+            for t, new in updates.items():
+                entry = self._series.get(t)
+                if entry is None or new.empty:
+                    continue
+                series, start, end = entry
+                self._series[t] = (pd.concat([series.loc[series.index < new.index[0]], new]), start, end)
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._series)}
+
+
+# 💡 공급자와 저장소는 교체 가능합니다. (테스트에서는 로컬 가짜 공급자를 넣을 수 있습니다.)
+def _default_provider() -> PriceProvider:
+    if DATA_SOURCE == 'local':
+        return LocalFileProvider(LOCAL_DATA_DIR, LOCAL_TICKER_MAP)
+    if DATA_SOURCE == 'replay':
+        return ReplayProvider.from_directory(LOCAL_DATA_DIR, LOCAL_TICKER_MAP, holdback=REPLAY_HOLDBACK_BARS,
+                                             bar_seconds=LIVE_REFRESH_SECONDS)
+    # FETCH_TIMEOUT은 티커당 전체 예산(재시도 포함)이므로, 요청 한 번의 제한 시간은 그 안에 모든 시도가 들어가도록 나눠 정합니다.
+    yahoo = YahooProvider(timeout=request_timeout(FETCH_TIMEOUT, FETCH_MAX_RETRIES))
+    return ConcurrentProvider(yahoo, max_workers=FETCH_MAX_WORKERS, max_retries=FETCH_MAX_RETRIES, timeout=FETCH_TIMEOUT)
+
+
+# 공급자는 처음 사용할 때 만듭니다. ('replay'는 폴더의 파일을 모두 읽으므로 import 시점에 만들지 않습니다)
+_provider = None
+_provider_lock = threading.Lock()
+_store = None
+_ticker_cache = TickerCache()
+# 실시간 갱신으로 새 봉이 반영될 때마다 데이터 버전이 올라갑니다.
+_data_version = 0
+_version_lock = threading.Lock()
+
+
+def get_provider() -> PriceProvider:
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            _provider = _default_provider()
+        return _provider
+
+
+def set_provider(provider: PriceProvider):
+    """가격 공급자를 교체하고, 이전 공급자로 만든 캐시를 비웁니다."""
+    global _provider
+    with _provider_lock:
+        _provider = provider
+    _ticker_cache.clear()
+    fetch_ohlcv.clear()
+
+
+def get_price_store() -> PriceStore:
+    global _store
+    if _store is None:
+        _store = PriceStore(PRICE_STORE_DIR)
+    return _store
+
+
+def set_price_store(store: PriceStore):
+    global _store
+    _store = store
+    _ticker_cache.clear()
+    fetch_ohlcv.clear()
+
+
+def data_version() -> int:
+    """실시간 갱신으로 새 봉이 반영된 횟수입니다. (결과 캐시의 키로 사용해 새 봉이 들어오면 다시 계산되게 합니다)"""
+    return _data_version
+
+
+# 💡 조회 함수의 live=True는 실시간 갱신 모드(장중인 오늘 봉까지 포함)입니다.
+#    모드는 화면(세션)마다 다르므로 전역 상태로 두지 않고 호출할 때마다 넘겨받습니다.
+def _date_range(live: bool = False) -> tuple:
+    """(시작일, 종료일)을 요청할 때마다 계산합니다. 종료일은 포함하지 않습니다."""
+    return START_DATE, resolve_end_date(include_today=live)
+
+
+def _load_prices(tickers: list, live: bool = False) -> dict:
+    """저장소에서 티커별 OHLCV를 읽고, 부족한 최근 구간만 공급자에게 요청합니다."""
+    start, end = _date_range(live)
+    return get_price_store().update(tickers, get_provider(), start, end)
+
+
+def apply_live_bars(frames: dict):
+    """
+    실시간 갱신으로 받은 {티커: 새 OHLCV 행}을 메모리 캐시에 반영합니다.
+    종가 시리즈는 티커 캐시에 이어 붙이고(전체를 다시 읽지 않음), OHLCV 캐시는 비운 뒤 데이터 버전을 올립니다.
+    """
+    global _data_version
+    _ticker_cache.merge_many({t: _close_series(df).dropna() for t, df in frames.items()})
+    fetch_ohlcv.clear()
+    with _version_lock:
+        _data_version += 1
+
+
+def _close_series(df: pd.DataFrame) -> pd.Series:
+    """'Adj Close'가 있으면 우선 사용, 없으면 'Close'를 사용합니다."""
+    if "Adj Close" in df.columns and df["Adj Close"].notna().any():
+        return df["Adj Close"]
+    if "Close" in df.columns:
+        return df["Close"]
+    return pd.Series(dtype='float64')
+
+
+def cache_stats() -> dict:
+    """티커 캐시의 적중/실패 횟수와 보관 중인 티커 수를 반환합니다."""
+    return _ticker_cache.stats()
+
+
+def _close_series_map(tickers: list, live: bool = False) -> dict:
+    """
+    {티커: 종가 시리즈}를 반환합니다.
+    캐시에 없는 티커만 모아서 한 번에 불러오고, 데이터가 없는 티커는 결과에서 빠집니다.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    start, end = _date_range(live)
+    found, missing = _ticker_cache.get_many(tickers, start, end)
+
+    if missing:
+        frames = _load_prices(missing, live)
+        loaded = {}
+        for t in missing:
+            series = _close_series(frames.get(t, pd.DataFrame())).dropna()
+            # 데이터를 받지 못한 티커는 캐시하지 않아 다음 호출 때 다시 시도합니다.
+            if not series.empty:
+                loaded[t] = series
+        _ticker_cache.put_many(loaded, start, end)
+        found.update(loaded)
+
+    return {t: found[t] for t in tickers if t in found and not found[t].empty}
+
+
+def fetch_close_prices(tickers: list, live: bool = False) -> pd.DataFrame:
+    """티커별 종가를 티커 컬럼의 DataFrame으로 반환합니다. (티커 단위 캐시 사용)"""
+    price_series = _close_series_map(tickers, live)
+    if not price_series:
+        return pd.DataFrame()
+    return pd.DataFrame(price_series)
+
+
+def fetch_price_panel(tickers: list, names: dict = None, dtype='float64', live: bool = False) -> PricePanel:
+    """
+    티커별 종가를 PricePanel(연속된 NumPy 배열 하나)로 반환합니다.
+    fetch_data와 달리 이름으로 바꾼 중간 DataFrame을 만들지 않으며, 대규모 종목에는 dtype='float32'를 쓸 수 있습니다.
+    """
+    return PricePanel.from_series(_close_series_map(tickers, live), dtype=dtype, names=names)
+
+
+def prefetch(tickers: list, include_benchmark: bool = True, include_risk_free: bool = True, live: bool = False) -> list:
+    """
+    자산, 벤치마크, 무위험 금리 티커를 한 번의 배치로 동시에 받아 캐시에 채워 둡니다.
+    가져오지 못한 티커 목록을 반환합니다.
+    """
+    extra = []
+    if include_benchmark:
+        extra.append(BENCHMARK_CONFIG['ticker'])
+    if include_risk_free:
+        extra.append(RISK_FREE_TICKER)
+    all_tickers = list(dict.fromkeys(list(tickers) + extra))
+    price_data = fetch_close_prices(all_tickers, live)
+    return [t for t in all_tickers if t not in price_data.columns]
 
-# 💡💡💡 curl_cffi를 사용하여 세션 객체를 만들고 SSL 검증을 비활성화합니다.
-session = curl_requests.Session(impersonate="chrome110", verify=False)
-session.headers['User-Agent'] = 'Mozilla/5.0'
 
-@st.cache_data
 def fetch_data(assets_config: dict):
     all_tickers = [asset['ticker'] for asset_class in assets_config.values() for asset in asset_class]
-    raw_data = yf.download(all_tickers, start=START_DATE, end=END_DATE, session=session)
+    price_data = fetch_close_prices(all_tickers)
 
-    if raw_data.empty:
-        st.error("데이터를 가져오는 데 실패했습니다. 티커가 올바른지 확인해주세요.")
+    if price_data.empty:
+        notify('error', "데이터를 가져오는 데 실패했습니다. 티커가 올바른지 확인해주세요.")
         return pd.DataFrame()
 
-    if isinstance(raw_data.columns, pd.MultiIndex):
-        if "Adj Close" in raw_data.columns.get_level_values(0):
-            price_data = raw_data["Adj Close"].copy()
-        elif "Close" in raw_data.columns.get_level_values(0):
-            price_data = raw_data["Close"].copy()
-        else:
-            st.error("다운로드한 데이터에 'Adj Close' 또는 'Close' 컬럼이 없습니다.")
-            return pd.DataFrame()
-    else:
-        if "Adj Close" in raw_data.columns:
-            price_data = raw_data[["Adj Close"]].copy()
-            price_data.columns = [all_tickers[0]]
-        elif "Close" in raw_data.columns:
-            price_data = raw_data[["Close"]].copy()
-            price_data.columns = [all_tickers[0]]
-        else:
-            st.error("다운로드한 데이터에 'Adj Close' 또는 'Close' 컬럼이 없습니다.")
-            return pd.DataFrame()
-            
+    missing = [t for t in all_tickers if t not in price_data.columns]
+    if missing:
+        # 일부 티커만 실패한 경우 나머지 자산으로 분석을 계속합니다.
+        notify('warning', f"다음 티커의 데이터를 가져오지 못해 제외했습니다: {', '.join(missing)}")
+
     ticker_to_name = {asset['ticker']: asset['name'] for asset_class in assets_config.values() for asset in asset_class}
     price_data.rename(columns=ticker_to_name, inplace=True)
     price_data.dropna(axis=0, how='all', inplace=True)
@@ -46,25 +285,34 @@ def fetch_data(assets_config: dict):
 
 
 
-@st.cache_data
-def fetch_ohlcv(ticker: str):
+def fetch_ohlcv_panel(tickers: list) -> dict:
+    """여러 티커의 OHLCV를 한 번의 배치로 불러와 {티커: DataFrame}으로 반환합니다. (ml_predictor.predict_universe 입력용)"""
+    frames = _load_prices(list(tickers))
+    cols_to_process = ["Open", "High", "Low", "Close", "Volume"]
+    panel = {}
+    for ticker, df in frames.items():
+        existing_cols = [col for col in cols_to_process if col in df.columns]
+        if df.empty or not existing_cols:
+            continue
+        panel[ticker] = df[existing_cols].dropna(subset=existing_cols)
+    return panel
+
+
+@cache_data
+def fetch_ohlcv(ticker: str, live: bool = False):
     """
     지정된 티커의 OHLCV 데이터를 가져와서 어떤 데이터 구조에도 대응할 수 있도록 완벽하게 정제합니다.
     """
-    df = yf.download(ticker, start=START_DATE, end=END_DATE, session=session)
+    df = _load_prices([ticker], live)[ticker]
 
     if df.empty:
         return pd.DataFrame()
 
-    # ✅ yfinance가 예기치 않게 다중 컬럼을 반환할 경우, 단일 컬럼으로 변경
-    if isinstance(df.columns, pd.MultiIndex):
-        df.columns = df.columns.droplevel(0)
-
     cols_to_process = ["Open", "High", "Low", "Close", "Volume"]
     
     # ✅ 실제 존재하는 컬럼에 대해서만 숫자 변환을 적용 (더 안전한 방법)
     existing_cols = [col for col in cols_to_process if col in df.columns]
-    df[existing_cols] = df[existing_cols].apply(pd.to_numeric, errors='coerce')
+    df = df[existing_cols].apply(pd.to_numeric, errors='coerce')
 
     # ✅ NaN 값을 포함한 행을 완전히 제거
     df.dropna(subset=existing_cols, inplace=True)
@@ -72,28 +320,21 @@ def fetch_ohlcv(ticker: str):
     return df
 
 
-@st.cache_data
-def fetch_benchmark_data(ticker: str):
+def fetch_benchmark_data(ticker: str, live: bool = False):
     """지정된 벤치마크 지수의 종가 데이터를 가져옵니다."""
-    df = yf.download(ticker, start=START_DATE, end=END_DATE, session=session)
-    if df.empty:
+    # 'Adj Close'가 있으면 우선 사용, 없으면 'Close' 사용 (티커 캐시를 함께 씁니다)
+    price_data = fetch_close_prices([ticker], live)
+    if price_data.empty:
         return pd.Series(dtype='float64')
+    return price_data[ticker].dropna()
     
-    # 'Adj Close'가 있으면 우선 사용, 없으면 'Close' 사용
-    if 'Adj Close' in df.columns:
-        return df['Adj Close']
-    else:
-        return df['Close']
-    
-@st.cache_data
 def fetch_risk_free_rate():
     """미국 10년 국채 금리(무위험 수익률)를 가져옵니다."""
     # ^TNX 티커는 금리를 10배한 값을 제공하므로 100으로 나눠서 소수점으로 만듭니다.
     try:
-        tnx = yf.Ticker("^TNX")
         # 가장 최근의 종가(Close)를 가져옵니다.
-        risk_free_rate = tnx.history(period="1d")['Close'].iloc[-1] / 100
+        risk_free_rate = fetch_close_prices([RISK_FREE_TICKER])[RISK_FREE_TICKER].iloc[-1] / 100
         return risk_free_rate
     except (IndexError, KeyError):
         # 데이터를 가져오지 못할 경우 기본값(예: 4%)을 사용
-        return 0.04
\ No newline at end of file
+        return 0.04
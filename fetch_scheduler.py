@@ -0,0 +1,107 @@
+# fetch_scheduler.py
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from price_store import PriceProvider
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BACKOFF = 0.5
+
+
+def request_timeout(budget: float, max_retries: int, backoff: float = DEFAULT_BACKOFF) -> float:
+    """
+    티커당 제한 시간(budget, 재시도 포함) 안에 (max_retries + 1)번의 시도와 그 사이 대기 시간이 모두 들어가도록 하는
+    요청 한 번의 제한 시간입니다. 감싼 공급자의 요청 제한 시간으로 쓰면, 응답 없는 요청 하나가 예산을 다 써서
+    재시도 기회가 사라지는 일이 없습니다.
+    """
+    waits = backoff * (2 ** max_retries - 1)
+    return max(budget - waits, 0) / (max_retries + 1)
+
+
+class ConcurrentProvider(PriceProvider):
+    """
+    다른 공급자를 감싸서 티커별 다운로드를 스레드 풀에서 동시에 실행합니다.
+    - max_workers: 동시에 실행할 최대 다운로드 수
+    - max_retries / backoff: 예외 발생 시 backoff, 2*backoff, 4*backoff ... 초 간격으로 재시도
+    - timeout: 티커 하나에 허용하는 최대 시간(초, 재시도 포함). 넘기면 그 티커만 누락으로 처리합니다.
+      감싼 공급자의 요청 제한 시간은 request_timeout()으로 이 안에 맞춰 두어야 재시도할 시간이 남습니다.
+      제한 시간 안에 끝낼 수 없는 재시도는 하지 않으므로, 버려진 작업도 곧 끝나 스레드를 오래 붙잡지 않습니다.
+    일부 티커가 실패해도 성공한 티커의 데이터는 그대로 반환합니다. (실패한 티커는 결과 dict에서 빠집니다.)
+    스레드 풀은 호출마다 새로 만들지 않고 계속 사용하므로, 감싼 공급자가 스레드별로 만든 세션(연결 풀)도 재사용됩니다.
+    """
+
+    def __init__(self, provider: PriceProvider, max_workers: int = 8, max_retries: int = 3,
+                 backoff: float = DEFAULT_BACKOFF, timeout: float = 30.0):
+        self.provider = provider
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='fetch')
+            return self._executor
+
+    def close(self):
+        """스레드 풀을 닫습니다. 다음 download() 호출 때 다시 만들어집니다."""
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _download_one(self, ticker: str, start: str, end: str, deadline: float):
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self.provider.download([ticker], start, end).get(ticker)
+            except Exception as e:
+                delay = self.backoff * (2 ** attempt)
+                if attempt == self.max_retries or time.monotonic() + delay >= deadline:
+                    raise
+                logger.warning("%s 다운로드 실패 (%d/%d), %.1f초 후 재시도: %s",
+                               ticker, attempt + 1, self.max_retries, delay, e)
+                time.sleep(delay)
+
+    def download(self, tickers: list, start: str, end: str) -> dict:
+        frames, errors = {}, {}
+        if not tickers:
+            return frames
+
+        started = {}
+
+        def task(ticker):
+            started[ticker] = time.monotonic()
+            return self._download_one(ticker, start, end, started[ticker] + self.timeout)
+
+        futures = {self._get_executor().submit(task, t): t for t in tickers}
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+            for future in done:
+                t = futures[future]
+                try:
+                    df = future.result()
+                except Exception as e:
+                    errors[t] = str(e)
+                    continue
+                if df is not None:
+                    frames[t] = df
+
+            # ⏱️ 대기열이 아닌 '실행을 시작한' 시점부터 티커별 제한 시간을 잽니다.
+            # 시간 초과된 작업은 기다리지 않고 버립니다. (아직 시작 전이면 취소되고, 실행 중이면 결과만 무시됩니다)
+            now = time.monotonic()
+            for future in list(pending):
+                t = futures[future]
+                if t in started and now - started[t] > self.timeout:
+                    errors[t] = f"{self.timeout:g}초 제한 시간 초과"
+                    future.cancel()
+                    pending.discard(future)
+
+        for t, err in errors.items():
+            logger.error("%s 다운로드 실패: %s", t, err)
+        return frames
@@ -0,0 +1,418 @@
+# indicators.py
+import json
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from scipy.signal import lfilter
+
+# 💡 여러 종목의 기술적 지표를 (행 x 종목) 2차원 배열 하나로 한 번에 계산합니다.
+# - 종목마다 거래일이 다르므로 날짜가 아닌 '각 종목의 거래일 순서'로 맞추고, 최근 행이 맨 아래에 오도록 아래쪽 정렬합니다.
+#   (짧은 종목은 위쪽이 NaN) 그래서 이동 창은 항상 그 종목 자신의 거래일 n개를 뜻합니다.
+# - 이동 평균·표준편차는 누적합으로, EMA 계열(EMA·Wilder RSI·MACD·ATR)은 lfilter로 모든 종목을 한 번에 계산합니다.
+# - IndicatorEngine은 종목·지표 구성별로 결과를 캐시하고, 새 행이 추가되면 EMA 상태와 최근 구간만으로 이어서 계산합니다.
+
+# 지표 구성: {종류: [파라미터, ...]}  — 결과 컬럼 이름은 오른쪽 주석과 같습니다.
+DEFAULT_INDICATORS = {
+    'sma': [5, 20],              # ma5, ma20
+    'volatility': [20],          # volatility20 (종가 이동 표준편차)
+    'rsi_sma': [14],             # rsi_sma14 (단순 이동 평균 RSI)
+    'ema': [12, 26],             # ema12, ema26
+    'rsi': [14],                 # rsi14 (Wilder RSI)
+    'macd': [[12, 26, 9]],       # macd_12_26, macd_signal_12_26_9, macd_hist_12_26_9
+    'bollinger': [[20, 2.0]],    # bb_pctb20, bb_width20
+    'atr': [14],                 # atr14
+    'volume': [20],              # volume_ratio20, volume_z20
+    'returns': [1, 5, 20],       # ret1, ret5, ret20
+    'lags': [3]                  # ret1_lag1 ~ ret1_lag3
+}
+# create_features()가 만들던 기존 4개 Feature (ma5, ma20, rsi, volatility)에 해당하는 구성
+LEGACY_INDICATORS = {'sma': [5, 20], 'volatility': [20], 'rsi_sma': [14]}
+LEGACY_COLUMNS = {'ma5': 'ma5', 'ma20': 'ma20', 'rsi': 'rsi_sma14', 'volatility': 'volatility20'}
+
+OHLCV_FIELDS = ('open', 'high', 'low', 'close', 'volume')
+
+
+def spec_key(spec: dict) -> str:
+    """지표 구성을 캐시 키로 쓸 수 있는 문자열로 바꿉니다."""
+    return json.dumps(spec, sort_keys=True)
+
+
+def context_rows(spec: dict) -> int:
+    """새 행의 이동 창 지표를 다시 계산할 때 필요한 직전 행 수입니다."""
+    windows = [1]
+    for kind in ('sma', 'volatility', 'rsi_sma', 'volume', 'returns'):
+        windows += [int(n) for n in spec.get(kind, [])]
+    windows += [int(params[0]) for params in spec.get('bollinger', [])]
+    windows += [int(lags) + 1 for lags in spec.get('lags', [])]
+    return max(windows) + 1
+
+
+# --- NumPy 커널 (모두 (행 x 종목) 배열에 대해 열 방향으로 계산) ---
+
+def _first_valid(x: np.ndarray) -> np.ndarray:
+    valid = ~np.isnan(x)
+    return np.where(valid.any(axis=0), valid.argmax(axis=0), len(x))
+
+
+def _ffill(x: np.ndarray) -> np.ndarray:
+    """열마다 중간의 빈 값을 직전 값으로 채웁니다. (빈 값이 없으면 원본을 그대로 반환)"""
+    mask = np.isnan(x)
+    if not mask.any():
+        return x
+    rows = np.where(mask, 0, np.arange(len(x))[:, None])
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    return x[rows, np.arange(x.shape[1])]
+
+
+def _shift(x: np.ndarray, periods: int) -> np.ndarray:
+    out = np.full_like(x, np.nan)
+    if periods < len(x):
+        out[periods:] = x[:len(x) - periods]
+    return out
+
+
+def rolling_mean_std(x: np.ndarray, window: int, ddof: int = 1, with_std: bool = True) -> tuple:
+    """
+    누적합으로 계산한 이동 평균과 이동 표준편차입니다. 창 안에 빈 값이 있으면 NaN입니다.
+    열마다 첫 값을 빼고 누적하므로 가격 수준이 커도 부동소수점 오차가 쌓이지 않습니다.
+    with_std=False면 제곱합 누적을 건너뛰고 표준편차 자리에 None을 돌려줍니다.
+    """
+    n_rows, n_cols = x.shape
+    mean = np.full((n_rows, n_cols), np.nan)
+    std = np.full((n_rows, n_cols), np.nan) if with_std else None
+    if n_rows < window:
+        return mean, std
+    valid = ~np.isnan(x)
+    first = np.minimum(_first_valid(x), n_rows - 1)
+    ref = np.nan_to_num(x[first, np.arange(n_cols)])
+    shifted = x - ref
+    shifted[~valid] = 0.0
+
+    def window_sums(values):
+        # 맨 앞에 0 행을 둔 누적합에서 창 양 끝을 빼 창 합계를 구합니다. (누적 결과를 바로 써서 복사를 줄임)
+        cumsum = np.zeros((n_rows + 1, n_cols), dtype=values.dtype if values.dtype != bool else np.int64)
+        np.cumsum(values, axis=0, out=cumsum[1:])
+        return cumsum[window:] - cumsum[:-window]
+
+    window_sum = window_sums(shifted)
+    full = window_sums(valid) == window if not valid.all() else True
+
+    mean[window - 1:] = np.where(full, window_sum / window + ref, np.nan)
+    if with_std:
+        window_sum_sq = window_sums(shifted * shifted)
+        variance = np.maximum((window_sum_sq - window_sum**2 / window) / (window - ddof), 0)
+        std[window - 1:] = np.where(full, np.sqrt(variance), np.nan)
+    return mean, std
+
+
+def ema(x: np.ndarray, alpha: float, start: np.ndarray = None, seed: np.ndarray = None) -> np.ndarray:
+    """
+    지수 이동 평균 y[t] = alpha·x[t] + (1 - alpha)·y[t-1] (pandas ewm(adjust=False)와 같음)을 lfilter로 계산합니다.
+    start: 열마다 계산을 시작할 행 (그 이전 행은 결과가 NaN), seed: 시작 직전의 EMA 값 (없으면 첫 값에서 시작)
+    """
+    n_rows, n_cols = x.shape
+    x = _ffill(x)
+    start = np.zeros(n_cols, dtype=np.int64) if start is None else start
+    begin = np.maximum(start, _first_valid(x))
+    first_values = x[np.minimum(begin, n_rows - 1), np.arange(n_cols)] if n_rows else np.full(n_cols, np.nan)
+    seed = first_values if seed is None else np.where(np.isnan(seed), first_values, seed)
+
+    # 시작 이전 행을 seed로 채우면 그 구간의 EMA는 seed 그대로 유지되므로, 모든 열을 한 번에 거를 수 있습니다.
+    before = np.arange(n_rows)[:, None] < begin[None, :]
+    filled = np.where(before, seed[None, :], x)
+    y, _ = lfilter([alpha], [1.0, alpha - 1.0], filled, axis=0, zi=((1 - alpha) * seed)[None, :])
+    y[before] = np.nan
+    return y
+
+
+# --- 지표 계산 ---
+
+def _compute(arrays: dict, pos: np.ndarray, spec: dict, start: np.ndarray = None, state: dict = None) -> tuple:
+    """
+    arrays: {'open'|'high'|'low'|'close'|'volume': (행 x 종목) 배열}, pos: 각 칸의 종목 내 순번 (빈 칸은 -1)
+    start/state: 이어서 계산할 때 열마다 새 행이 시작되는 위치와 직전 EMA 값들
+    반환값: ({지표 이름: 배열}, {EMA 이름: 마지막 값 배열})
+    """
+    state = state or {}
+    new_state = {}
+    features = {}
+    close = arrays['close']
+    padding = pos < 0
+
+    def run_ema(name, x, alpha):
+        y = ema(x, alpha, start, state.get(name))
+        new_state[name] = y[-1] if len(y) else np.full(x.shape[1], np.nan)
+        return y
+
+    def warmup(values, rows):
+        return np.where(pos < rows, np.nan, values)
+
+    prev_close = _shift(close, 1)
+    delta = close - prev_close
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for n in spec.get('sma', []):
+            features[f'ma{n}'] = rolling_mean_std(close, n, with_std=False)[0]
+        for n in spec.get('volatility', []):
+            features[f'volatility{n}'] = rolling_mean_std(close, n, ddof=1)[1]
+        for n in spec.get('rsi_sma', []):
+            # 기존 create_features와 같이 종목 첫 행의 변화량은 0으로 봅니다.
+            gain = np.where(padding, np.nan, np.where(delta > 0, delta, 0.0))
+            loss = np.where(padding, np.nan, np.where(delta < 0, -delta, 0.0))
+            avg_gain = rolling_mean_std(gain, n, with_std=False)[0]
+            avg_loss = rolling_mean_std(loss, n, with_std=False)[0]
+            features[f'rsi_sma{n}'] = 100 - 100 / (1 + avg_gain / avg_loss)
+
+        for n in spec.get('ema', []):
+            features[f'ema{n}'] = warmup(run_ema(f'ema{n}', close, 2 / (n + 1)), n - 1)
+        for n in spec.get('rsi', []):
+            gain = np.where(np.isnan(delta), np.nan, np.maximum(delta, 0))
+            loss = np.where(np.isnan(delta), np.nan, np.maximum(-delta, 0))
+            avg_gain = run_ema(f'rsi{n}_gain', gain, 1 / n)
+            avg_loss = run_ema(f'rsi{n}_loss', loss, 1 / n)
+            features[f'rsi{n}'] = warmup(100 - 100 / (1 + avg_gain / avg_loss), n)
+        for fast, slow, signal in spec.get('macd', []):
+            macd = (run_ema(f'macd_{fast}_{slow}_fast', close, 2 / (fast + 1))
+                    - run_ema(f'macd_{fast}_{slow}_slow', close, 2 / (slow + 1)))
+            macd_signal = run_ema(f'macd_signal_{fast}_{slow}_{signal}', macd, 2 / (signal + 1))
+            features[f'macd_{fast}_{slow}'] = warmup(macd, slow - 1)
+            features[f'macd_signal_{fast}_{slow}_{signal}'] = warmup(macd_signal, slow + signal - 2)
+            features[f'macd_hist_{fast}_{slow}_{signal}'] = warmup(macd - macd_signal, slow + signal - 2)
+        for n, width in spec.get('bollinger', []):
+            mid, std = rolling_mean_std(close, n, ddof=0)
+            upper, lower = mid + width * std, mid - width * std
+            features[f'bb_pctb{n}'] = (close - lower) / (upper - lower)
+            features[f'bb_width{n}'] = (upper - lower) / mid
+        for n in spec.get('atr', []):
+            high, low = arrays['high'], arrays['low']
+            true_range = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+            true_range = np.where(np.isnan(high - low), np.nan, true_range)
+            features[f'atr{n}'] = warmup(run_ema(f'atr{n}', true_range, 1 / n), n - 1)
+        for n in spec.get('volume', []):
+            volume = arrays['volume']
+            mean, std = rolling_mean_std(volume, n)
+            features[f'volume_ratio{n}'] = volume / mean
+            features[f'volume_z{n}'] = (volume - mean) / std
+        for k in spec.get('returns', []):
+            features[f'ret{k}'] = close / _shift(close, k) - 1
+        for lags in spec.get('lags', []):
+            one_day = close / prev_close - 1
+            for lag in range(1, lags + 1):
+                features[f'ret1_lag{lag}'] = _shift(one_day, lag)
+
+    return features, new_state
+
+
+def _columns(df: pd.DataFrame) -> dict:
+    """{소문자 컬럼 이름: 원래 컬럼 이름} (컬럼 이름을 바꾸느라 전체 데이터를 복사하지 않도록 이름만 맞춥니다)"""
+    return {str(col).lower(): col for col in df.columns}
+
+
+def _close(df: pd.DataFrame):
+    """종가 Series, 계산할 수 없는 데이터(비었거나 종가 컬럼이 없음)면 None"""
+    if df is None or df.empty:
+        return None
+    column = _columns(df).get('close')
+    return df[column] if column is not None else None
+
+
+def _bottom_aligned(frames: list, offsets: list = None) -> tuple:
+    """[OHLCV DataFrame, ...]을 아래쪽 정렬한 (행 x 종목) 배열들과 종목 내 순번 배열로 만듭니다."""
+    lengths = np.array([len(df) for df in frames])
+    n_rows, n_cols = int(lengths.max()), len(frames)
+    values = np.full((len(OHLCV_FIELDS), n_rows, n_cols), np.nan)
+    for j, df in enumerate(frames):
+        columns = _columns(df)
+        present = [k for k, field in enumerate(OHLCV_FIELDS) if field in columns]
+        # 종목마다 전체 값을 배열 하나로 꺼낸 뒤 필요한 컬럼만 고릅니다. (컬럼별 Series나 부분 DataFrame을 만들지 않음)
+        positions = [df.columns.get_loc(columns[OHLCV_FIELDS[k]]) for k in present]
+        selected = df.to_numpy()[:, positions].astype('float64')
+        values[present, n_rows - len(df):, j] = selected.T
+    arrays = dict(zip(OHLCV_FIELDS, values))
+    top = n_rows - lengths
+    offsets = np.zeros(n_cols, dtype=np.int64) if offsets is None else np.asarray(offsets)
+    pos = np.arange(n_rows)[:, None] - top[None, :]
+    pos = np.where(pos < 0, -1, pos + offsets[None, :])
+    return arrays, pos, top
+
+
+def _block(features: dict, shape: tuple) -> tuple:
+    """
+    {지표 이름: (행 x 종목) 배열}을 (지표 x 행 x 종목) 배열 하나로 모읍니다. 반환값: (지표 이름 목록, 배열)
+    지표별 배열을 그대로 이어 붙이므로 전치 복사가 없고, 종목 하나의 지표는 block[:, top:, j] 뷰로 꺼낼 수 있습니다.
+    """
+    names = list(features)
+    block = np.stack([features[name] for name in names]) if names else np.empty((0,) + tuple(shape))
+    return names, block
+
+
+def _ticker_frame(block: np.ndarray, j: int, top: int, index: pd.Index, names: list) -> pd.DataFrame:
+    """block에서 종목 j의 지표를 복사 없이 감싼 DataFrame (pandas는 열 x 행 배열을 그대로 블록으로 씁니다)"""
+    return pd.DataFrame(block[:, top:, j].T, index=index, columns=names, copy=False)
+
+
+def compute_indicators(frames: dict, spec: dict = None) -> dict:
+    """{티커: OHLCV DataFrame}의 지표를 한 번에 계산해 {티커: 지표 DataFrame(원본과 같은 날짜 인덱스)}로 반환합니다. (캐시 없음)"""
+    spec = DEFAULT_INDICATORS if spec is None else spec
+    frames = {t: df for t, df in frames.items() if _close(df) is not None}
+    if not frames:
+        return {}
+    arrays, pos, top = _bottom_aligned(list(frames.values()))
+    features, _ = _compute(arrays, pos, spec)
+    names, block = _block(features, pos.shape)
+    return {ticker: _ticker_frame(block, j, top[j], df.index, names) for j, (ticker, df) in enumerate(frames.items())}
+
+
+def _state_at(state: dict, j: int) -> dict:
+    return {name: float(values[j]) for name, values in state.items()}
+
+
+def _allocate(values: np.ndarray, n_rows: int) -> np.ndarray:
+    """n_rows행을 담고도 뒤에 새 행을 이어 쓸 여유가 있는 지표 버퍼를 만들고 앞부분에 values를 복사합니다."""
+    buffer = np.empty((n_rows + max(n_rows // 8, 64), values.shape[1]))
+    buffer[:len(values)] = values
+    return buffer
+
+
+class IndicatorEngine:
+    """
+    종목·지표 구성별로 지표를 캐시하는 엔진입니다.
+    - 데이터가 그대로인 종목은 캐시된 결과를 그대로 돌려줍니다.
+    - 뒤에 새 행만 추가된 종목은 최근 context_rows(spec)개 행과 저장해 둔 EMA 상태로 새 행만 계산합니다.
+      결과는 여유 공간을 둔 종목별 버퍼 뒤에 이어 쓰므로, 갱신 비용은 전체 기간이 아닌 새 행 수에 비례합니다.
+    - 그 밖의 종목(처음 보거나 과거 데이터가 바뀐 경우)은 한 번에 모아 전체를 계산합니다.
+    반환하는 지표 DataFrame은 캐시 버퍼를 복사 없이 감싼 것이므로 읽기 전용으로 사용해야 합니다.
+    """
+
+    def __init__(self, spec: dict = None, max_entries: int = 1024):
+        self.spec = DEFAULT_INDICATORS if spec is None else spec
+        self.key = spec_key(self.spec)
+        self.context = context_rows(self.spec)
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.updates = 0
+        self.misses = 0
+
+    def _get(self, ticker):
+        with self._lock:
+            entry = self._entries.get((ticker, self.key))
+            if entry is not None:
+                self._entries.move_to_end((ticker, self.key))
+            return entry
+
+    def _insert(self, ticker, entry):
+        # self._lock을 잡은 상태에서 호출합니다.
+        self._entries[(ticker, self.key)] = entry
+        self._entries.move_to_end((ticker, self.key))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    @staticmethod
+    def _entry(df, close, names, buffer, state):
+        return {'n_rows': len(df), 'last_date': df.index[-1], 'last_close': close.iloc[-1], 'index': df.index,
+                'names': names, 'buffer': buffer, 'state': state, 'frame': None}
+
+    @staticmethod
+    def _frame(entry) -> pd.DataFrame:
+        if entry['frame'] is None:
+            entry['frame'] = pd.DataFrame(entry['buffer'][:entry['n_rows']], index=entry['index'],
+                                          columns=entry['names'], copy=False)
+        return entry['frame']
+
+    def compute(self, frames: dict) -> dict:
+        """{티커: OHLCV DataFrame} → {티커: 지표 DataFrame}"""
+        cached, appended, full = {}, {}, {}
+        for ticker, df in frames.items():
+            close = _close(df)
+            if close is None:
+                continue
+            entry = self._get(ticker)
+            n_old = entry['n_rows'] if entry else 0
+            unchanged_prefix = (entry is not None and len(df) >= n_old and df.index[n_old - 1] == entry['last_date']
+                                and close.iloc[n_old - 1] == entry['last_close'])
+            if unchanged_prefix and len(df) == n_old:
+                cached[ticker] = self._frame(entry)
+            elif unchanged_prefix:
+                appended[ticker] = (df, close, entry)
+            else:
+                full[ticker] = (df, close)
+        with self._lock:
+            self.hits += len(cached)
+            self.updates += len(appended)
+            self.misses += len(full)
+
+        result = dict(cached)
+        if full:
+            arrays, pos, top = _bottom_aligned([df for df, _ in full.values()])
+            features, state = _compute(arrays, pos, self.spec)
+            names, block = _block(features, pos.shape)
+            for j, (ticker, (df, close)) in enumerate(full.items()):
+                entry = self._entry(df, close, names, _allocate(block[:, top[j]:, j].T, len(df)), _state_at(state, j))
+                with self._lock:
+                    self._insert(ticker, entry)
+                result[ticker] = self._frame(entry)
+        if appended:
+            result.update(self._compute_appended(appended))
+        return {t: result[t] for t in frames if t in result}
+
+    def _compute_appended(self, appended: dict) -> dict:
+        """새로 추가된 행만 계산합니다. 각 종목의 직전 context 행을 함께 넣어 이동 창 지표를 맞춥니다."""
+        windows, offsets, n_new = [], [], []
+        for df, _, entry in appended.values():
+            lo = max(entry['n_rows'] - self.context, 0)
+            windows.append(df.iloc[lo:])
+            offsets.append(lo)
+            n_new.append(len(df) - entry['n_rows'])
+        arrays, pos, _ = _bottom_aligned(windows, offsets)
+        start = len(pos) - np.array(n_new)
+        entries = [entry for _, _, entry in appended.values()]
+        seeds = {name: np.array([entry['state'].get(name, np.nan) for entry in entries]) for name in entries[0]['state']}
+        features, state = _compute(arrays, pos, self.spec, start, seeds)
+        _, block = _block(features, pos.shape)
+
+        result = {}
+        for j, (ticker, (df, close, entry)) in enumerate(appended.items()):
+            entry = self._extend(ticker, entry, df, close, block[:, start[j]:, j].T, _state_at(state, j))
+            result[ticker] = self._frame(entry)
+        return result
+
+    def _extend(self, ticker, entry, df, close, values, state):
+        """
+        캐시된 버퍼의 n_rows 뒤에 새 행을 씁니다. 이미 돌려준 DataFrame은 n_rows까지만 보므로 영향을 받지 않습니다.
+        버퍼에 여유가 없거나 다른 호출이 먼저 이 종목을 갱신했으면 새 버퍼로 옮겨 씁니다.
+        """
+        n_old = entry['n_rows']
+        with self._lock:
+            buffer = entry['buffer']
+            if self._entries.get((ticker, self.key)) is not entry or len(buffer) < len(df):
+                buffer = _allocate(buffer[:n_old], len(df))
+            buffer[n_old:len(df)] = values
+            entry = self._entry(df, close, entry['names'], buffer, state)
+            self._insert(ticker, entry)
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.updates = self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'hits': self.hits, 'updates': self.updates, 'misses': self.misses, 'size': len(self._entries)}
+
+
+_engines = {}
+_engine_lock = threading.Lock()
+
+
+def get_indicator_engine(spec: dict = None) -> IndicatorEngine:
+    """지표 구성별 공용 엔진입니다. (기본: DEFAULT_INDICATORS)"""
+    spec = DEFAULT_INDICATORS if spec is None else spec
+    key = spec_key(spec)
+    with _engine_lock:
+        if key not in _engines:
+            _engines[key] = IndicatorEngine(spec)
+        return _engines[key]
@@ -0,0 +1,172 @@
+# live_refresh.py
+import time
+import logging
+import threading
+import numpy as np
+import pandas as pd
+from config import LIVE_REFRESH_SECONDS, resolve_end_date
+from price_store import normalize_ohlcv
+import data_fetcher
+
+logger = logging.getLogger(__name__)
+
+
+def _same_bar(row: pd.Series, last: pd.Series) -> bool:
+    return np.array_equal(row.reindex(last.index).to_numpy(dtype='float64'), last.to_numpy(dtype='float64'), equal_nan=True)
+
+
+class LiveRefresher:
+    """
+    실시간 갱신 모드의 백그라운드 폴러입니다.
+    지켜보는 티커마다 마지막으로 받은 봉의 날짜부터 오늘까지만 공급자에게 요청하고 (장중 봉은 값이 바뀔 수 있으므로 마지막 봉도 다시 받습니다),
+    새로 들어왔거나 값이 바뀐 봉만 가격 저장소와 메모리 캐시에 이어 붙입니다.
+    반영한 봉이 있으면 data_fetcher.data_version()이 올라가므로, 화면은 그 값이 바뀔 때만 다시 그리면 됩니다.
+    여러 화면(세션)이 하나의 폴러를 공유합니다. 실시간 모드를 켠 세션이 subscribe()로 자기 티커를 알리고,
+    subscriber_ttl초 안에 다시 알리지 않은 세션(창을 닫은 경우 등)은 빠집니다. 구독한 세션이 없으면 스레드가 멈춥니다.
+    """
+
+    def __init__(self, interval: float = LIVE_REFRESH_SECONDS, provider=None, store=None):
+        self.interval = interval
+        self.provider = provider
+        self.store = store
+        self.polls = 0
+        self.bars_received = 0
+        self.last_poll = None
+        self.last_error = None
+        self.subscriber_ttl = 3 * interval
+        self._subscribers = {}
+        self._last_bars = {}
+        self._lock = threading.Lock()
+        self._subscribers_lock = threading.Lock()
+        self._thread_lock = threading.Lock()
+        self._stop = None
+        self._thread = None
+
+    def subscribe(self, session_id: str, tickers: list):
+        """세션 하나가 실시간 모드로 tickers를 보고 있음을 알리고 폴러를 시작합니다. 주기적으로 다시 호출해야 유지됩니다."""
+        with self._subscribers_lock:
+            self._subscribers[session_id] = (tuple(tickers), time.monotonic())
+        self.start()
+
+    def unsubscribe(self, session_id: str):
+        """세션이 실시간 모드를 껐습니다. 남은 구독 세션이 없을 때만 폴러를 멈춥니다."""
+        with self._subscribers_lock:
+            self._subscribers.pop(session_id, None)
+            idle = not self._subscribers
+        if idle:
+            self.stop()
+
+    def tickers(self) -> list:
+        """유효한 구독 세션들이 보고 있는 티커의 합집합 (오래된 구독은 정리합니다)"""
+        now = time.monotonic()
+        with self._subscribers_lock:
+            for session_id, (_, seen) in list(self._subscribers.items()):
+                if now - seen > self.subscriber_ttl:
+                    del self._subscribers[session_id]
+            return sorted({t for tickers, _ in self._subscribers.values() for t in tickers})
+
+    def _last_bar(self, store, ticker: str):
+        if ticker not in self._last_bars:
+            stored = store.load(ticker)
+            self._last_bars[ticker] = stored.iloc[-1] if not stored.empty else None
+        return self._last_bars[ticker]
+
+    def poll_once(self) -> dict:
+        """
+        최신 봉을 한 번 확인합니다. 마지막 봉 날짜가 같은 티커끼리 묶어 한 번씩만 요청합니다.
+        반환값: {티커: 새로 반영한 봉 DataFrame}
+        """
+        with self._lock:
+            store = self.store or data_fetcher.get_price_store()
+            provider = self.provider or data_fetcher.get_provider()
+            end = resolve_end_date(include_today=True)
+
+            groups = {}
+            for ticker in self.tickers():
+                last = self._last_bar(store, ticker)
+                # 아직 저장된 데이터가 없는 티커는 일반 조회 때 전체 구간을 받으므로 여기서는 건너뜁니다.
+                if last is not None:
+                    groups.setdefault(last.name.strftime('%Y-%m-%d'), []).append(ticker)
+
+            updates = {}
+            for start, group in groups.items():
+                fetched = provider.download(group, start, end)
+                for ticker in group:
+                    last = self._last_bars[ticker]
+                    rows = normalize_ohlcv(fetched.get(ticker))
+                    if rows.empty:
+                        continue
+                    rows = rows.loc[last.name:]
+                    if not rows.empty and rows.index[0] == last.name and _same_bar(rows.iloc[0], last):
+                        rows = rows.iloc[1:]
+                    if rows.empty:
+                        continue
+                    store.ingest(ticker, rows)
+                    self._last_bars[ticker] = rows.iloc[-1]
+                    updates[ticker] = rows
+
+            if updates:
+                data_fetcher.apply_live_bars(updates)
+                self.bars_received += sum(len(rows) for rows in updates.values())
+            self.polls += 1
+            self.last_poll = pd.Timestamp.now()
+            return updates
+
+    def _run(self, stop: threading.Event):
+        while not stop.is_set():
+            if not self.tickers():
+                logger.info("실시간 갱신: 구독한 화면이 없어 멈춥니다.")
+                break
+            try:
+                self.poll_once()
+                self.last_error = None
+            except Exception as e:
+                # 일시적인 네트워크 오류 등은 기록만 하고 다음 주기에 다시 시도합니다.
+                self.last_error = str(e)
+                logger.warning("실시간 갱신 실패: %s", e)
+            stop.wait(self.interval)
+
+    def start(self):
+        """백그라운드 스레드에서 interval초마다 poll_once()를 실행합니다. 이미 실행 중이면 아무 일도 하지 않습니다."""
+        with self._thread_lock:
+            if self.running:
+                return
+            # 멈춘 스레드가 아직 대기 중이어도 새 스레드와 섞이지 않도록 스레드마다 종료 이벤트를 따로 둡니다.
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._run, args=(self._stop,), name='live-refresh', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        with self._thread_lock:
+            if self._stop is not None:
+                self._stop.set()
+            self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def status(self) -> dict:
+        return {'running': self.running, 'tickers': self.tickers(), 'sessions': len(self._subscribers), 'polls': self.polls,
+                'bars_received': self.bars_received, 'last_poll': self.last_poll, 'last_error': self.last_error,
+                'data_version': data_fetcher.data_version()}
+
+
+_refresher = None
+_refresher_lock = threading.Lock()
+
+
+def get_live_refresher() -> LiveRefresher:
+    global _refresher
+    with _refresher_lock:
+        if _refresher is None:
+            _refresher = LiveRefresher()
+        return _refresher
+
+
+def set_live_refresher(refresher: LiveRefresher):
+    global _refresher
+    with _refresher_lock:
+        if _refresher is not None:
+            _refresher.stop()
+        _refresher = refresher
@@ -0,0 +1,238 @@
+# local_data.py
+import os
+import re
+import time
+import threading
+from collections import defaultdict
+import pandas as pd
+from price_store import PriceProvider, PriceStore, normalize_ohlcv
+
+# 한국거래소(KRX) 정보데이터시스템에서 내려받은 CSV의 컬럼 이름 → 저장소 컬럼 이름
+KRX_COLUMN_MAP = {
+    '일자': 'Date',
+    '시가': 'Open',
+    '고가': 'High',
+    '저가': 'Low',
+    '종가': 'Close',
+    '거래량': 'Volume',
+    '거래대금': 'Value'
+}
+# 파일 이름 예시: data_3618_20250703.csv → 종목 코드 3618, 내려받은 날짜 2025-07-03
+KRX_FILE_PATTERN = re.compile(r'data_(?P<code>[0-9A-Za-z]+)_(?P<date>\d{8})\.csv$')
+CHUNK_ROWS = 100_000
+
+_ENCODINGS = ('utf-8-sig', 'cp949', 'euc-kr')
+
+
+def detect_encoding(path: str, sample_bytes: int = 64 * 1024) -> str:
+    """파일 앞부분을 읽어 UTF-8(BOM 포함) / CP949 중 맞는 인코딩을 찾습니다."""
+    with open(path, 'rb') as f:
+        sample = f.read(sample_bytes)
+    for encoding in _ENCODINGS:
+        try:
+            sample.decode(encoding)
+            return encoding
+        except UnicodeDecodeError:
+            # 샘플 끝에서 멀티바이트 문자가 잘렸을 수 있으므로 마지막 몇 바이트를 빼고 한 번 더 확인합니다.
+            try:
+                sample[:-3].decode(encoding)
+                return encoding
+            except UnicodeDecodeError:
+                continue
+    raise ValueError(f"인코딩을 판별할 수 없습니다: {path}")
+
+
+def read_krx_csv(path: str, chunksize: int = CHUNK_ROWS):
+    """
+    KRX 형식 CSV를 chunksize 행씩 읽어 OHLCV DataFrame을 차례로 돌려주는 제너레이터입니다.
+    따옴표로 감싼 숫자("147,540")는 숫자형으로, 일자("2025/07/03")는 날짜로 변환합니다.
+    """
+    encoding = detect_encoding(path)
+    header = pd.read_csv(path, encoding=encoding, nrows=0).columns
+    rename = {col: KRX_COLUMN_MAP.get(col.strip(), col.strip()) for col in header}
+    usecols = [col for col, mapped in rename.items() if mapped in ('Date', 'Open', 'High', 'Low', 'Close', 'Volume')]
+    if 'Date' not in {rename[col] for col in usecols}:
+        raise ValueError(f"'일자'(Date) 컬럼이 없습니다: {path}")
+
+    numeric_cols = [col for col in usecols if rename[col] != 'Date']
+    reader = pd.read_csv(path, encoding=encoding, usecols=usecols, thousands=',',
+                         dtype={col: 'float64' for col in numeric_cols}, chunksize=chunksize)
+    for chunk in reader:
+        chunk = chunk.rename(columns=rename)
+        chunk['Date'] = pd.to_datetime(chunk['Date'].astype(str).str.strip(), format='mixed', errors='coerce')
+        chunk = chunk.dropna(subset=['Date']).set_index('Date')
+        yield chunk
+
+
+def _stamp(path: str):
+    """파일이나 폴더가 바뀌었는지 비교하기 위한 (수정 시각, 크기), 없으면 None"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _walk(directory: str, ticker_map: dict = None) -> tuple:
+    """scan_directory()와 같은 파일 목록과 함께, 훑은 폴더들의 {경로: _stamp()}를 반환합니다."""
+    ticker_map = ticker_map or {}
+    files = defaultdict(list)
+    # 폴더가 아직 없어도 나중에 생기면 알아챌 수 있도록 최상위 폴더는 항상 기록합니다.
+    stamps = {directory: _stamp(directory)}
+    for root, _, names in os.walk(directory):
+        stamps[root] = _stamp(root)
+        for name in sorted(names):
+            match = KRX_FILE_PATTERN.search(name)
+            if match:
+                code = match.group('code')
+                files[ticker_map.get(code, code)].append(os.path.join(root, name))
+    return dict(files), stamps
+
+
+def scan_directory(directory: str, ticker_map: dict = None) -> dict:
+    """폴더 안의 KRX CSV 파일을 종목별로 묶어 {티커: [파일 경로, ...]}로 반환합니다. (하위 폴더 포함)"""
+    return _walk(directory, ticker_map)[0]
+
+
+def load_krx_files(paths: list, chunksize: int = CHUNK_ROWS) -> pd.DataFrame:
+    """한 종목의 여러 파일(여러 해)을 청크 단위로 읽어 날짜순으로 정렬된 하나의 OHLCV로 합칩니다."""
+    chunks = [chunk for path in paths for chunk in read_krx_csv(path, chunksize)]
+    if not chunks:
+        return pd.DataFrame()
+    # 최신순으로 저장된 파일도 있으므로 정렬하고, 파일 간 겹치는 날짜는 뒤에 읽은 값을 사용합니다.
+    return normalize_ohlcv(pd.concat(chunks))
+
+
+def _code_key(ticker: str) -> str:
+    """'005930.KS', '5930', '005930'을 같은 종목으로 보도록 접미사와 앞쪽 0을 제거합니다."""
+    return ticker.split('.')[0].lstrip('0')
+
+
+class KrxDirectory:
+    """
+    폴더의 KRX CSV 파일 목록과 읽어 둔 종목별 데이터를 캐시합니다.
+    - 파일 목록: 훑었던 폴더 중 하나라도 수정 시각이 바뀌었을 때만 다시 훑습니다. (파일을 추가·삭제하면 그 폴더의 수정 시각이 바뀝니다)
+    - 종목 데이터: 그 종목 파일들의 경로·수정 시각·크기가 그대로면 다시 읽지 않습니다.
+    """
+
+    def __init__(self, directory: str, ticker_map: dict = None):
+        self.directory = directory
+        self.ticker_map = ticker_map or {}
+        self._files = {}
+        self._by_code = {}
+        self._stamps = None
+        self._frames = {}
+        self._lock = threading.Lock()
+
+    def files(self) -> dict:
+        """{티커: [파일 경로, ...]} (scan_directory()와 같음)"""
+        with self._lock:
+            if self._stamps is None or any(_stamp(path) != stamp for path, stamp in self._stamps.items()):
+                self._files, self._stamps = _walk(self.directory, self.ticker_map)
+                self._by_code = {_code_key(ticker): ticker for ticker in self._files}
+            return self._files
+
+    def load(self, ticker: str):
+        """종목의 OHLCV (요청 티커와 파일의 종목 코드가 같으면 같은 종목으로 봅니다), 파일이 없으면 None"""
+        files = self.files()
+        name = ticker if ticker in files else self._by_code.get(_code_key(ticker))
+        if name is None:
+            return None
+        signature = tuple((path, _stamp(path)) for path in files[name])
+        with self._lock:
+            cached = self._frames.get(name)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        df = load_krx_files(files[name])
+        with self._lock:
+            self._frames[name] = (signature, df)
+        return df
+
+
+class LocalFileProvider(PriceProvider):
+    """
+    로컬 폴더의 KRX CSV 파일에서 가격을 읽는 공급자입니다. (config.DATA_SOURCE = 'local'이면 사용)
+    yf.download 없이 대시보드를 완전히 오프라인으로 실행할 수 있습니다.
+    파일 목록과 읽은 데이터는 KrxDirectory에 캐시하므로, 파일이 바뀌지 않았으면 다시 훑거나 읽지 않습니다.
+    """
+
+    def __init__(self, directory: str, ticker_map: dict = None):
+        self.directory = directory
+        self.ticker_map = ticker_map or {}
+        self._files = KrxDirectory(directory, self.ticker_map)
+
+    def download(self, tickers: list, start: str, end: str) -> dict:
+        frames = {}
+        for ticker in tickers:
+            df = self._files.load(ticker)
+            if df is None:
+                continue
+            if not df.empty:
+                df = df.loc[pd.Timestamp(start):pd.Timestamp(end) - pd.Timedelta(days=1)]
+            frames[ticker] = df
+        return frames
+
+
+class ReplayProvider(PriceProvider):
+    """
+    기록된 봉을 조금씩 공개하는 재생 공급자입니다. (config.DATA_SOURCE = 'replay'이면 사용)
+    처음에는 종목마다 마지막 holdback개 행을 숨겨 두고, bar_seconds초가 지날 때마다(또는 advance()를 호출할 때마다)
+    한 행씩 공개하므로 네트워크 없이 실시간 갱신 모드를 확인할 수 있습니다.
+    같은 날짜가 여러 행 기록되어 있으면 장중 스냅숏으로 보고, 공개된 행 중 마지막 값을 돌려줍니다.
+    """
+
+    def __init__(self, frames: dict, holdback: int = 20, bar_seconds: float = None):
+        # 스냅숏 순서를 지키도록 안정 정렬합니다.
+        self.frames = {t: df.sort_index(kind='stable') for t, df in frames.items() if not df.empty}
+        self._by_code = {_code_key(t): t for t in self.frames}
+        self.holdback = holdback
+        self.bar_seconds = bar_seconds
+        self._steps = 0
+        self._started = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_directory(cls, directory: str, ticker_map: dict = None, **kwargs):
+        frames = {ticker: load_krx_files(paths) for ticker, paths in scan_directory(directory, ticker_map).items()}
+        return cls(frames, **kwargs)
+
+    def advance(self, steps: int = 1):
+        """숨겨 둔 행을 steps개 더 공개합니다."""
+        with self._lock:
+            self._steps += steps
+
+    def revealed(self) -> int:
+        """지금까지 공개된 숨김 행의 개수 (최대 holdback)"""
+        elapsed = int((time.monotonic() - self._started) // self.bar_seconds) if self.bar_seconds else 0
+        with self._lock:
+            return min(self._steps + elapsed, self.holdback)
+
+    def download(self, tickers: list, start: str, end: str) -> dict:
+        hidden = self.holdback - self.revealed()
+        start, last = pd.Timestamp(start), pd.Timestamp(end) - pd.Timedelta(days=1)
+        frames = {}
+        for ticker in tickers:
+            name = ticker if ticker in self.frames else self._by_code.get(_code_key(ticker))
+            if name is None:
+                continue
+            df = self.frames[name]
+            visible = df.iloc[:max(len(df) - hidden, 0)]
+            visible = visible[~visible.index.duplicated(keep='last')]
+            frames[ticker] = visible.loc[start:last]
+        return frames
+
+
+def ingest_directory(directory: str, store: PriceStore, ticker_map: dict = None, chunksize: int = CHUNK_ROWS) -> dict:
+    """
+    폴더 안의 모든 KRX CSV를 가격 저장소 형식으로 변환해 저장합니다.
+    종목 단위로 파일을 청크씩 읽어 저장하므로, 메모리에는 한 번에 한 종목의 데이터만 올라갑니다.
+    반환값: {티커: 저장된 행 수}
+    """
+    ingested = {}
+    for ticker, paths in scan_directory(directory, ticker_map).items():
+        df = load_krx_files(paths, chunksize)
+        if df.empty:
+            continue
+        store.ingest(ticker, df)
+        ingested[ticker] = len(df)
+    return ingested
@@ -1,11 +1,29 @@
 # ml_predictor.py
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
 import xgboost as xgb
 from sklearn.model_selection import train_test_split
+from config import MODEL_STORE_DIR, MODEL_MAX_AGE_DAYS, MODEL_INCREMENT_ROUNDS, MODEL_MAX_ROUNDS
+from model_store import ModelStore
+from cache_backend import notify
+from indicators import compute_indicators, get_indicator_engine, LEGACY_INDICATORS, LEGACY_COLUMNS
 
-def create_features(df):
-    """주가 데이터로부터 머신러닝 모델이 사용할 Feature를 생성합니다."""
+# Feature 구성이나 계산 방식(학습 입력 형태 포함)이 바뀌면 올려서, 예전 Feature로 학습된 저장 모델을 쓰지 않도록 합니다.
+# 2: 종목별 모델도 Feature 이름이 있는 DataFrame으로 학습 (이름 없는 배열로 학습된 모델은 warm start 시 이름 검사에 실패)
+FEATURE_VERSION = 2
+FEATURES = ['ma5', 'ma20', 'rsi', 'volatility']
+# 종목을 하나의 모델로 묶어 학습할 때는 가격 단위에 의존하지 않도록 종가 대비 비율로 바꾼 Feature를 사용합니다.
+POOLED_FEATURES = ['ma5_ratio', 'ma20_ratio', 'rsi', 'volatility_ratio']
+XGB_PARAMS = dict(objective='reg:squarederror', n_estimators=100, learning_rate=0.1, max_depth=3, random_state=42)
+
+def create_features(df, ticker=None):
+    """
+    주가 데이터로부터 머신러닝 모델이 사용할 Feature를 생성합니다.
+    ticker를 넘기면 공용 지표 엔진의 캐시를 사용합니다. (새 봉만 추가된 경우 새 행만 계산)
+    """
     df_new = df.copy()
     
     # ✅ 컬럼 이름을 모두 소문자로 변경하여 대소문자 문제를 원천 차단합니다.
@@ -16,54 +34,269 @@ def create_features(df):
         print("Warning: ML Feature 생성을 위한 'close' 컬럼이 없습니다.")
         return pd.DataFrame() # 컬럼이 없으면 빈 데이터프레임 반환
 
-    # 이제 모든 컬럼 접근을 소문자로 안전하게 통일합니다.
-    df_new['ma5'] = df_new['close'].rolling(window=5).mean()
-    df_new['ma20'] = df_new['close'].rolling(window=20).mean()
-    
-    delta = df_new['close'].diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-    rs = gain / loss
-    df_new['rsi'] = 100 - (100 / (1 + rs))
-    
-    df_new['volatility'] = df_new['close'].rolling(window=20).std()
+    # 💡 지표 엔진(누적합 기반 NumPy 연산)으로 기존 4개 Feature(ma5, ma20, rsi, volatility)를 계산합니다.
+    if ticker is not None:
+        indicators = get_indicator_engine(LEGACY_INDICATORS).compute({ticker: df_new})[ticker]
+    else:
+        indicators = compute_indicators({'_': df_new}, LEGACY_INDICATORS)['_']
+    for feature, column in LEGACY_COLUMNS.items():
+        df_new[feature] = indicators[column].to_numpy()
     
     df_new.dropna(inplace=True)
     return df_new
 
-def train_and_predict(df, prediction_days=20):
-    """
-    주어진 데이터로 XGBoost 모델을 학습하고 미래 수익률을 예측합니다.
-    prediction_days: 예측할 미래 기간 (거래일 기준, 약 1개월)
-    """
+def _training_data(df, prediction_days, ticker=None):
+    """학습용 (X, y)와 예측 입력 X_predict를 만듭니다. 데이터가 부족하면 None을 반환합니다."""
     if df.empty:
-        return 0.0
+        return None
 
     # 1. Feature 생성
-    df_featured = create_features(df)
+    df_featured = create_features(df, ticker)
     
     if df_featured.empty or 'close' not in df_featured.columns:
-        return 0.0
+        return None
 
     # 2. Target 변수 생성 (미래 수익률, 소문자 'close' 사용)
     df_featured['target'] = df_featured['close'].pct_change(prediction_days).shift(-prediction_days)
     df_featured.dropna(inplace=True)
 
     if df_featured.empty:
-        return 0.0
+        return None
 
     # 3. 데이터 준비
-    features = ['ma5', 'ma20', 'rsi', 'volatility']
-    X = df_featured[features]
+    X = df_featured[FEATURES]
     y = df_featured['target']
     
     X_predict = X.iloc[[-1]] 
-    
-    # 4. 모델 학습
-    model = xgb.XGBRegressor(objective='reg:squarederror', n_estimators=100, learning_rate=0.1, max_depth=3, random_state=42)
-    model.fit(X, y)
-    
-    # 5. 미래 수익률 예측
-    prediction = model.predict(X_predict)
-    
-    return prediction[0]
+    return X, y, X_predict
+
+def _fit_predict(X, y, X_predict, n_jobs=1, warm_start=None):
+    """
+    XGBoost 모델을 학습하고 (예측값 배열, 모델 raw 바이트)를 반환합니다.
+    warm_start에 이전 모델의 raw 바이트를 넘기면 처음부터 다시 학습하지 않고 MODEL_INCREMENT_ROUNDS 라운드만 추가합니다.
+    (프로세스 풀에서 실행할 수 있도록 모듈 최상위 함수로 둡니다)
+    """
+    params = dict(XGB_PARAMS, n_jobs=n_jobs)
+    fit_kwargs = {}
+    if warm_start is not None:
+        booster = xgb.Booster()
+        booster.load_model(bytearray(warm_start))
+        params['n_estimators'] = MODEL_INCREMENT_ROUNDS
+        fit_kwargs['xgb_model'] = booster
+    model = xgb.XGBRegressor(**params)
+    model.fit(X, y, **fit_kwargs)
+    predictions = model.predict(X_predict)
+    return predictions, bytes(model.get_booster().save_raw('json'))
+
+def train_and_predict(df, prediction_days=20, ticker=None, store=None):
+    """
+    주어진 데이터로 XGBoost 모델을 학습하고 미래 수익률을 예측합니다.
+    prediction_days: 예측할 미래 기간 (거래일 기준, 약 1개월)
+    ticker: 넘기면 지표 계산에 공용 지표 엔진의 캐시를 쓰고, 학습한 모델을 모델 저장소(store, 기본: get_model_store())에 보관합니다.
+            데이터가 그대로면 학습 없이 저장된 예측값을 반환하고, 새 행만 추가됐으면 저장된 모델에 라운드를 추가합니다.
+    """
+    if df.empty:
+        return 0.0
+    plan = None
+    if ticker is not None:
+        store = store or get_model_store()
+        plan = _cache_plan(store, ticker, df, prediction_days)
+        if plan[2] is not None:
+            return plan[2]
+
+    data = _training_data(df, prediction_days, ticker)
+    if data is None:
+        return 0.0
+    X, y, X_predict = data
+
+    # 4. 모델 학습 / 5. 미래 수익률 예측
+    predictions, model_raw = _fit_predict(X, y, X_predict, n_jobs=None, warm_start=plan[3] if plan else None)
+    if plan is not None:
+        key, meta, _, warm_start = plan
+        _save_fit(store, key, ticker, df, meta, warm_start, predictions[0], model_raw, X)
+    return predictions[0]
+
+
+# --- 모델 저장/재사용 ---
+
+_model_store = None
+
+
+def get_model_store() -> ModelStore:
+    global _model_store
+    if _model_store is None:
+        _model_store = ModelStore(MODEL_STORE_DIR, MODEL_MAX_AGE_DAYS)
+    return _model_store
+
+
+def set_model_store(store: ModelStore):
+    global _model_store
+    _model_store = store
+
+
+def _cache_plan(store, ticker, df, prediction_days):
+    """
+    저장된 모델의 상태를 확인해 (키, 메타, 캐시된 예측값, warm start용 모델)을 반환합니다.
+    - 데이터가 그대로면 저장된 예측값을 그대로 씁니다.
+    - 뒤에 새 행만 추가됐다면 저장된 모델에 라운드를 추가합니다. (총 라운드가 MODEL_MAX_ROUNDS를 넘으면 새로 학습)
+    """
+    key = ModelStore.key(ticker, FEATURE_VERSION, XGB_PARAMS, prediction_days)
+    meta = store.load_meta(key)
+    data_end = str(df.index[-1])
+    if meta is None:
+        return key, None, None, None
+    if meta['data_end'] == data_end and meta['n_rows'] == len(df):
+        store.touch(key)
+        return key, meta, meta['prediction'], None
+    appended = data_end > meta['data_end'] and len(df) > meta['n_rows']
+    if appended and meta['n_rounds'] + MODEL_INCREMENT_ROUNDS <= MODEL_MAX_ROUNDS:
+        return key, meta, None, store.load_model(key)
+    return key, meta, None, None
+
+
+def _save_fit(store, key, ticker, df, meta, warm_start, prediction, model_raw, X):
+    n_rounds = meta['n_rounds'] + MODEL_INCREMENT_ROUNDS if warm_start is not None else XGB_PARAMS['n_estimators']
+    store.save(key, model_raw, {'ticker': ticker, 'feature_version': FEATURE_VERSION, 'data_end': str(df.index[-1]),
+                                'n_rows': len(df), 'n_rounds': n_rounds, 'prediction': float(prediction),
+                                'as_of': str(X.index[-1]), 'n_samples': len(X)})
+
+
+# --- 여러 종목 일괄 학습/예측 ---
+
+
+def stack_ohlcv(frames: dict) -> pd.DataFrame:
+    """{티커: OHLCV DataFrame}을 (ticker, date) 다중 인덱스의 긴 형태 패널로 쌓습니다. 컬럼은 소문자로 통일합니다."""
+    parts, tickers = [], []
+    for ticker, df in frames.items():
+        if df is None or df.empty:
+            continue
+        part = df.rename(columns=str.lower)
+        if 'close' not in part.columns:
+            notify('warning', f"{ticker}에 ML Feature 생성을 위한 'close' 컬럼이 없어 제외했습니다.")
+            continue
+        parts.append(part.sort_index())
+        tickers.append(ticker)
+    if not parts:
+        return pd.DataFrame()
+    return pd.concat(parts, keys=tickers, names=['ticker', 'date'])
+
+
+def create_panel_features(panel: pd.DataFrame, prediction_days=20, engine=None) -> pd.DataFrame:
+    """
+    stack_ohlcv()로 쌓은 패널 전체에 대해 create_features()와 같은 Feature와 학습 Target을 한 번에 계산합니다.
+    Feature는 지표 모듈(indicators)로 모든 종목을 한 번에 계산하고, Target과 비율 Feature는 패널 전체에 NumPy 연산으로 구합니다.
+    engine: IndicatorEngine을 넘기면 그 캐시를 사용합니다. (데이터가 그대로인 종목은 재계산하지 않고, 새 봉만 추가된 종목은 새 행만 계산)
+    """
+    if panel.empty:
+        return pd.DataFrame()
+
+    frames = {ticker: group.droplevel('ticker') for ticker, group in panel.groupby(level='ticker', sort=False)}
+    computed = engine.compute(frames) if engine is not None else compute_indicators(frames, LEGACY_INDICATORS)
+    # stack_ohlcv()는 종목별로 연속된 행을 쌓으므로, 종목 순서대로 이어 붙이면 패널의 행 순서와 같습니다.
+    features = {feature: np.concatenate([computed[t][column].to_numpy() for t in frames])
+                for feature, column in LEGACY_COLUMNS.items()}
+
+    close = panel['close'].to_numpy(dtype='float64')
+    codes = panel.index.codes[0]
+    n_rows = len(close)
+    is_start = np.concatenate(([True], codes[1:] != codes[:-1]))
+    group_end = np.concatenate((np.flatnonzero(is_start)[1:], [n_rows]))[np.cumsum(is_start) - 1]
+
+    # create_features()의 dropna()와 같이 Feature가 모두 계산된 행만 남깁니다.
+    complete = np.logical_and.reduce([~np.isnan(values) for values in features.values()])
+    row_pos = np.flatnonzero(complete)
+
+    # Target: prediction_days 거래일 뒤의 수익률 (같은 종목 안에서만)
+    future = row_pos + prediction_days
+    has_future = future < group_end[row_pos]
+    target = np.full(len(row_pos), np.nan)
+    target[has_future] = close[future[has_future]] / close[row_pos[has_future]] - 1
+
+    featured = pd.DataFrame({'close': close[row_pos], **{name: values[row_pos] for name, values in features.items()},
+                             'target': target}, index=panel.index[row_pos])
+    featured['ma5_ratio'] = featured['ma5'] / featured['close']
+    featured['ma20_ratio'] = featured['ma20'] / featured['close']
+    featured['volatility_ratio'] = featured['volatility'] / featured['close']
+    return featured
+
+
+def predict_universe(frames: dict, prediction_days=20, mode='per_ticker', n_jobs=None, use_cache=False) -> pd.DataFrame:
+    """
+    여러 종목의 미래 수익률을 한 번에 예측합니다.
+    - mode='per_ticker': 종목별 모델을 프로세스 풀에서 병렬 학습 (train_and_predict와 같은 결과)
+    - mode='pooled': 비율 Feature로 모든 종목을 하나의 모델로 학습
+    n_jobs: 동시에 사용할 프로세스(또는 XGBoost 스레드) 수, None이면 CPU 개수
+    use_cache: per_ticker 모드에서 저장된 모델을 재사용합니다. (데이터가 그대로인 종목은 학습을 건너뜀)
+    반환값: 티커를 인덱스로 하는 예측 결과 표 (predicted_return, as_of, n_samples)
+    """
+    n_jobs = n_jobs or os.cpu_count() or 1
+    if mode not in ('per_ticker', 'pooled'):
+        raise ValueError(f"지원하지 않는 mode입니다: {mode}")
+
+    # 💡 데이터가 바뀌지 않은 종목은 Feature 계산 전에 저장된 예측값으로 처리합니다.
+    store = get_model_store() if use_cache and mode == 'per_ticker' else None
+    cached_rows, plans = {}, {}
+    if store is not None:
+        for ticker, df in frames.items():
+            if df is None or df.empty:
+                continue
+            plan = _cache_plan(store, ticker, df, prediction_days)
+            if plan[2] is not None:
+                meta = plan[1]
+                cached_rows[ticker] = {'predicted_return': plan[2], 'as_of': pd.Timestamp(meta.get('as_of')),
+                                       'n_samples': meta.get('n_samples')}
+            else:
+                plans[ticker] = plan
+
+    panel = stack_ohlcv({t: df for t, df in frames.items() if t not in cached_rows})
+    featured = create_panel_features(panel, prediction_days, engine=get_indicator_engine(LEGACY_INDICATORS))
+    labeled = featured.dropna(subset=['target']) if not featured.empty else featured
+    groups = {ticker: group for ticker, group in labeled.groupby(level='ticker', sort=False)} if not labeled.empty else {}
+
+    predicted = {}
+    if groups and mode == 'pooled':
+        # train_and_predict와 같이 Target이 있는 마지막 행을 예측 입력으로 사용합니다.
+        last_rows = labeled.groupby(level='ticker', sort=False).tail(1)
+        predictions, _ = _fit_predict(labeled[POOLED_FEATURES], labeled['target'], last_rows[POOLED_FEATURES], n_jobs=n_jobs)
+        predicted = dict(zip(last_rows.index.get_level_values('ticker'), predictions))
+    elif groups:
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(groups))) as executor:
+            # train_and_predict와 같이 Feature 이름이 있는 DataFrame으로 학습해야 저장된 모델로 warm start할 수 있습니다.
+            futures = {ticker: executor.submit(_fit_predict, group[FEATURES], group['target'], group[FEATURES].iloc[[-1]], 1,
+                                               plans[ticker][3] if ticker in plans else None)
+                       for ticker, group in groups.items()}
+            for ticker, future in futures.items():
+                group = groups[ticker]
+                predictions, model_raw = future.result()
+                predicted[ticker] = predictions[0]
+                if store is not None:
+                    key, meta, _, warm_start = plans[ticker]
+                    _save_fit(store, key, ticker, frames[ticker], meta, warm_start, predictions[0], model_raw,
+                              group.droplevel('ticker'))
+
+    rows = {ticker: {'predicted_return': predicted[ticker],
+                     'as_of': group.index.get_level_values('date')[-1],
+                     'n_samples': len(group)}
+            for ticker, group in groups.items()}
+    rows.update(cached_rows)
+    result = pd.DataFrame.from_dict(rows, orient='index', columns=['predicted_return', 'as_of', 'n_samples'])
+    result.index.name = 'ticker'
+    return result.reindex([t for t in frames if t in rows])
+
+
+def benchmark_universe(frames: dict, prediction_days=20, n_jobs=None) -> dict:
+    """기존 train_and_predict 반복문과 predict_universe의 실행 시간을 비교합니다."""
+    start = time.perf_counter()
+    loop_predictions = {ticker: train_and_predict(df, prediction_days) for ticker, df in frames.items()}
+    loop_seconds = time.perf_counter() - start
+
+    timings = {'loop_seconds': loop_seconds}
+    for mode in ('per_ticker', 'pooled'):
+        start = time.perf_counter()
+        result = predict_universe(frames, prediction_days, mode=mode, n_jobs=n_jobs)
+        timings[f'{mode}_seconds'] = time.perf_counter() - start
+        timings[f'{mode}_speedup'] = loop_seconds / timings[f'{mode}_seconds']
+        if mode == 'per_ticker':
+            diffs = [abs(result.loc[t, 'predicted_return'] - p) for t, p in loop_predictions.items() if t in result.index]
+            timings['max_abs_diff_vs_loop'] = max(diffs) if diffs else 0.0
+    return timings
@@ -0,0 +1,98 @@
+# model_store.py
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+
+
+class ModelStore:
+    """
+    학습된 XGBoost 모델을 디스크에 보관하는 저장소입니다.
+    키는 (티커, Feature 버전, 하이퍼파라미터, 예측 기간)으로 만들고,
+    메타데이터에는 학습에 사용한 데이터의 마지막 날짜·행 수와 그때의 예측값을 함께 저장합니다.
+    """
+
+    def __init__(self, root: str, max_age_days: float = 30):
+        self.root = root
+        self.max_age_days = max_age_days
+        os.makedirs(self.root, exist_ok=True)
+        self._meta_cache = {}
+        self._lock = threading.Lock()
+        self.evict()
+
+    @staticmethod
+    def key(ticker: str, feature_version: int, params: dict, prediction_days: int) -> str:
+        payload = json.dumps({'feature_version': feature_version, 'params': params,
+                              'prediction_days': prediction_days}, sort_keys=True)
+        digest = hashlib.sha1(payload.encode('utf-8')).hexdigest()[:12]
+        return re.sub(r'[^0-9A-Za-z._-]', '_', ticker) + '_' + digest
+
+    def _model_path(self, key: str) -> str:
+        return os.path.join(self.root, key + '.model.json')
+
+    def _meta_path(self, key: str) -> str:
+        return os.path.join(self.root, key + '.meta.json')
+
+    def load_meta(self, key: str):
+        """메타데이터를 반환합니다. 저장된 모델이 없으면 None입니다."""
+        with self._lock:
+            if key in self._meta_cache:
+                return self._meta_cache[key]
+        path = self._meta_path(key)
+        if not os.path.exists(path) or not os.path.exists(self._model_path(key)):
+            return None
+        try:
+            with open(path, encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        with self._lock:
+            self._meta_cache[key] = meta
+        return meta
+
+    def load_model(self, key: str):
+        """저장된 모델을 raw 바이트(JSON)로 반환합니다. 없으면 None입니다."""
+        path = self._model_path(key)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def save(self, key: str, model_raw: bytes, meta: dict):
+        for path, data, mode in ((self._model_path(key), model_raw, 'wb'),
+                                 (self._meta_path(key), json.dumps(meta, ensure_ascii=False), 'w')):
+            tmp_path = path + '.tmp'
+            with open(tmp_path, mode, **({} if mode == 'wb' else {'encoding': 'utf-8'})) as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        with self._lock:
+            self._meta_cache[key] = meta
+
+    def touch(self, key: str):
+        """캐시 적중 시 사용 시각(메타 파일 수정 시각)을 갱신해 삭제 대상에서 제외합니다."""
+        path = self._meta_path(key)
+        if os.path.exists(path):
+            os.utime(path)
+
+    def evict(self, max_age_days: float = None):
+        """마지막 사용 후 max_age_days가 지난 모델(오래된 Feature 버전·파라미터 포함)을 삭제합니다."""
+        max_age_days = self.max_age_days if max_age_days is None else max_age_days
+        cutoff = time.time() - max_age_days * 86400
+        removed = 0
+        for name in os.listdir(self.root):
+            if not name.endswith('.meta.json'):
+                continue
+            key = name[:-len('.meta.json')]
+            path = self._meta_path(key)
+            # 메타 파일을 열지 않고 수정 시각으로 판단합니다.
+            if os.path.getmtime(path) >= cutoff:
+                continue
+            for stale_path in (path, self._model_path(key)):
+                if os.path.exists(stale_path):
+                    os.remove(stale_path)
+            with self._lock:
+                self._meta_cache.pop(key, None)
+            removed += 1
+        return removed
@@ -0,0 +1,130 @@
+# optimizer.py
+import numpy as np
+from scipy.optimize import minimize
+from portfolio_analyzer import TRADING_DAYS, get_portfolio_performance_batch
+
+# 💡 모든 최적화는 롱온리(0 ≤ 비중 ≤ 상한)이며 비중의 합은 1입니다.
+# 수익률은 portfolio_analyzer와 같은 기하 평균 연율화 기준을 사용합니다.
+
+
+def class_constraints(tickers: list, assets_config: dict, class_bounds: dict) -> list:
+    """
+    config.ASSETS의 자산군 구분과 {자산군: (하한, 상한)} 설정으로 SLSQP 제약 조건을 만듭니다.
+    선택된 자산이 하나도 없는 자산군은 건너뜁니다.
+    """
+    ticker_to_class = {asset['ticker']: class_name for class_name, assets_list in assets_config.items() for asset in assets_list}
+    constraints = []
+    for class_name, (lower, upper) in class_bounds.items():
+        mask = np.array([ticker_to_class.get(t) == class_name for t in tickers], dtype='float64')
+        if not mask.any():
+            continue
+        constraints.append({'type': 'ineq', 'fun': lambda w, m=mask, lo=lower: m @ w - lo, 'jac': lambda w, m=mask: m})
+        constraints.append({'type': 'ineq', 'fun': lambda w, m=mask, hi=upper: hi - m @ w, 'jac': lambda w, m=mask: -m})
+    return constraints
+
+
+def _annual_return(w, mean_returns):
+    return (1 + w @ mean_returns)**TRADING_DAYS - 1
+
+
+def _annual_return_grad(w, mean_returns):
+    return TRADING_DAYS * (1 + w @ mean_returns)**(TRADING_DAYS - 1) * mean_returns
+
+
+def _solve(objective, jac, n_assets, max_weight, constraints):
+    bounds = [(0.0, max_weight)] * n_assets
+    all_constraints = [{'type': 'eq', 'fun': lambda w: w.sum() - 1, 'jac': lambda w: np.ones_like(w)}] + list(constraints)
+    x0 = np.full(n_assets, 1.0 / n_assets)
+    return minimize(objective, x0, jac=jac, method='SLSQP', bounds=bounds, constraints=all_constraints,
+                    options={'maxiter': 200, 'ftol': 1e-10})
+
+
+def _result(solution, moments, risk_free_rate):
+    weights = np.clip(solution.x, 0, None)
+    weights = weights / weights.sum()
+    annual_return, volatility, sharpe = get_portfolio_performance_batch([weights], risk_free_rate=risk_free_rate, moments=moments)
+    return {'weights': weights, 'annual_return': annual_return[0], 'volatility': volatility[0], 'sharpe': sharpe[0],
+            'success': bool(solution.success), 'message': solution.message}
+
+
+def max_sharpe(moments: tuple, risk_free_rate: float = 0.0, max_weight: float = 1.0, constraints: list = ()):
+    """샤프 지수가 가장 높은 포트폴리오를 찾습니다."""
+    mean_returns, cov_matrix = moments
+
+    def objective(w):
+        volatility = np.sqrt(max(w @ cov_matrix @ w, 1e-18) * TRADING_DAYS)
+        return -(_annual_return(w, mean_returns) - risk_free_rate) / volatility
+
+    def jac(w):
+        variance = max(w @ cov_matrix @ w, 1e-18)
+        volatility = np.sqrt(variance * TRADING_DAYS)
+        excess = _annual_return(w, mean_returns) - risk_free_rate
+        d_volatility = TRADING_DAYS * (cov_matrix @ w) / volatility
+        return -(_annual_return_grad(w, mean_returns) * volatility - excess * d_volatility) / volatility**2
+
+    solution = _solve(objective, jac, len(mean_returns), max_weight, constraints)
+    return _result(solution, moments, risk_free_rate)
+
+
+def min_variance(moments: tuple, risk_free_rate: float = 0.0, max_weight: float = 1.0, constraints: list = ()):
+    """변동성이 가장 낮은 포트폴리오를 찾습니다."""
+    _, cov_matrix = moments
+    solution = _solve(lambda w: w @ cov_matrix @ w, lambda w: 2 * cov_matrix @ w,
+                      len(cov_matrix), max_weight, constraints)
+    return _result(solution, moments, risk_free_rate)
+
+
+def target_return(moments: tuple, target: float, risk_free_rate: float = 0.0, max_weight: float = 1.0, constraints: list = ()):
+    """연간 목표 수익률을 달성하는 포트폴리오 중 변동성이 가장 낮은 것을 찾습니다."""
+    mean_returns, cov_matrix = moments
+    # 기하 평균 연율화를 역산하면 목표 수익률 조건은 일일 평균 수익률에 대한 선형 제약이 됩니다.
+    daily_target = (1 + target)**(1 / TRADING_DAYS) - 1
+    target_constraint = {'type': 'eq', 'fun': lambda w: w @ mean_returns - daily_target, 'jac': lambda w: mean_returns}
+    solution = _solve(lambda w: w @ cov_matrix @ w, lambda w: 2 * cov_matrix @ w,
+                      len(mean_returns), max_weight, [target_constraint] + list(constraints))
+    return _result(solution, moments, risk_free_rate)
+
+
+def risk_parity(moments: tuple, risk_free_rate: float = 0.0, max_weight: float = 1.0, constraints: list = ()):
+    """모든 자산의 위험 기여도(w_i · (Σw)_i)가 같아지도록 비중을 찾습니다."""
+    _, cov_matrix = moments
+    n_assets = len(cov_matrix)
+    # 공분산 값이 매우 작아(일일 수익률) 최적화가 일찍 멈추지 않도록 스케일을 키웁니다.
+    scaled_cov = cov_matrix * TRADING_DAYS * 1e2
+
+    def objective(w):
+        contributions = w * (scaled_cov @ w)
+        return ((contributions - contributions.sum() / n_assets)**2).sum()
+
+    def jac(w):
+        sigma_w = scaled_cov @ w
+        contributions = w * sigma_w
+        deviation = contributions - contributions.sum() / n_assets
+        # d(contributions)/dw = diag(Σw) + diag(w)Σ, 평균을 뺀 항은 deviation의 합이 0이라 사라집니다.
+        return 2 * (deviation * sigma_w + scaled_cov @ (deviation * w))
+
+    solution = _solve(objective, jac, n_assets, max_weight, constraints)
+    return _result(solution, moments, risk_free_rate)
+
+
+def efficient_frontier(moments: tuple, n_points: int = 15, risk_free_rate: float = 0.0, max_weight: float = 1.0, constraints: list = ()):
+    """최소 변동성 포트폴리오부터 최고 수익 자산까지의 효율적 투자선을 (수익률, 변동성) 배열로 계산합니다."""
+    mean_returns, _ = moments
+    low = min_variance(moments, risk_free_rate, max_weight, constraints)['annual_return']
+    high = (1 + mean_returns.max())**TRADING_DAYS - 1
+    frontier_returns, frontier_volatilities = [], []
+    for target in np.linspace(low, high, n_points):
+        point = target_return(moments, target, risk_free_rate, max_weight, constraints)
+        if point['success']:
+            frontier_returns.append(point['annual_return'])
+            frontier_volatilities.append(point['volatility'])
+    return np.array(frontier_returns), np.array(frontier_volatilities)
+
+
+def random_portfolios(moments: tuple, n_portfolios: int = 5000, risk_free_rate: float = 0.0, seed: int = 42):
+    """무작위(디리클레 분포) 롱온리 포트폴리오를 만들고, 배치 계산으로 한 번에 평가합니다."""
+    mean_returns, _ = moments
+    rng = np.random.default_rng(seed)
+    weights = rng.dirichlet(np.ones(len(mean_returns)), size=n_portfolios)
+    annual_returns, volatilities, sharpe_ratios = get_portfolio_performance_batch(weights, risk_free_rate=risk_free_rate, moments=moments)
+    return weights, annual_returns, volatilities, sharpe_ratios
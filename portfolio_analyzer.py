@@ -1,27 +1,65 @@
 # portfolio_analyzer.py
 import pandas as pd
 import numpy as np
+from price_panel import PricePanel
+
+# 연간 거래일은 약 252일
+TRADING_DAYS = 252
+# 공분산을 계산할 때 한 번에 float64로 바꿔 처리할 행 수 (float32 패널의 메모리 사용량 제한)
+_MOMENT_BLOCK_ROWS = 4096
 
 def calculate_returns(data: pd.DataFrame):
     """자산별 일일 수익률과 누적 수익률을 계산합니다."""
+    if isinstance(data, PricePanel):
+        # 패널은 수익률을 한 번만 계산해 두고, 복사 없이 DataFrame으로 감싸서 돌려줍니다.
+        return data.to_frame('returns'), data.to_frame('cumulative')
     daily_returns = data.pct_change().dropna()
     cumulative_returns = (1 + daily_returns).cumprod()
     return daily_returns, cumulative_returns
 
+def estimate_moments(daily_returns):
+    """
+    자산별 평균 일일 수익률 벡터와 공분산 행렬을 계산합니다.
+    np.std와 같은 기준(모집단, ddof=0)을 사용하므로 단일 포트폴리오 계산 결과와 정확히 일치합니다.
+    """
+    returns = daily_returns.returns if isinstance(daily_returns, PricePanel) else np.asarray(daily_returns)
+    n_rows, n_assets = returns.shape
+    mean_returns = returns.mean(axis=0, dtype='float64')
+    # 행 블록 단위로 float64 변환 후 누적하므로, 전체 수익률 행렬의 float64 복사본을 만들지 않습니다.
+    cov_matrix = np.zeros((n_assets, n_assets))
+    for start in range(0, n_rows, _MOMENT_BLOCK_ROWS):
+        centered = returns[start:start + _MOMENT_BLOCK_ROWS].astype('float64') - mean_returns
+        cov_matrix += centered.T @ centered
+    cov_matrix /= n_rows
+    return mean_returns, cov_matrix
+
+def get_portfolio_performance_batch(weights, daily_returns=None, risk_free_rate: float = 0.0, moments: tuple = None):
+    """
+    (포트폴리오 수 N x 자산 수) 가중치 행렬의 연간 수익률, 변동성, 샤프 지수를 한 번에 계산합니다.
+    일별 포트폴리오 수익률을 다시 만들지 않고, 평균 벡터와의 행렬곱 + 공분산 이차형식만 사용합니다.
+    moments에 estimate_moments()의 결과를 넘기면 수익률 데이터를 다시 훑지 않습니다.
+    비중의 합이 1보다 작으면 나머지는 수익률 0인 현금으로 봅니다. (backtester와 같은 가정)
+    """
+    if moments is None:
+        moments = estimate_moments(daily_returns)
+    mean_returns, cov_matrix = moments
+    weights = np.atleast_2d(np.asarray(weights, dtype='float64'))
+
+    # 연간 수익률 (기하 평균)
+    annual_returns = (1 + weights @ mean_returns)**TRADING_DAYS - 1
+
+    # 연간 변동성: sqrt(w' Σ w), 부동소수점 오차로 생기는 아주 작은 음수는 0으로 처리합니다.
+    variances = ((weights @ cov_matrix) * weights).sum(axis=1)
+    annual_volatilities = np.sqrt(np.maximum(variances, 0)) * np.sqrt(TRADING_DAYS)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe_ratios = np.where(annual_volatilities != 0,
+                                 (annual_returns - risk_free_rate) / annual_volatilities, 0.0)
+
+    return annual_returns, annual_volatilities, sharpe_ratios
+
 def get_portfolio_performance(weights: list, daily_returns: pd.DataFrame, risk_free_rate: float = 0.0):
     """가중치에 따른 포트폴리오의 연간 수익률, 변동성, 샤프 지수를 계산합니다."""
-    # 포트폴리오의 일일 수익률 계산
-    portfolio_returns = np.dot(daily_returns, weights)
-    
-    # 연간 수익률 (기하 평균)
-    # 연간 거래일은 약 252일
-    annual_return = (1 + np.mean(portfolio_returns))**252 - 1
-    
-    # 연간 변동성
-    annual_volatility = np.std(portfolio_returns) * np.sqrt(252)
-    
-    # 샤프 지수 (무위험 수익률은 0으로 가정)
     # 샤프 지수는 우리가 감수한 위험 한 단위당, 얼마나 높은 수익을 얻었는지를 보여주는 '가성비' 지표
-    sharpe_ratio = (annual_return - risk_free_rate) / annual_volatility if annual_volatility != 0 else 0
-    
-    return annual_return, annual_volatility, sharpe_ratio
\ No newline at end of file
+    annual_returns, annual_volatilities, sharpe_ratios = get_portfolio_performance_batch([weights], daily_returns, risk_free_rate)
+    return annual_returns[0], annual_volatilities[0], sharpe_ratios[0]
@@ -0,0 +1,123 @@
+# portfolio_store.py
+import json
+import sqlite3
+import threading
+from contextlib import closing
+from datetime import datetime
+from config import PORTFOLIO_DB_PATH
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS portfolios (
+    name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS portfolio_versions (
+    name TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    weights TEXT NOT NULL,
+    assets TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    PRIMARY KEY (name, version)
+);
+"""
+
+
+class PortfolioStore:
+    """
+    저장된 포트폴리오를 SQLite 파일에 보관하는 저장소입니다. (브라우저를 새로 고쳐도 유지됩니다)
+    같은 이름으로 다시 저장하면 버전이 1씩 올라가고, 이전 버전의 구성도 그대로 남습니다.
+    비교 결과는 (이름, 버전)을 키로 캐시하므로, 구성이 바뀐 포트폴리오만 다시 계산됩니다.
+    포트폴리오 형식은 앱과 같습니다: {'name', 'weights': {자산 이름: 비중(%)}, 'assets': [{'name', 'ticker'}, ...], 'version'}
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        with closing(self._connect()) as conn, conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        # Streamlit은 재실행마다 다른 스레드를 쓸 수 있으므로 호출마다 새 연결을 엽니다.
+        return sqlite3.connect(self.path, timeout=30)
+
+    @staticmethod
+    def _row_to_portfolio(row) -> dict:
+        name, version, weights, assets = row
+        return {'name': name, 'version': version, 'weights': json.loads(weights), 'assets': json.loads(assets)}
+
+    def save(self, name: str, weights: dict, assets: list) -> int:
+        """포트폴리오를 저장하고 새 버전 번호를 반환합니다."""
+        now = datetime.now().isoformat(timespec='seconds')
+        with self._lock, closing(self._connect()) as conn, conn:
+            version = conn.execute("SELECT COALESCE(MAX(version), 0) + 1 FROM portfolio_versions WHERE name = ?",
+                                   (name,)).fetchone()[0]
+            conn.execute("INSERT INTO portfolio_versions (name, version, weights, assets, created_at) VALUES (?, ?, ?, ?, ?)",
+                         (name, version, json.dumps(weights, ensure_ascii=False), json.dumps(assets, ensure_ascii=False), now))
+            conn.execute("INSERT OR REPLACE INTO portfolios (name, version, updated_at) VALUES (?, ?, ?)", (name, version, now))
+        return version
+
+    def list(self) -> list:
+        """모든 포트폴리오의 최신 버전을 이름순으로 반환합니다."""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT p.name, p.version, v.weights, v.assets FROM portfolios p "
+                "JOIN portfolio_versions v ON v.name = p.name AND v.version = p.version ORDER BY p.name").fetchall()
+        return [self._row_to_portfolio(row) for row in rows]
+
+    def versions(self) -> tuple:
+        """((이름, 최신 버전), ...) — 비교 결과 캐시의 키로 사용합니다."""
+        with closing(self._connect()) as conn:
+            return tuple(conn.execute("SELECT name, version FROM portfolios ORDER BY name").fetchall())
+
+    def get(self, name: str, version: int = None):
+        """포트폴리오 하나를 반환합니다. version을 생략하면 최신 버전이며, 없으면 None입니다."""
+        with closing(self._connect()) as conn:
+            if version is None:
+                row = conn.execute("SELECT version FROM portfolios WHERE name = ?", (name,)).fetchone()
+                if row is None:
+                    return None
+                version = row[0]
+            row = conn.execute("SELECT name, version, weights, assets FROM portfolio_versions WHERE name = ? AND version = ?",
+                               (name, version)).fetchone()
+        return self._row_to_portfolio(row) if row else None
+
+    def get_many(self, keys) -> list:
+        """[(이름, 버전), ...]에 해당하는 포트폴리오들을 같은 순서로 반환합니다. (없는 항목은 제외)"""
+        keys = list(keys)
+        if not keys:
+            return []
+        # 비교할 포트폴리오가 많아도 연결 하나, 쿼리 하나로 읽습니다. (버전이 None이면 최신 버전)
+        values = ", ".join(["(?, ?, ?)"] * len(keys))
+        params = [value for pos, (name, version) in enumerate(keys) for value in (pos, name, version)]
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                f"WITH keys(pos, name, version) AS (VALUES {values}) "
+                "SELECT v.name, v.version, v.weights, v.assets FROM keys k "
+                "LEFT JOIN portfolios p ON p.name = k.name "
+                "JOIN portfolio_versions v ON v.name = k.name AND v.version = COALESCE(k.version, p.version) "
+                "ORDER BY k.pos", params).fetchall()
+        return [self._row_to_portfolio(row) for row in rows]
+
+    def delete(self, name: str):
+        """포트폴리오를 목록에서 지웁니다. (버전 기록은 남겨 두므로 같은 이름으로 다시 저장하면 버전이 이어집니다)"""
+        with self._lock, closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM portfolios WHERE name = ?", (name,))
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_portfolio_store() -> PortfolioStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = PortfolioStore(PORTFOLIO_DB_PATH)
+        return _store
+
+
+def set_portfolio_store(store: PortfolioStore):
+    global _store
+    with _store_lock:
+        _store = store
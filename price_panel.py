@@ -0,0 +1,131 @@
+# price_panel.py
+import os
+import json
+from functools import cached_property
+import numpy as np
+import pandas as pd
+
+
+class PricePanel:
+    """
+    (날짜 x 티커) 가격을 하나의 연속된 NumPy 배열로 보관하는 메모리 절약형 패널입니다.
+    - 컬럼은 표시 이름이 아닌 티커로 구분하므로, 이름이 같은 자산이 있어도 충돌하지 않습니다.
+    - 일일/누적 수익률은 처음 사용할 때 한 번만 계산합니다.
+    - save()로 저장한 패널은 load(mmap=True)로 디스크에서 바로 메모리 매핑해 읽을 수 있습니다.
+    """
+
+    def __init__(self, values: np.ndarray, dates, tickers: list, names: dict = None):
+        values = np.asarray(values)
+        if values.ndim != 2 or values.shape != (len(dates), len(tickers)):
+            raise ValueError(f"가격 배열 크기 {values.shape}가 날짜 {len(dates)}개 x 티커 {len(tickers)}개와 맞지 않습니다.")
+        self.values = values
+        self.dates = pd.DatetimeIndex(dates)
+        self.tickers = list(tickers)
+        self.names = dict(names or {})
+
+    # --- 생성 ---
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, dtype='float64', names: dict = None):
+        return cls(np.ascontiguousarray(df.to_numpy(dtype=dtype)), df.index, list(df.columns), names)
+
+    @classmethod
+    def from_series(cls, series: dict, dtype='float64', names: dict = None):
+        """{티커: 가격 시리즈}를 중간 DataFrame 없이 미리 할당한 배열에 바로 채워 패널을 만듭니다."""
+        series = {t: s for t, s in series.items() if s is not None and not s.empty}
+        if not series:
+            return cls(np.empty((0, 0), dtype=dtype), pd.DatetimeIndex([]), [], names)
+        dates = pd.DatetimeIndex(np.unique(np.concatenate([s.index.values for s in series.values()])))
+        values = np.full((len(dates), len(series)), np.nan, dtype=dtype)
+        for j, s in enumerate(series.values()):
+            values[dates.get_indexer(s.index), j] = s.to_numpy()
+        return cls(values, dates, list(series), names)
+
+    # --- 기본 정보 ---
+    @property
+    def empty(self) -> bool:
+        return self.values.size == 0
+
+    @property
+    def shape(self) -> tuple:
+        return self.values.shape
+
+    @property
+    def display_names(self) -> list:
+        return [self.names.get(t, t) for t in self.tickers]
+
+    # --- 부분 선택 (행 구간은 복사 없이 뷰로 반환합니다) ---
+    def slice(self, start=None, end=None):
+        """[start, end] 기간의 패널을 반환합니다. 배열을 복사하지 않는 뷰입니다."""
+        lo = 0 if start is None else self.dates.searchsorted(pd.Timestamp(start), side='left')
+        hi = len(self.dates) if end is None else self.dates.searchsorted(pd.Timestamp(end), side='right')
+        return PricePanel(self.values[lo:hi], self.dates[lo:hi], self.tickers, self.names)
+
+    def select(self, tickers: list):
+        """지정한 티커 컬럼만 골라 새 패널을 만듭니다."""
+        positions = [self.tickers.index(t) for t in tickers]
+        return PricePanel(np.ascontiguousarray(self.values[:, positions]), self.dates, tickers, self.names)
+
+    # --- 파생 수익률 (지연 계산) ---
+    @cached_property
+    def _filled(self) -> np.ndarray:
+        """휴장일의 빈 값을 직전 가격으로 채운 배열 (pct_change의 기본 동작과 같음). 빈 값이 없으면 원본을 그대로 씁니다."""
+        mask = np.isnan(self.values)
+        if not mask.any():
+            return self.values
+        rows = np.where(mask, 0, np.arange(len(self.values))[:, None])
+        np.maximum.accumulate(rows, axis=0, out=rows)
+        return self.values[rows, np.arange(self.values.shape[1])]
+
+    @cached_property
+    def _returns(self) -> tuple:
+        filled = self._filled
+        returns = np.divide(filled[1:], filled[:-1])
+        returns -= 1
+        valid = ~np.isnan(returns).any(axis=1)
+        if not valid.all():
+            returns = returns[valid]
+        return returns, self.dates[1:][valid]
+
+    @property
+    def returns(self) -> np.ndarray:
+        """calculate_returns()와 같은 기준의 일일 수익률 배열 (빈 값이 있는 날은 제외)."""
+        return self._returns[0]
+
+    @property
+    def return_dates(self) -> pd.DatetimeIndex:
+        return self._returns[1]
+
+    @cached_property
+    def cumulative_returns(self) -> np.ndarray:
+        return np.cumprod(1 + self.returns, axis=0)
+
+    def to_frame(self, kind: str = 'prices', use_names: bool = False) -> pd.DataFrame:
+        """가격('prices') / 일일 수익률('returns') / 누적 수익률('cumulative')을 DataFrame으로 감쌉니다. (가능하면 복사 없이)"""
+        if kind == 'prices':
+            values, index = self.values, self.dates
+        elif kind == 'returns':
+            values, index = self.returns, self.return_dates
+        elif kind == 'cumulative':
+            values, index = self.cumulative_returns, self.return_dates
+        else:
+            raise ValueError(f"지원하지 않는 kind입니다: {kind}")
+        columns = self.display_names if use_names else self.tickers
+        return pd.DataFrame(values, index=index, columns=columns, copy=False)
+
+    # --- 저장 / 메모리 매핑 ---
+    def save(self, path: str):
+        """가격 배열(.npy)과 날짜·티커 정보(.json)를 path 폴더에 저장합니다."""
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, 'values.npy'), np.ascontiguousarray(self.values))
+        np.save(os.path.join(path, 'dates.npy'), self.dates.values.astype('datetime64[ns]'))
+        with open(os.path.join(path, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump({'tickers': self.tickers, 'names': self.names}, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True):
+        """save()로 저장한 패널을 읽습니다. mmap=True면 가격 배열을 메모리에 올리지 않고 디스크에서 매핑합니다."""
+        values = np.load(os.path.join(path, 'values.npy'), mmap_mode='r' if mmap else None)
+        dates = np.load(os.path.join(path, 'dates.npy'))
+        with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        return cls(values, dates, meta['tickers'], meta['names'])
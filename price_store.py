@@ -0,0 +1,331 @@
+# price_store.py
+import io
+import os
+import re
+import json
+import logging
+import threading
+from datetime import timedelta
+from urllib.parse import quote, urlencode
+from urllib.request import urlopen
+import numpy as np
+import pandas as pd
+
+# 💡 pyarrow가 설치되어 있으면 Parquet(열 기반)으로, 없으면 pickle로 저장합니다.
+try:
+    import pyarrow  # noqa: F401
+    _FILE_EXT = ".parquet"
+except ImportError:
+    _FILE_EXT = ".pkl"
+
+PRICE_COLUMNS = ["Open", "High", "Low", "Close", "Adj Close", "Volume"]
+_META_FILE = "_meta.json"
+
+logger = logging.getLogger(__name__)
+
+# 증분 갱신 때 이미 저장된 마지막 봉 몇 개를 함께 다시 받아, 공급자가 과거 가격을 다시 조정(액면분할·배당)했는지 확인합니다.
+OVERLAP_BARS = 5
+# 다시 받은 봉의 종가·수정 종가가 저장 값과 이 상대 오차보다 크게 다르면 과거가 재조정된 것으로 보고 전체 구간을 다시 받습니다.
+ADJUSTMENT_RTOL = 1e-4
+
+# 일봉이 확정되는 거래소 장 마감 시각: 티커 접미사 → (거래소 시간대, 봉 날짜 0시부터 장 마감까지의 시간)
+EXCHANGE_SESSIONS = {
+    '.KS': ('Asia/Seoul', timedelta(hours=15, minutes=30)),
+    '.KQ': ('Asia/Seoul', timedelta(hours=15, minutes=30)),
+    '.T': ('Asia/Tokyo', timedelta(hours=15)),
+    '.HK': ('Asia/Hong_Kong', timedelta(hours=16)),
+    '.SS': ('Asia/Shanghai', timedelta(hours=15)),
+    '.SZ': ('Asia/Shanghai', timedelta(hours=15)),
+    '.L': ('Europe/London', timedelta(hours=16, minutes=30)),
+    '.DE': ('Europe/Berlin', timedelta(hours=17, minutes=30)),
+    '.PA': ('Europe/Paris', timedelta(hours=17, minutes=30)),
+}
+INDEX_SESSIONS = {'^KS11': EXCHANGE_SESSIONS['.KS'], '^KQ11': EXCHANGE_SESSIONS['.KQ'], '^N225': EXCHANGE_SESSIONS['.T']}
+# 그 밖의 티커(미국 주식·지수)
+DEFAULT_SESSION = ('America/New_York', timedelta(hours=16))
+# 24시간 거래되는 암호화폐(BTC-USD 등)와 환율(KRW=X)의 일봉은 UTC 자정에 마감됩니다.
+ROUND_THE_CLOCK_SESSION = ('UTC', timedelta(days=1))
+# 장 마감 뒤 공급자가 종가를 확정할 때까지의 여유 시간
+SESSION_SETTLE = timedelta(minutes=30)
+
+
+def _session(ticker: str) -> tuple:
+    if ticker in INDEX_SESSIONS:
+        return INDEX_SESSIONS[ticker]
+    if ticker.endswith('=X') or re.search(r'-(USD|USDT|KRW|EUR)$', ticker):
+        return ROUND_THE_CLOCK_SESSION
+    for suffix, session in EXCHANGE_SESSIONS.items():
+        if ticker.endswith(suffix):
+            return session
+    return DEFAULT_SESSION
+
+
+def session_close(ticker: str, date) -> pd.Timestamp:
+    """
+    ticker의 date 일봉이 확정되는 시각(UTC)입니다.
+    로컬 날짜가 아닌 거래소 시간으로 판단하므로, 한국 시간 새벽에 받은 미국 종목의 (전날 날짜로 표시된) 장중 봉도 미확정으로 봅니다.
+    """
+    tz, close = _session(ticker)
+    local_close = (pd.Timestamp(date).normalize() + close).tz_localize(tz)
+    return local_close.tz_convert('UTC') + SESSION_SETTLE
+
+
+def _utc_now() -> pd.Timestamp:
+    return pd.Timestamp.now(tz='UTC')
+
+
+class PriceProvider:
+    """
+    가격 데이터 공급자 인터페이스입니다.
+    download()는 {티커: OHLCV DataFrame} 형태의 dict를 반환해야 합니다.
+    요청이 성공했지만 새 데이터가 없으면 빈 DataFrame을, 가져오지 못한 티커는 결과에서 뺍니다.
+    """
+
+    def download(self, tickers: list, start: str, end: str) -> dict:
+        raise NotImplementedError
+
+
+class HttpCsvProvider(PriceProvider):
+    """
+    {base_url}/{티커}?start=...&end=... 주소에서 CSV(Date, Open, High, Low, Close, Volume)를 받는 공급자입니다.
+    사내 가격 서버나 테스트용 로컬 HTTP 서버에 연결할 때 사용합니다.
+    """
+
+    def __init__(self, base_url: str, timeout: float = 10.0):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def download(self, tickers: list, start: str, end: str) -> dict:
+        frames = {}
+        for ticker in tickers:
+            url = f"{self.base_url}/{quote(ticker)}?{urlencode({'start': start, 'end': end})}"
+            with urlopen(url, timeout=self.timeout) as response:
+                body = response.read()
+            if body.strip():
+                frames[ticker] = pd.read_csv(io.BytesIO(body), index_col=0, parse_dates=True)
+            else:
+                frames[ticker] = pd.DataFrame(columns=PRICE_COLUMNS)
+        return frames
+
+
+def normalize_ohlcv(df: pd.DataFrame) -> pd.DataFrame:
+    """공급자가 넘겨준 OHLCV 데이터를 저장소 형식(숫자형, tz 없는 날짜 인덱스)으로 정제합니다."""
+    if df is None or df.empty:
+        return pd.DataFrame(columns=PRICE_COLUMNS)
+
+    df = df.copy()
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = df.columns.get_level_values(-1)
+    df = df[[col for col in PRICE_COLUMNS if col in df.columns]]
+    df = df.apply(pd.to_numeric, errors='coerce')
+
+    index = pd.to_datetime(df.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    df.index = index.normalize()
+    df.index.name = "Date"
+
+    df = df[~df.index.duplicated(keep='last')].sort_index()
+    df.dropna(axis=0, how='all', inplace=True)
+    return df
+
+
+class PriceStore:
+    """
+    티커별 가격 데이터를 디스크에 보관하는 로컬 저장소입니다.
+    이미 받아 둔 구간은 디스크에서 읽고, 공급자에게는 마지막 저장일 이후의 구간만 요청합니다.
+    이때 저장된 마지막 OVERLAP_BARS개 봉을 함께 다시 받아 비교하고, 과거 가격이 재조정됐으면 전체 구간을 다시 받습니다.
+    clock: 현재 시각(UTC)을 돌려주는 함수 (장중 봉 판단용, 테스트에서 교체)
+    """
+
+    def __init__(self, root: str, clock=None):
+        self.root = root
+        self.clock = clock or _utc_now
+        os.makedirs(self.root, exist_ok=True)
+        self._meta_path = os.path.join(self.root, _META_FILE)
+        self._meta = self._load_meta()
+        self._lock = threading.Lock()
+
+    # --- 파일 입출력 ---
+    def _path(self, ticker: str) -> str:
+        # ^GSPC, BTC-USD, KRW=X 같은 티커도 안전한 파일명이 되도록 변환합니다.
+        safe_name = re.sub(r'[^0-9A-Za-z._-]', '_', ticker)
+        return os.path.join(self.root, safe_name + _FILE_EXT)
+
+    def _load_meta(self) -> dict:
+        if not os.path.exists(self._meta_path):
+            return {}
+        try:
+            with open(self._meta_path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_meta(self):
+        tmp_path = self._meta_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._meta, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self._meta_path)
+
+    def load(self, ticker: str) -> pd.DataFrame:
+        """저장된 전체 데이터를 읽습니다. 없으면 빈 DataFrame을 반환합니다."""
+        path = self._path(ticker)
+        if not os.path.exists(path):
+            return pd.DataFrame(columns=PRICE_COLUMNS)
+        if _FILE_EXT == ".parquet":
+            return pd.read_parquet(path)
+        return pd.read_pickle(path)
+
+    def save(self, ticker: str, df: pd.DataFrame):
+        path = self._path(ticker)
+        tmp_path = path + ".tmp"
+        if _FILE_EXT == ".parquet":
+            df.to_parquet(tmp_path)
+        else:
+            df.to_pickle(tmp_path)
+        os.replace(tmp_path, path)
+
+    def clear(self, ticker: str = None):
+        """특정 티커(또는 전체)의 저장 데이터를 삭제합니다."""
+        tickers = [ticker] if ticker else list(self._meta.keys())
+        for t in tickers:
+            path = self._path(t)
+            if os.path.exists(path):
+                os.remove(path)
+            self._meta.pop(t, None)
+        self._save_meta()
+
+    def is_partial(self, ticker: str, date) -> bool:
+        """date 일봉이 아직 거래소 장 마감 전(미확정)인지 여부"""
+        return self.clock() < session_close(ticker, date)
+
+    def ingest(self, ticker: str, df: pd.DataFrame, partial: bool = None):
+        """
+        외부 파일 등에서 읽은 데이터를 기존 저장 데이터와 합쳐 저장합니다. (겹치는 날짜는 새 데이터 사용)
+        저장 구간 정보도 함께 갱신하므로, 이후 update()는 마지막 날짜 다음부터만 공급자에게 요청합니다.
+        partial=True면 마지막 봉을 장중(미확정) 봉으로 기록해, 다음 update()에서 그 날짜부터 다시 받습니다.
+        partial=None이면 마지막 봉의 거래소 장 마감 시각으로 판단합니다.
+        """
+        new_rows = normalize_ohlcv(df)
+        if new_rows.empty:
+            return
+        if partial is None:
+            partial = self.is_partial(ticker, new_rows.index[-1])
+        with self._lock:
+            stored = self.load(ticker)
+            merged = pd.concat([stored, new_rows]) if not stored.empty else new_rows
+            merged = merged[~merged.index.duplicated(keep='last')].sort_index()
+            self.save(ticker, merged)
+            meta = self._meta.get(ticker, {})
+            first_date = merged.index[0].strftime('%Y-%m-%d')
+            next_date = (merged.index[-1] + timedelta(days=1)).strftime('%Y-%m-%d')
+            entry = {'start': min(meta.get('start', first_date), first_date),
+                     'checked_until': max(meta.get('checked_until', next_date), next_date)}
+            if partial:
+                entry['partial_from'] = new_rows.index[-1].strftime('%Y-%m-%d')
+            elif 'partial_from' in meta and meta['partial_from'] < new_rows.index[0].strftime('%Y-%m-%d'):
+                entry['partial_from'] = meta['partial_from']
+            self._meta[ticker] = entry
+            self._save_meta()
+
+    # --- 증분 갱신 ---
+    def _fetch_start(self, ticker: str, stored: pd.DataFrame, start: str) -> str:
+        """공급자에게 요청해야 할 시작일을 계산합니다."""
+        meta = self._meta.get(ticker)
+        if stored.empty or meta is None or meta.get('start', start) > start:
+            # 저장된 데이터가 없거나, 요청 구간이 저장 구간보다 앞서면 전체를 다시 받습니다.
+            return start
+        # 마지막으로 확인한 날짜(주말/휴장일 포함) 이후만 요청합니다. 장중에 받은 미확정 봉이 있으면 그 날짜부터 다시 받습니다.
+        return min(meta['checked_until'], meta.get('partial_from', meta['checked_until']))
+
+    @staticmethod
+    def _overlap_start(stored: pd.DataFrame, fetch_start: str) -> str:
+        """재조정 여부를 확인할 수 있도록 저장된 마지막 OVERLAP_BARS개 봉부터 요청하도록 시작일을 앞당깁니다."""
+        if stored.empty:
+            return fetch_start
+        return min(fetch_start, stored.index[-OVERLAP_BARS:][0].strftime('%Y-%m-%d'))
+
+    def _readjusted(self, ticker: str, stored: pd.DataFrame, new_rows: pd.DataFrame) -> bool:
+        """다시 받은 확정 봉의 종가·수정 종가가 저장된 값과 다른지 (공급자가 과거 가격을 다시 조정했는지) 확인합니다."""
+        if stored.empty or new_rows.empty:
+            return False
+        common = stored.index.intersection(new_rows.index)
+        partial_from = self._meta.get(ticker, {}).get('partial_from')
+        if partial_from is not None:
+            # 장중에 받은 봉은 값이 바뀌는 것이 정상이므로 비교하지 않습니다.
+            common = common[common < pd.Timestamp(partial_from)]
+        columns = [col for col in ('Close', 'Adj Close') if col in stored.columns and col in new_rows.columns]
+        if common.empty or not columns:
+            return False
+        old = stored.loc[common, columns].to_numpy(dtype='float64')
+        new = new_rows.loc[common, columns].to_numpy(dtype='float64')
+        return not np.allclose(new, old, rtol=ADJUSTMENT_RTOL, atol=0, equal_nan=True)
+
+    def _entry(self, ticker: str, df: pd.DataFrame, start: str, checked_until: str) -> dict:
+        entry = {'start': start, 'checked_until': checked_until}
+        # 마지막 봉의 거래소 장이 아직 끝나지 않았으면(실시간 모드) 미확정 봉이므로 다음 갱신 때 다시 받습니다.
+        if not df.empty and self.is_partial(ticker, df.index[-1]):
+            entry['partial_from'] = df.index[-1].strftime('%Y-%m-%d')
+        return entry
+
+    def update(self, tickers: list, provider: PriceProvider, start: str, end: str) -> dict:
+        """
+        저장소를 [start, end) 구간까지 최신화한 뒤 티커별 데이터를 반환합니다.
+        같은 시작일을 가진 티커끼리 묶어서 공급자를 한 번만 호출합니다.
+        """
+        tickers = list(dict.fromkeys(tickers))
+        with self._lock:
+            stored = self._update_locked(tickers, provider, start, end)
+
+        result = {}
+        for t in tickers:
+            df = stored[t]
+            if not df.empty:
+                end_exclusive = pd.Timestamp(end) - timedelta(days=1)
+                df = df.loc[pd.Timestamp(start):end_exclusive]
+            result[t] = df
+        return result
+
+    def _update_locked(self, tickers: list, provider: PriceProvider, start: str, end: str) -> dict:
+        stored = {t: self.load(t) for t in tickers}
+
+        pending = {}
+        for t in tickers:
+            fetch_start = self._fetch_start(t, stored[t], start)
+            if fetch_start < end:
+                pending.setdefault(self._overlap_start(stored[t], fetch_start), []).append(t)
+
+        readjusted = []
+        for fetch_start, group in pending.items():
+            fetched = provider.download(group, fetch_start, end)
+            for t in group:
+                new_rows = normalize_ohlcv(fetched.get(t))
+                if t not in fetched or (new_rows.empty and stored[t].empty):
+                    # 받지 못한 티커는 '확인 완료'로 기록하지 않아 다음 호출 때 다시 요청합니다.
+                    continue
+                if self._readjusted(t, stored[t], new_rows):
+                    readjusted.append(t)
+                    continue
+                if not new_rows.empty:
+                    merged = pd.concat([stored[t], new_rows]) if not stored[t].empty else new_rows
+                    merged = merged[~merged.index.duplicated(keep='last')].sort_index()
+                    self.save(t, merged)
+                    stored[t] = merged
+                prev_start = self._meta.get(t, {}).get('start', fetch_start)
+                self._meta[t] = self._entry(t, stored[t], min(prev_start, fetch_start), end)
+            self._save_meta()
+
+        if readjusted:
+            # 재조정된 티커는 저장된 값을 버리고 저장 구간 전체를 새 기준으로 다시 받습니다.
+            full_start = min([start] + [self._meta[t]['start'] for t in readjusted if t in self._meta])
+            logger.info("과거 가격이 다시 조정되어 전체 구간을 다시 받습니다: %s", ', '.join(readjusted))
+            fetched = provider.download(readjusted, full_start, end)
+            for t in readjusted:
+                new_rows = normalize_ohlcv(fetched.get(t))
+                if new_rows.empty:
+                    continue
+                self.save(t, new_rows)
+                stored[t] = new_rows
+                self._meta[t] = self._entry(t, new_rows, full_start, end)
+            self._save_meta()
+        return stored
@@ -0,0 +1,114 @@
+# profiling.py
+import os
+import time
+import pstats
+import cProfile
+import logging
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from config import PROFILE_ENV_VAR, PROFILE_DIR
+
+logger = logging.getLogger(__name__)
+
+# 💡 환경 변수로 켜는 선택형 프로파일링입니다. 꺼져 있으면 profile_stage()는 아무 일도 하지 않습니다.
+#   VISUALIZE_PROFILE=time          → 단계별 실행 시간만 기록
+#   VISUALIZE_PROFILE=memory        → + tracemalloc 최대 메모리
+#   VISUALIZE_PROFILE=cprofile      → + cProfile 상위 함수 (PROFILE_DIR에 .prof 파일 저장)
+#   VISUALIZE_PROFILE=1 (또는 all)   → 모두
+_MODES = ('time', 'memory', 'cprofile')
+_MAX_RECORDS = 200
+
+_records = []
+_lock = threading.Lock()
+_profiler_active = threading.Lock()
+# tracemalloc도 프로세스 전체에 하나뿐이므로, 최대 메모리는 한 번에 하나의 구간에서만 잽니다.
+_memory_active = threading.Lock()
+
+
+def enabled_modes() -> set:
+    """현재 켜진 프로파일링 항목 집합을 반환합니다. (호출할 때마다 환경 변수를 다시 읽습니다)"""
+    value = os.environ.get(PROFILE_ENV_VAR, '').strip().lower()
+    if not value or value in ('0', 'false', 'off'):
+        return set()
+    if value in ('1', 'true', 'on', 'all'):
+        return set(_MODES)
+    modes = {mode.strip() for mode in value.split(',')} & set(_MODES)
+    return modes | {'time'}
+
+
+def _top_functions(profiler: cProfile.Profile, limit: int = 5) -> list:
+    stats = pstats.Stats(profiler)
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+    return [{'function': f"{os.path.basename(filename)}:{line}({name})", 'cumulative_seconds': round(cumulative, 4)}
+            for (filename, line, name), (_, _, _, cumulative, _) in rows]
+
+
+@contextmanager
+def profile_stage(name: str):
+    """
+    with profile_stage('fetch'): ... 로 감싼 구간의 실행 시간·최대 메모리·상위 함수를 기록합니다.
+    중첩해서 사용할 수 있으며, cProfile과 최대 메모리는 한 번에 하나의 구간에만 적용됩니다.
+    (중첩되거나 다른 세션과 겹친 구간은 실행 시간만 기록합니다)
+    """
+    modes = enabled_modes()
+    if not modes:
+        yield
+        return
+
+    record = {'stage': name}
+    started_tracing = False
+    measure_memory = 'memory' in modes and _memory_active.acquire(blocking=False)
+    if measure_memory:
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        else:
+            tracemalloc.start()
+            started_tracing = True
+        memory_before = tracemalloc.get_traced_memory()[0]
+
+    profiler = None
+    if 'cprofile' in modes and _profiler_active.acquire(blocking=False):
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # 다른 프로파일러(디버거 등)가 이미 실행 중이면 cProfile은 건너뜁니다.
+            profiler = None
+            _profiler_active.release()
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record['seconds'] = time.perf_counter() - start
+        if profiler is not None:
+            profiler.disable()
+            _profiler_active.release()
+            record['top_functions'] = _top_functions(profiler)
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            path = os.path.join(PROFILE_DIR, f"{name}_{time.strftime('%Y%m%d_%H%M%S')}.prof")
+            profiler.dump_stats(path)
+            record['profile_path'] = path
+        if measure_memory:
+            record['peak_mb'] = (tracemalloc.get_traced_memory()[1] - memory_before) / 2**20
+            if started_tracing:
+                tracemalloc.stop()
+            _memory_active.release()
+
+        logger.info("[profile] %s: %.3f초%s", name, record['seconds'],
+                    f", 최대 메모리 +{record['peak_mb']:.1f}MB" if 'peak_mb' in record else "")
+        with _lock:
+            _records.append(record)
+            del _records[:-_MAX_RECORDS]
+
+
+def profile_records() -> list:
+    """지금까지 기록된 구간별 프로파일 결과를 오래된 순서로 반환합니다."""
+    with _lock:
+        return list(_records)
+
+
+def clear_profile_records():
+    with _lock:
+        _records.clear()
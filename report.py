@@ -0,0 +1,154 @@
+# report.py
+"""
+Streamlit 없이 여러 포트폴리오를 한 번에 분석하는 배치 리포트 실행기입니다.
+
+사용 예:
+    python report.py portfolios.json --output-dir reports
+    python -m visualize report portfolios.json   (저장소 상위 폴더에서 실행)
+
+포트폴리오 파일(JSON)은 아래 둘 중 하나의 형식을 사용하는 목록입니다.
+    {"name": "성장형", "weights": {"AAPL": 50, "NVDA": 30, "TLT": 20}}            # 티커 기준 비중(%)
+    {"name": "...", "weights": {"Apple": 50, ...}, "assets": [{"name": "Apple", "ticker": "AAPL"}, ...]}  # 앱 저장 형식
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from data_fetcher import prefetch, fetch_risk_free_rate, fetch_ohlcv_panel
+from comparison import compare_portfolios, duplicate_names, ticker_weights
+
+logger = logging.getLogger(__name__)
+
+
+def load_portfolios(path: str) -> list:
+    """
+    포트폴리오 파일을 읽어 [{'name': 이름, 'weights': {티커 또는 자산 이름: 비중(%)}, 'assets': [...]}] 목록으로 반환합니다.
+    결과 표를 이름으로 구분하므로 이름이 중복되면 ValueError를 냅니다.
+    """
+    with open(path, encoding='utf-8') as f:
+        portfolios = json.load(f)
+    duplicated = duplicate_names(portfolios)
+    if duplicated:
+        raise ValueError(f"{path}: 포트폴리오 이름이 중복되었습니다: {', '.join(map(str, duplicated))}")
+    return portfolios
+
+
+def analyze_portfolios(portfolios: list, risk_free_rate: float = 0.0, rebalance='M', transaction_cost: float = 0.0,
+                       unavailable=()) -> pd.DataFrame:
+    """
+    여러 포트폴리오를 한 번에 분석합니다. (프로세스 풀의 작업 단위)
+    가격은 로컬 저장소에서 읽으므로 미리 prefetch()로 받아 두고 그때 받지 못한 티커를 unavailable로 넘기면
+    네트워크를 사용하지 않습니다. (받지 못한 티커는 저장소에 '확인 완료'로 기록되지 않아, 넘기지 않으면 다시 요청합니다)
+    데이터를 받지 못한 티커의 비중은 나머지 티커에 비례해 다시 배분하고(status='renormalized'),
+    남은 티커가 하나도 없는 포트폴리오는 지표를 비워 둡니다(status='failed').
+    """
+    comparison = compare_portfolios(portfolios, rebalance=rebalance, transaction_cost=transaction_cost,
+                                    risk_free_rate=risk_free_rate, unavailable=unavailable)
+    result = comparison['metrics']
+    if not result.empty:
+        result['total_return'] = comparison['cumulative'].iloc[-1] - 1
+    names = [port['name'] for port in portfolios]
+    result = result.reindex(index=names, columns=list(result.columns) or ['total_return'])
+    result['missing_tickers'] = [', '.join(comparison['missing'][name]) for name in names]
+    result['missing_weight'] = [comparison['missing_weight'][name] for name in names]
+    result['status'] = np.where(result['total_return'].isna(), 'failed',
+                                np.where(result['missing_weight'] > 0, 'renormalized', 'ok'))
+    return result
+
+
+def run_report(portfolios: list, n_jobs: int = None, chunk_size: int = 50, predict: bool = True,
+               rebalance='M', transaction_cost: float = 0.0) -> pd.DataFrame:
+    """fetch → analyze → predict 순서로 모든 포트폴리오의 결과 표를 만듭니다."""
+    n_jobs = n_jobs or os.cpu_count() or 1
+    tickers = list(dict.fromkeys(t for port in portfolios for t in ticker_weights(port)))
+
+    # 1. 모든 티커·벤치마크·무위험 금리를 한 번에 동시 다운로드해 로컬 저장소를 최신화합니다.
+    start = time.perf_counter()
+    missing = prefetch(tickers)
+    logger.info("데이터 준비 %.2f초 (티커 %d개, 실패 %d개)", time.perf_counter() - start, len(tickers), len(missing))
+    risk_free_rate = fetch_risk_free_rate()
+
+    # 2. 포트폴리오를 묶음으로 나눠 프로세스 풀에서 분석합니다.
+    start = time.perf_counter()
+    chunks = [portfolios[i:i + chunk_size] for i in range(0, len(portfolios), chunk_size)]
+    if n_jobs == 1 or len(chunks) == 1:
+        parts = [analyze_portfolios(chunk, risk_free_rate, rebalance, transaction_cost, missing) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(chunks))) as executor:
+            parts = list(executor.map(analyze_portfolios, chunks, [risk_free_rate] * len(chunks),
+                                      [rebalance] * len(chunks), [transaction_cost] * len(chunks),
+                                      [missing] * len(chunks)))
+    result = pd.concat([part for part in parts if not part.empty]) if any(not part.empty for part in parts) else pd.DataFrame()
+    logger.info("분석 %.2f초 (포트폴리오 %d개)", time.perf_counter() - start, len(portfolios))
+    flagged = result[result['status'] != 'ok'] if not result.empty else result
+    for name, row in flagged.iterrows():
+        logger.warning("%s: 데이터 없는 티커 %s (비중 %.0f%%) → %s", name, row['missing_tickers'],
+                       row['missing_weight'] * 100, '다시 배분' if row['status'] == 'renormalized' else '분석 실패')
+
+    # 3. 종목별 예측 수익률을 한 번씩만 계산하고, 비중으로 가중합해 포트폴리오 예측 수익률을 만듭니다.
+    if predict and not result.empty:
+        from ml_predictor import predict_universe
+        start = time.perf_counter()
+        available = [t for t in tickers if t not in missing]
+        predictions = predict_universe(fetch_ohlcv_panel(available), n_jobs=n_jobs, use_cache=True)['predicted_return']
+        expected = {port['name']: _weighted_prediction(ticker_weights(port), predictions) for port in portfolios}
+        result['predicted_return'] = result.index.map(expected)
+        logger.info("예측 %.2f초 (종목 %d개)", time.perf_counter() - start, len(predictions))
+
+    result.index.name = 'portfolio'
+    return result
+
+
+def _weighted_prediction(weights: dict, predictions: pd.Series) -> float:
+    """예측이 있는 티커만으로 비중을 다시 배분해 가중합합니다. (분석 단계와 같은 규칙)"""
+    covered = {t: w for t, w in weights.items() if pd.notna(predictions.get(t, np.nan))}
+    covered_weight = sum(covered.values())
+    if covered_weight <= 0:
+        return np.nan
+    return sum(w * predictions[t] for t, w in covered.items()) * sum(weights.values()) / covered_weight
+
+
+def write_report(result: pd.DataFrame, output_dir: str, formats=('parquet', 'json')) -> list:
+    """결과 표를 Parquet/JSON 파일로 저장하고, 저장한 경로 목록을 반환합니다."""
+    os.makedirs(output_dir, exist_ok=True)
+    written = []
+    if 'parquet' in formats:
+        path = os.path.join(output_dir, 'report.parquet')
+        result.to_parquet(path)
+        written.append(path)
+    if 'json' in formats:
+        path = os.path.join(output_dir, 'report.json')
+        result.reset_index().to_json(path, orient='records', force_ascii=False, indent=1)
+        written.append(path)
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="포트폴리오 배치 리포트 (Streamlit 없이 실행)")
+    parser.add_argument('command', nargs='?', default='report', choices=['report'])
+    parser.add_argument('portfolios', help="포트폴리오 정의 JSON 파일")
+    parser.add_argument('--output-dir', default='reports', help="결과 저장 폴더 (기본: reports)")
+    parser.add_argument('--format', nargs='+', default=['parquet', 'json'], choices=['parquet', 'json'])
+    parser.add_argument('--jobs', type=int, default=None, help="프로세스 수 (기본: CPU 개수)")
+    parser.add_argument('--chunk-size', type=int, default=50, help="프로세스 하나가 한 번에 분석할 포트폴리오 수")
+    parser.add_argument('--rebalance', default='M', help="백테스트 리밸런싱 주기 (D/W/M/Q/Y/none)")
+    parser.add_argument('--transaction-cost', type=float, default=0.0, help="거래 비용 (%%)")
+    parser.add_argument('--no-predict', action='store_true', help="ML 예측 단계를 건너뜁니다")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    portfolios = load_portfolios(args.portfolios)
+    result = run_report(portfolios, n_jobs=args.jobs, chunk_size=args.chunk_size, predict=not args.no_predict,
+                        rebalance=args.rebalance, transaction_cost=args.transaction_cost / 100)
+    for path in write_report(result, args.output_dir, args.format):
+        logger.info("저장: %s", path)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
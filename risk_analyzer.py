@@ -0,0 +1,142 @@
+# risk_analyzer.py
+import numpy as np
+import pandas as pd
+from scipy.stats import norm
+from portfolio_analyzer import TRADING_DAYS
+
+# 💡 모든 지표는 (날짜 x 포트폴리오) 수익률 행렬에 대해 열 방향으로 한 번에 계산합니다.
+# 포트폴리오가 1개든 100개든 같은 코드 경로를 사용하므로 포트폴리오별/지표별 반복문이 없습니다.
+
+RISK_METRIC_LABELS = {
+    'annual_return': '연평균 수익률 (%)',
+    'annual_volatility': '연간 변동성 (%)',
+    'sharpe': '샤프 지수',
+    'sortino': '소르티노 지수',
+    'max_drawdown': '최대 낙폭 (%)',
+    'max_drawdown_days': '최장 낙폭 기간 (거래일)',
+    'calmar': '칼마 지수',
+    'var_historical': '역사적 VaR (%)',
+    'cvar_historical': '역사적 CVaR (%)',
+    'var_parametric': '모수적 VaR (%)',
+    'cvar_parametric': '모수적 CVaR (%)',
+    'beta': '베타',
+    'alpha': '알파 (%)',
+    'tracking_error': '추적 오차 (%)'
+}
+PERCENT_METRICS = ['annual_return', 'annual_volatility', 'max_drawdown', 'var_historical', 'cvar_historical',
+                   'var_parametric', 'cvar_parametric', 'alpha', 'tracking_error']
+
+
+def _drawdowns(portfolio_returns: np.ndarray):
+    """포트폴리오별 최대 낙폭과, 전고점을 회복하지 못한 가장 긴 기간(거래일)을 계산합니다."""
+    wealth = np.cumprod(1 + portfolio_returns, axis=0)
+    # 시작 가치 1을 전고점 후보에 포함시킵니다.
+    peaks = np.maximum(np.maximum.accumulate(wealth, axis=0), 1.0)
+    drawdowns = wealth / peaks - 1
+    max_drawdown = drawdowns.min(axis=0)
+
+    # 낙폭이 0인(신고점) 마지막 날짜로부터 지난 일수의 최댓값 = 최장 낙폭 기간
+    days = np.arange(1, len(portfolio_returns) + 1)[:, None]
+    last_peak = np.maximum.accumulate(np.where(drawdowns >= 0, days, 0), axis=0)
+    max_duration = (days - last_peak).max(axis=0) if len(portfolio_returns) else np.zeros(portfolio_returns.shape[1])
+    return max_drawdown, max_duration
+
+
+def portfolio_risk_metrics(portfolio_returns, benchmark_returns=None, risk_free_rate: float = 0.0,
+                           confidence: float = 0.95) -> pd.DataFrame:
+    """
+    (날짜 x 포트폴리오) 일일 수익률에 대해 수익·위험 지표를 한 번에 계산합니다.
+    VaR/CVaR는 일일 손실 기준(양수 = 손실)이며, benchmark_returns는 같은 날짜로 맞춘 벤치마크 일일 수익률입니다.
+    """
+    columns = list(portfolio_returns.columns) if isinstance(portfolio_returns, pd.DataFrame) else None
+    returns = np.asarray(portfolio_returns, dtype='float64')
+    if returns.ndim == 1:
+        returns = returns[:, None]
+    n_days, n_portfolios = returns.shape
+
+    mean = returns.mean(axis=0)
+    std = returns.std(axis=0)
+    annual_return = (1 + mean)**TRADING_DAYS - 1
+    annual_volatility = std * np.sqrt(TRADING_DAYS)
+
+    daily_rf = (1 + risk_free_rate)**(1 / TRADING_DAYS) - 1
+    downside = np.sqrt((np.minimum(returns - daily_rf, 0)**2).mean(axis=0)) * np.sqrt(TRADING_DAYS)
+
+    max_drawdown, max_drawdown_days = _drawdowns(returns)
+
+    # 역사적 VaR/CVaR: 하위 (1 - confidence) 분위수와 그 이하 손실의 평균
+    quantiles = np.quantile(returns, 1 - confidence, axis=0)
+    tail = returns <= quantiles
+    cvar_historical = -(returns * tail).sum(axis=0) / np.maximum(tail.sum(axis=0), 1)
+
+    # 모수적(정규분포) VaR/CVaR
+    z = norm.ppf(1 - confidence)
+    var_parametric = -(mean + z * std)
+    cvar_parametric = -(mean - std * norm.pdf(z) / (1 - confidence))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        metrics = {
+            'annual_return': annual_return,
+            'annual_volatility': annual_volatility,
+            'sharpe': np.where(annual_volatility > 0, (annual_return - risk_free_rate) / annual_volatility, 0.0),
+            'sortino': np.where(downside > 0, (annual_return - risk_free_rate) / downside, np.nan),
+            'max_drawdown': max_drawdown,
+            'max_drawdown_days': max_drawdown_days,
+            'calmar': np.where(max_drawdown < 0, annual_return / -max_drawdown, np.nan),
+            'var_historical': -quantiles,
+            'cvar_historical': cvar_historical,
+            'var_parametric': var_parametric,
+            'cvar_parametric': cvar_parametric,
+            'beta': np.full(n_portfolios, np.nan),
+            'alpha': np.full(n_portfolios, np.nan),
+            'tracking_error': np.full(n_portfolios, np.nan)
+        }
+
+        if benchmark_returns is not None:
+            bench = np.asarray(benchmark_returns, dtype='float64')
+            valid = ~np.isnan(bench)
+            if valid.sum() > 1:
+                port_valid, bench_valid = returns[valid], bench[valid]
+                bench_centered = bench_valid - bench_valid.mean()
+                beta = (port_valid - port_valid.mean(axis=0)).T @ bench_centered / (bench_centered @ bench_centered)
+                bench_annual = (1 + bench_valid.mean())**TRADING_DAYS - 1
+                port_annual = (1 + port_valid.mean(axis=0))**TRADING_DAYS - 1
+                metrics['beta'] = beta
+                # 젠센의 알파 (연율화)
+                metrics['alpha'] = port_annual - (risk_free_rate + beta * (bench_annual - risk_free_rate))
+                metrics['tracking_error'] = (port_valid - bench_valid[:, None]).std(axis=0) * np.sqrt(TRADING_DAYS)
+
+    return pd.DataFrame(metrics, index=columns)
+
+
+def risk_metrics(weights, daily_returns, benchmark_returns=None, risk_free_rate: float = 0.0,
+                 confidence: float = 0.95, names: list = None) -> pd.DataFrame:
+    """
+    (포트폴리오 수 x 자산 수) 가중치 행렬과 (날짜 x 자산) 수익률로 모든 포트폴리오의 지표를 계산합니다.
+    포트폴리오 수익률은 행렬곱 한 번으로 만듭니다.
+    """
+    weights = np.atleast_2d(np.asarray(weights, dtype='float64'))
+    portfolio_returns = np.asarray(daily_returns, dtype='float64') @ weights.T
+    result = portfolio_risk_metrics(portfolio_returns, benchmark_returns, risk_free_rate, confidence)
+    if names is not None:
+        result.index = names
+    return result
+
+
+def risk_contributions(weights, cov_matrix) -> np.ndarray:
+    """
+    자산별 위험 기여도 비율 w_i · (Σw)_i / (w'Σw)을 (포트폴리오 수 x 자산 수) 행렬로 반환합니다. (행의 합 = 1)
+    """
+    weights = np.atleast_2d(np.asarray(weights, dtype='float64'))
+    marginal = weights @ cov_matrix
+    contributions = weights * marginal
+    total = contributions.sum(axis=1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(total > 0, contributions / total, 0.0)
+
+
+def format_risk_table(metrics: pd.DataFrame) -> pd.DataFrame:
+    """화면 표시용으로 비율 지표를 %로 바꾸고 컬럼 이름을 한글로 바꿉니다."""
+    table = metrics.copy()
+    table[PERCENT_METRICS] = table[PERCENT_METRICS] * 100
+    return table.rename(columns=RISK_METRIC_LABELS)
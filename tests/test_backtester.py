@@ -0,0 +1,59 @@
+# tests/test_backtester.py
+import numpy as np
+import pandas as pd
+import pytest
+from backtester import run_backtest, run_backtest_batch
+from portfolio_analyzer import TRADING_DAYS, get_portfolio_performance
+
+
+def _prices(n_days=300, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range('2020-01-01', periods=n_days)
+    returns = rng.normal(0.0005, 0.01, (n_days, 2))
+    return pd.DataFrame(100 * np.cumprod(1 + returns, axis=0), index=dates, columns=['A', 'B'])
+
+
+def test_daily_rebalance_holds_residual_weight_as_cash():
+    prices = _prices()
+    weights = np.array([0.3, 0.3])
+    value = run_backtest(prices, weights, 'D')['value']
+
+    # 매일 리밸런싱이면 가치 = (1 + r·w)의 누적곱 (나머지 40%는 수익률 0인 현금)
+    expected = np.cumprod(np.concatenate(([1.0], 1 + prices.pct_change().dropna().to_numpy() @ weights)))
+    np.testing.assert_allclose(value.to_numpy(), expected)
+
+
+@pytest.mark.parametrize('rebalance', ['D', 'M', 'none', 0.05])
+def test_partial_weights_do_not_decay(rebalance):
+    prices = _prices()
+    partial = run_backtest(prices, [0.3, 0.3], rebalance)['value']
+    full = run_backtest(prices, [0.5, 0.5], rebalance)['value']
+    assert partial.iloc[-1] > 0.5
+    if rebalance == 'none':
+        # 매수 후 보유: 자산 60% + 현금 40%이므로 손익은 자산 100%일 때의 0.6배입니다.
+        np.testing.assert_allclose(partial.to_numpy() - 1, 0.6 * (full.to_numpy() - 1), atol=1e-12)
+
+
+def test_constant_prices_keep_value_with_partial_weights():
+    prices = pd.DataFrame(100.0, index=pd.bdate_range('2020-01-01', periods=100), columns=['A', 'B'])
+    value = run_backtest(prices, [0.3, 0.3], 'D')['value']
+    np.testing.assert_allclose(value.to_numpy(), 1.0)
+
+
+@pytest.mark.parametrize('rebalance', ['D', 'W', 'M', 'none'])
+def test_batch_matches_single_with_partial_weights(rebalance):
+    prices = _prices()
+    weight_matrix = np.array([[0.3, 0.3], [0.5, 0.5], [0.8, 0.1]])
+    batch = run_backtest_batch(prices, weight_matrix, rebalance, transaction_cost=0.001)
+    for i, weights in enumerate(weight_matrix):
+        single = run_backtest(prices, weights, rebalance, transaction_cost=0.001)['value']
+        np.testing.assert_allclose(batch[i].to_numpy(), single.to_numpy())
+
+
+def test_moment_metrics_use_same_cash_assumption():
+    prices = _prices()
+    daily_returns = prices.pct_change().dropna()
+    weights = np.array([0.3, 0.3])
+    annual_return, _, _ = get_portfolio_performance(weights, daily_returns)
+    portfolio_returns = daily_returns.to_numpy() @ weights
+    assert annual_return == pytest.approx((1 + portfolio_returns.mean())**TRADING_DAYS - 1)
@@ -0,0 +1,101 @@
+# tests/test_fetch_scheduler.py
+import time
+import threading
+from collections import Counter
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, unquote
+import pytest
+from price_store import HttpCsvProvider
+from fetch_scheduler import ConcurrentProvider, request_timeout
+
+CSV_BODY = b"Date,Open,High,Low,Close,Volume\n2024-01-02,1,2,0.5,1.5,100\n2024-01-03,1.5,2,1,1.8,120\n"
+
+
+class _StandIn(BaseHTTPRequestHandler):
+    """
+    테스트용 가격 서버입니다.
+    GOOD: 항상 성공 / FLAKY: 처음 두 번은 500 오류 / SLOW: 응답 전에 오래 대기 / BAD: 항상 404
+    HANG: 첫 요청만 응답 전에 오래 대기
+    """
+    calls = Counter()
+
+    def do_GET(self):
+        ticker = unquote(urlparse(self.path).path.strip('/'))
+        self.calls[ticker] += 1
+        if ticker == 'FLAKY' and self.calls[ticker] <= 2:
+            return self.send_error(500)
+        if ticker == 'BAD':
+            return self.send_error(404)
+        if ticker == 'SLOW' or (ticker == 'HANG' and self.calls[ticker] == 1):
+            time.sleep(2)
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/csv')
+        self.end_headers()
+        self.wfile.write(CSV_BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stand_in():
+    _StandIn.calls = Counter()
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _StandIn)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def _provider(url, **kwargs):
+    options = dict(max_workers=4, max_retries=2, backoff=0.01, timeout=0.5)
+    options.update(kwargs)
+    return ConcurrentProvider(HttpCsvProvider(url, timeout=5), **options)
+
+
+def test_retry_recovers_flaky_ticker(stand_in):
+    frames = _provider(stand_in).download(['FLAKY'], '2024-01-01', '2024-01-04')
+    assert list(frames) == ['FLAKY']
+    assert len(frames['FLAKY']) == 2
+    assert _StandIn.calls['FLAKY'] == 3
+
+
+def test_partial_failure_keeps_successful_tickers(stand_in):
+    frames = _provider(stand_in).download(['GOOD', 'BAD', 'FLAKY'], '2024-01-01', '2024-01-04')
+    assert set(frames) == {'GOOD', 'FLAKY'}
+    # 실패한 티커는 max_retries번 재시도한 뒤 포기합니다.
+    assert _StandIn.calls['BAD'] == 3
+
+
+def test_timeout_drops_only_slow_ticker(stand_in):
+    started = time.monotonic()
+    frames = _provider(stand_in, max_retries=0).download(['SLOW', 'GOOD'], '2024-01-01', '2024-01-04')
+    assert set(frames) == {'GOOD'}
+    assert time.monotonic() - started < 1.5
+
+
+def test_thread_pool_is_reused_between_calls(stand_in):
+    provider = _provider(stand_in)
+    provider.download(['GOOD'], '2024-01-01', '2024-01-04')
+    executor = provider._executor
+    provider.download(['GOOD'], '2024-01-01', '2024-01-04')
+    assert provider._executor is executor
+    provider.close()
+    assert provider._executor is None
+
+
+def test_hanging_request_leaves_time_to_retry(stand_in):
+    budget, retries, backoff = 1.5, 2, 0.01
+    provider = ConcurrentProvider(HttpCsvProvider(stand_in, timeout=request_timeout(budget, retries, backoff)),
+                                  max_workers=2, max_retries=retries, backoff=backoff, timeout=budget)
+    frames = provider.download(['HANG'], '2024-01-01', '2024-01-04')
+    # 첫 요청은 요청 제한 시간에 끊기고, 남은 예산 안에서 재시도해 성공합니다.
+    assert list(frames) == ['HANG']
+    assert _StandIn.calls['HANG'] == 2
+
+
+def test_request_timeout_fits_all_attempts_in_budget():
+    timeout = request_timeout(30, 3, 0.5)
+    assert 4 * timeout + 0.5 * (1 + 2 + 4) == 30
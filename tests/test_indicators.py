@@ -0,0 +1,41 @@
+# tests/test_indicators.py
+import numpy as np
+import pandas as pd
+from indicators import IndicatorEngine, compute_indicators
+
+
+def _frames(n_days=300, tickers=('A', 'B', 'C'), seed=0):
+    rng = np.random.default_rng(seed)
+    frames = {}
+    for k, ticker in enumerate(tickers):
+        # 종목마다 기간 길이를 다르게 해서 아래쪽 정렬을 확인합니다.
+        dates = pd.bdate_range('2020-01-01', periods=n_days - 40 * k)
+        close = 100 * np.cumprod(1 + rng.normal(0.0005, 0.01, len(dates)))
+        frames[ticker] = pd.DataFrame({'Open': close, 'High': close * 1.01, 'Low': close * 0.99, 'Close': close,
+                                       'Volume': rng.integers(1000, 2000, len(dates))}, index=dates)
+    return frames
+
+
+def test_appended_rows_match_full_compute():
+    frames = _frames()
+    engine = IndicatorEngine()
+    before = engine.compute({t: df.iloc[:-3] for t, df in frames.items()})
+    snapshot = {t: frame.copy() for t, frame in before.items()}
+
+    for n in (2, 1, 0):
+        appended = engine.compute({t: df.iloc[:len(df) - n] for t, df in frames.items()})
+    expected = compute_indicators(frames)
+    for ticker, frame in expected.items():
+        pd.testing.assert_frame_equal(appended[ticker], frame, rtol=1e-9)
+        # 새 행을 이어 써도 앞서 돌려준 결과는 바뀌지 않습니다.
+        pd.testing.assert_frame_equal(before[ticker], snapshot[ticker])
+    assert engine.stats()['updates'] == 3 * len(frames)
+
+
+def test_unchanged_data_is_served_from_cache():
+    frames = _frames()
+    engine = IndicatorEngine()
+    first = engine.compute(frames)
+    second = engine.compute(frames)
+    assert all(second[t] is first[t] for t in frames)
+    assert engine.stats()['hits'] == len(frames)
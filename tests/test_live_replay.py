@@ -0,0 +1,108 @@
+# tests/test_live_replay.py
+import time
+import numpy as np
+import pandas as pd
+import pytest
+import data_fetcher
+from analytics_context import AnalyticsContext
+from live_refresh import LiveRefresher
+from local_data import ReplayProvider
+from price_store import PriceStore
+
+TICKERS = ['AAA', 'BBB', 'CCC']
+BENCHMARK = 'IDX'
+HOLDBACK = 6
+
+
+def _recorded_bars(seed=0):
+    """
+    종목마다 기록된 봉입니다. 숨겨 둘 마지막 구간에는 같은 날짜의 장중 스냅숏(먼저)과 확정 봉(나중)이 함께 들어 있습니다.
+    BBB는 다른 종목보다 늦게 상장해 기간이 짧습니다.
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range('2023-01-02', periods=200)
+    frames = {}
+    for ticker in TICKERS + [BENCHMARK]:
+        close = 100 * np.cumprod(1 + rng.normal(0.0005, 0.01, len(dates)))
+        df = pd.DataFrame({'Open': close, 'High': close, 'Low': close, 'Close': close, 'Volume': 1000.0}, index=dates)
+        if ticker == 'BBB':
+            df = df.iloc[30:]
+        snapshot = df.iloc[[-3]].copy()
+        snapshot[['High', 'Close']] *= 1.01
+        frames[ticker] = pd.concat([df.iloc[:-3], snapshot, df.iloc[-3:]])
+    return frames
+
+
+@pytest.fixture
+def replay(tmp_path):
+    previous = data_fetcher._provider, data_fetcher._store
+    provider = ReplayProvider(_recorded_bars(), holdback=HOLDBACK)
+    store = PriceStore(str(tmp_path), clock=lambda: pd.Timestamp('2030-01-01', tz='UTC'))
+    data_fetcher.set_provider(provider)
+    data_fetcher.set_price_store(store)
+    yield provider, store
+    data_fetcher.set_provider(previous[0])
+    data_fetcher.set_price_store(previous[1] or PriceStore(str(tmp_path / 'restored')))
+
+
+def _snapshot():
+    prices = data_fetcher.fetch_close_prices(TICKERS, live=True)
+    benchmark = data_fetcher.fetch_close_prices([BENCHMARK], live=True)[BENCHMARK]
+    return prices, benchmark
+
+
+def _assert_same_context(synced: AnalyticsContext, fresh: AnalyticsContext):
+    pd.testing.assert_frame_equal(synced.daily_returns, fresh.daily_returns, check_freq=False)
+    np.testing.assert_allclose(synced.moments[0], fresh.moments[0], rtol=1e-9, atol=1e-15)
+    np.testing.assert_allclose(synced.moments[1], fresh.moments[1], rtol=1e-7, atol=1e-15)
+    weights = np.array([0.5, 0.3, 0.2])
+    assert synced.beta(weights) == pytest.approx(fresh.beta(weights), rel=1e-9)
+    for synced_value, fresh_value in zip(synced.performance(weights), fresh.performance(weights)):
+        assert synced_value == pytest.approx(fresh_value, rel=1e-9)
+
+
+def test_replayed_bars_sync_matches_full_rebuild(replay):
+    provider, store = replay
+    refresher = LiveRefresher(interval=60, provider=provider, store=store)
+    refresher._subscribers['test'] = (tuple(TICKERS + [BENCHMARK]), time.monotonic())
+
+    prices, benchmark = _snapshot()
+    context = AnalyticsContext(prices, benchmark)
+    context.sync(prices, benchmark, version=data_fetcher.data_version())
+
+    for step in range(HOLDBACK):
+        provider.advance()
+        updates = refresher.poll_once()
+        # 숨겨 둔 행이 하나씩 공개되므로 매번 새 봉(또는 값이 바뀐 장중 봉)이 들어옵니다.
+        assert set(updates) == set(TICKERS + [BENCHMARK])
+
+        prices, benchmark = _snapshot()
+        assert context.sync(prices, benchmark, version=data_fetcher.data_version())
+        _assert_same_context(context, AnalyticsContext(prices, benchmark))
+        # 전체 재계산이 아니라 누적 합계 갱신(_update_moments) 경로를 탔는지 확인합니다.
+        assert context._sums is not None and context._sums[0] == len(context.daily_returns)
+
+    # 모두 공개된 뒤 캐시(merge_many로 이어 붙인 종가)는 기록된 확정 봉과 같아야 합니다.
+    for ticker, recorded in _recorded_bars().items():
+        final = recorded['Close'][~recorded.index.duplicated(keep='last')]
+        actual = (prices[ticker] if ticker != BENCHMARK else benchmark).dropna()
+        assert actual.index.equals(final.index)
+        np.testing.assert_allclose(actual.to_numpy(), final.to_numpy())
+
+
+def test_same_version_skips_sync(replay):
+    prices, benchmark = _snapshot()
+    context = AnalyticsContext(prices, benchmark)
+    assert context.sync(prices, benchmark, version=data_fetcher.data_version())
+    assert not context.sync(prices, benchmark, version=data_fetcher.data_version())
+
+
+def test_replay_reveals_one_bar_per_step():
+    provider = ReplayProvider(_recorded_bars(), holdback=HOLDBACK)
+    before = provider.download(['AAA'], '2023-01-01', '2030-01-01')['AAA']
+    provider.advance()
+    after = provider.download(['AAA'], '2023-01-01', '2030-01-01')['AAA']
+    assert len(after) == len(before) + 1
+    assert not after.index.duplicated().any()
+    # 앞에 0을 붙인 코드로 요청해도 같은 종목으로 찾습니다.
+    assert len(provider.download(['000AAA'], '2023-01-01', '2030-01-01')['000AAA']) == len(after)
@@ -0,0 +1,67 @@
+# tests/test_local_data.py
+import csv
+import os
+import shutil
+import pandas as pd
+import pytest
+from local_data import LocalFileProvider, detect_encoding, read_krx_csv
+
+# 저장소에 함께 들어 있는 KRX 정보데이터시스템 CSV (CP949, 최신 날짜가 맨 위)
+SAMPLE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data_3618_20250703.csv')
+SAMPLE_ROWS = 242
+
+
+@pytest.fixture
+def krx_dir(tmp_path):
+    shutil.copy(SAMPLE, tmp_path / os.path.basename(SAMPLE))
+    return tmp_path
+
+
+def _with_thousands(src, dst):
+    """같은 내용을 '"147,540"'처럼 천 단위 쉼표가 들어간 숫자로 다시 씁니다."""
+    with open(src, encoding='cp949', newline='') as f:
+        rows = list(csv.reader(f))
+    with open(dst, 'w', encoding='cp949', newline='') as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+        writer.writerow(rows[0])
+        for row in rows[1:]:
+            writer.writerow([row[0]] + [f"{float(v):,.0f}" if float(v).is_integer() else v for v in row[1:]])
+
+
+def test_sample_is_detected_as_cp949(krx_dir):
+    assert detect_encoding(str(krx_dir / 'data_3618_20250703.csv')) == 'cp949'
+
+
+def test_read_krx_csv_parses_quoted_numbers_in_chunks(krx_dir):
+    chunks = list(read_krx_csv(str(krx_dir / 'data_3618_20250703.csv'), chunksize=100))
+    assert len(chunks) == 3
+    df = pd.concat(chunks)
+    assert list(df.columns) == ['Close', 'Open', 'High', 'Low', 'Volume']
+    assert (df.dtypes == 'float64').all()
+    assert len(df) == SAMPLE_ROWS
+    # 파일은 최신순입니다.
+    assert df.index[0] == pd.Timestamp('2025-07-03')
+    assert df.loc['2025-07-03', ['Open', 'High', 'Low', 'Close', 'Volume']].tolist() == \
+        [146700.0, 147540.0, 146140.0, 147540.0, 179516.0]
+
+
+def test_thousands_separators_parse_to_same_values(krx_dir, tmp_path_factory):
+    other = tmp_path_factory.mktemp('thousands')
+    _with_thousands(krx_dir / 'data_3618_20250703.csv', other / 'data_3618_20250703.csv')
+    assert '"147,540"' in (other / 'data_3618_20250703.csv').read_text(encoding='cp949')
+
+    expected = pd.concat(read_krx_csv(str(krx_dir / 'data_3618_20250703.csv')))
+    actual = pd.concat(read_krx_csv(str(other / 'data_3618_20250703.csv')))
+    pd.testing.assert_frame_equal(actual, expected)
+
+
+def test_provider_maps_yahoo_ticker_to_file_code_and_sorts(krx_dir):
+    provider = LocalFileProvider(str(krx_dir))
+    df = provider.download(['003618.KS'], '2024-01-01', '2025-07-03')['003618.KS']
+    assert df.index.is_monotonic_increasing and df.index.is_unique
+    assert df.index[0] == pd.Timestamp('2024-07-03')
+    # end는 포함하지 않습니다.
+    assert df.index[-1] == pd.Timestamp('2025-07-02')
+    assert len(df) == SAMPLE_ROWS - 1
+    assert df['Close'].iloc[-1] == 146220.0
+    assert provider.download(['000660.KS'], '2024-01-01', '2025-07-03') == {}
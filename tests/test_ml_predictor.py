@@ -0,0 +1,65 @@
+# tests/test_ml_predictor.py
+import numpy as np
+import pandas as pd
+import pytest
+import ml_predictor
+from ml_predictor import predict_universe, set_model_store, train_and_predict
+from model_store import ModelStore
+
+
+def _ohlcv(n_days=260, seed=0):
+    dates = pd.bdate_range('2023-01-02', periods=n_days)
+    close = 100 * np.cumprod(1 + np.random.default_rng(seed).normal(0.0005, 0.01, n_days))
+    return pd.DataFrame({'Open': close, 'High': close, 'Low': close, 'Close': close, 'Volume': 1000.0}, index=dates)
+
+
+def _record_fits(monkeypatch) -> list:
+    """_fit_predict 호출마다 warm start 여부를 기록합니다."""
+    calls = []
+    fit_predict = ml_predictor._fit_predict
+
+    def recording(X, y, X_predict, n_jobs=1, warm_start=None):
+        calls.append(warm_start is not None)
+        return fit_predict(X, y, X_predict, n_jobs, warm_start)
+
+    monkeypatch.setattr(ml_predictor, '_fit_predict', recording)
+    return calls
+
+
+@pytest.fixture
+def fits(monkeypatch):
+    return _record_fits(monkeypatch)
+
+
+def test_train_and_predict_reuses_stored_model(tmp_path, fits):
+    store = ModelStore(str(tmp_path))
+    df = _ohlcv()
+    first = train_and_predict(df, ticker='AAA', store=store)
+    # 데이터가 그대로면 학습하지 않고 저장된 예측값을 돌려줍니다.
+    assert train_and_predict(df, ticker='AAA', store=store) == pytest.approx(first)
+    assert fits == [False]
+
+    # 새 봉이 추가되면 저장된 모델에 라운드를 더합니다.
+    train_and_predict(_ohlcv(261), ticker='AAA', store=store)
+    assert fits == [False, True]
+
+
+def test_without_ticker_nothing_is_stored(tmp_path, fits):
+    df = _ohlcv()
+    train_and_predict(df)
+    train_and_predict(df)
+    assert fits == [False, False]
+
+
+def test_model_saved_by_predict_universe_warm_starts_train_and_predict(tmp_path, monkeypatch):
+    store = ModelStore(str(tmp_path))
+    set_model_store(store)
+    try:
+        predict_universe({'AAA': _ohlcv()}, n_jobs=1, use_cache=True)
+    finally:
+        set_model_store(None)
+    fits = _record_fits(monkeypatch)
+    # 두 경로 모두 Feature 이름이 있는 입력으로 학습하므로 warm start가 이름 검사에 걸리지 않습니다.
+    prediction = train_and_predict(_ohlcv(261), ticker='AAA', store=store)
+    assert fits[-1] is True
+    assert np.isfinite(prediction)
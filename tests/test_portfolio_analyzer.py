@@ -0,0 +1,46 @@
+# tests/test_portfolio_analyzer.py
+import numpy as np
+import pandas as pd
+import pytest
+from portfolio_analyzer import estimate_moments, get_portfolio_performance, get_portfolio_performance_batch
+
+
+def _baseline(weights, daily_returns, risk_free_rate=0.0):
+    """기존 구현: 일별 포트폴리오 수익률을 np.dot으로 만든 뒤 평균·표준편차를 구합니다."""
+    portfolio_returns = np.dot(daily_returns, weights)
+    annual_return = (1 + np.mean(portfolio_returns))**252 - 1
+    annual_volatility = np.std(portfolio_returns) * np.sqrt(252)
+    sharpe_ratio = (annual_return - risk_free_rate) / annual_volatility if annual_volatility != 0 else 0
+    return annual_return, annual_volatility, sharpe_ratio
+
+
+def _daily_returns(n_days, n_assets=4, seed=0):
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0.0004, 0.015, (n_days, n_assets)) + rng.normal(0, 0.01, (n_days, 1))
+    return pd.DataFrame(returns, index=pd.bdate_range('2010-01-01', periods=n_days),
+                        columns=[f'A{k}' for k in range(n_assets)])
+
+
+WEIGHT_MATRIX = np.array([
+    [0.25, 0.25, 0.25, 0.25],
+    [0.7, 0.0, 0.3, 0.0],
+    [0.3, 0.3, 0.0, 0.0],      # 나머지 40%는 현금
+    [1.2, -0.2, 0.0, 0.0],     # 공매도 포함
+    [0.0, 0.0, 0.0, 0.0],      # 변동성 0 → 샤프 지수 0
+])
+
+
+# 5000일은 estimate_moments의 행 블록(4096행) 경계를 넘는 경우입니다.
+@pytest.mark.parametrize('n_days', [300, 5000])
+@pytest.mark.parametrize('risk_free_rate', [0.0, 0.03])
+def test_batch_matches_baseline_for_all_metrics(n_days, risk_free_rate):
+    daily_returns = _daily_returns(n_days)
+    expected = np.array([_baseline(w, daily_returns, risk_free_rate) for w in WEIGHT_MATRIX])
+
+    batch = np.column_stack(get_portfolio_performance_batch(WEIGHT_MATRIX, daily_returns, risk_free_rate))
+    from_moments = np.column_stack(get_portfolio_performance_batch(
+        WEIGHT_MATRIX, risk_free_rate=risk_free_rate, moments=estimate_moments(daily_returns)))
+    single = np.array([get_portfolio_performance(w, daily_returns, risk_free_rate) for w in WEIGHT_MATRIX])
+
+    for result in (batch, from_moments, single):
+        np.testing.assert_allclose(result, expected, rtol=1e-10, atol=1e-12)
@@ -0,0 +1,35 @@
+# tests/test_portfolio_store.py
+import pytest
+from portfolio_store import PortfolioStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return PortfolioStore(str(tmp_path / 'portfolios.db'))
+
+
+def _save(store, name, weight):
+    return store.save(name, {'A': weight, 'B': 100 - weight}, [{'name': 'A', 'ticker': 'AAA'}, {'name': 'B', 'ticker': 'BBB'}])
+
+
+def test_get_many_uses_one_connection_and_keeps_order(store, monkeypatch):
+    for k in range(50):
+        _save(store, f'P{k:02d}', k)
+    _save(store, 'P07', 70)
+    store.delete('P03')
+
+    connect = store._connect
+    opened = []
+    monkeypatch.setattr(store, '_connect', lambda: opened.append(1) or connect())
+
+    keys = [('P10', 1), ('P07', 1), ('P07', None), ('P03', None), ('P03', 1), ('없음', 1), ('P07', 3)] + \
+        [(f'P{k:02d}', 1) for k in range(20, 50)]
+    portfolios = store.get_many(keys)
+    assert len(opened) == 1
+
+    # 목록에서 지운 포트폴리오는 최신 버전이 없지만, 버전을 지정하면 기록에서 찾습니다.
+    expected = [store.get(name, version) for name, version in keys]
+    assert portfolios == [port for port in expected if port is not None]
+    assert [(p['name'], p['version']) for p in portfolios[:4]] == [('P10', 1), ('P07', 1), ('P07', 2), ('P03', 1)]
+    assert portfolios[2]['weights'] == {'A': 70, 'B': 30}
+    assert store.get_many([]) == []
@@ -0,0 +1,105 @@
+# tests/test_price_store.py
+import numpy as np
+import pandas as pd
+import pytest
+from price_store import PriceProvider, PriceStore, OVERLAP_BARS, session_close
+
+FINAL = pd.Timestamp('2030-01-01', tz='UTC')
+
+
+class FakeProvider(PriceProvider):
+    """frames의 [start, end) 구간을 돌려주고 호출 기록을 남기는 공급자"""
+
+    def __init__(self, frames: dict):
+        self.frames = frames
+        self.calls = []
+
+    def download(self, tickers, start, end):
+        self.calls.append((tuple(tickers), start, end))
+        last = pd.Timestamp(end) - pd.Timedelta(days=1)
+        return {t: self.frames[t].loc[pd.Timestamp(start):last] for t in tickers if t in self.frames}
+
+
+def _ohlcv(start='2024-01-01', end='2024-03-08', seed=0):
+    dates = pd.bdate_range(start, end)
+    close = 100 * np.cumprod(1 + np.random.default_rng(seed).normal(0, 0.01, len(dates)))
+    return pd.DataFrame({'Open': close, 'High': close, 'Low': close, 'Close': close, 'Adj Close': close,
+                         'Volume': 1000.0}, index=pd.DatetimeIndex(dates, name='Date'))
+
+
+@pytest.fixture
+def clock():
+    now = {'value': FINAL}
+    return now
+
+
+@pytest.fixture
+def store(tmp_path, clock):
+    return PriceStore(str(tmp_path), clock=lambda: clock['value'])
+
+
+def test_checked_until_limits_fetches_to_new_range(store):
+    provider = FakeProvider({'AAPL': _ohlcv()})
+    store.update(['AAPL'], provider, '2024-01-01', '2024-02-01')
+    assert store._meta['AAPL']['checked_until'] == '2024-02-01'
+
+    # 이미 확인한 구간은 다시 요청하지 않습니다.
+    store.update(['AAPL'], provider, '2024-01-01', '2024-02-01')
+    assert len(provider.calls) == 1
+
+    # 새 구간은 저장된 마지막 OVERLAP_BARS개 봉부터 요청합니다.
+    result = store.update(['AAPL'], provider, '2024-01-01', '2024-03-01')
+    overlap_start = pd.bdate_range('2024-01-01', '2024-01-31')[-OVERLAP_BARS]
+    assert provider.calls[-1] == (('AAPL',), overlap_start.strftime('%Y-%m-%d'), '2024-03-01')
+    pd.testing.assert_frame_equal(result['AAPL'], _ohlcv(end='2024-02-29'), check_freq=False)
+
+
+def test_open_us_session_is_partial_even_after_local_midnight(store, clock):
+    frames = {'AAPL': _ohlcv()}
+    provider = FakeProvider(frames)
+    # 한국 시간 3월 6일 01:00 = 뉴욕 3월 5일 11:00 (장중): 3월 5일 봉은 아직 확정되지 않았습니다.
+    clock['value'] = pd.Timestamp('2024-03-06 01:00', tz='Asia/Seoul').tz_convert('UTC')
+    store.update(['AAPL'], provider, '2024-01-01', '2024-03-06')
+    assert store._meta['AAPL']['partial_from'] == '2024-03-05'
+
+    # 장이 끝난 뒤에는 그 날짜부터 다시 받아 확정 값으로 바꾸고, 미확정 표시를 지웁니다.
+    frames['AAPL'].loc['2024-03-05', ['Close', 'Adj Close']] *= 1.02
+    clock['value'] = session_close('AAPL', '2024-03-05')
+    result = store.update(['AAPL'], provider, '2024-01-01', '2024-03-06')
+    assert 'partial_from' not in store._meta['AAPL']
+    assert result['AAPL'].loc['2024-03-05', 'Close'] == frames['AAPL'].loc['2024-03-05', 'Close']
+    assert len(provider.calls) == 2
+
+
+def test_korean_session_closes_in_seoul_time():
+    assert session_close('005930.KS', '2024-03-05') == pd.Timestamp('2024-03-05 16:00', tz='Asia/Seoul')
+
+
+def test_ingest_records_range_for_later_updates(store):
+    history = _ohlcv()
+    store.ingest('003618.KS', history.loc[:'2024-02-29'])
+    meta = store._meta['003618.KS']
+    assert meta['start'] == '2024-01-01'
+    assert meta['checked_until'] == '2024-03-01'
+    assert 'partial_from' not in meta
+
+    provider = FakeProvider({'003618.KS': history})
+    result = store.update(['003618.KS'], provider, '2024-01-01', '2024-03-09')
+    assert provider.calls[0][1] == history.loc[:'2024-02-29'].index[-OVERLAP_BARS].strftime('%Y-%m-%d')
+    assert len(result['003618.KS']) == len(history)
+
+
+def test_readjusted_history_is_refetched_in_full(store):
+    before = _ohlcv(end='2024-02-29')
+    store.update(['AAPL'], FakeProvider({'AAPL': before}), '2024-01-01', '2024-03-01')
+
+    # 10:1 액면분할 뒤 공급자는 과거 가격을 모두 새 기준으로 다시 조정해 돌려줍니다.
+    after = _ohlcv()
+    after[['Open', 'High', 'Low', 'Close', 'Adj Close']] /= 10
+    provider = FakeProvider({'AAPL': after})
+    result = store.update(['AAPL'], provider, '2024-01-01', '2024-03-09')
+
+    assert provider.calls[-1] == (('AAPL',), '2024-01-01', '2024-03-09')
+    pd.testing.assert_frame_equal(result['AAPL'], after, check_freq=False)
+    pd.testing.assert_frame_equal(store.load('AAPL'), after, check_freq=False)
+    assert result['AAPL']['Close'].pct_change().min() > -0.5
@@ -0,0 +1,53 @@
+# tests/test_profiling.py
+import threading
+import tracemalloc
+import numpy as np
+import pytest
+from config import PROFILE_ENV_VAR
+from profiling import clear_profile_records, profile_records, profile_stage
+
+
+@pytest.fixture(autouse=True)
+def memory_profiling(monkeypatch):
+    monkeypatch.setenv(PROFILE_ENV_VAR, 'memory')
+    clear_profile_records()
+    yield
+    clear_profile_records()
+
+
+def _records():
+    return {record['stage']: record for record in profile_records()}
+
+
+def test_nested_stage_does_not_reset_outer_peak():
+    with profile_stage('outer'):
+        block = np.ones(4 * 2**20 // 8)
+        del block
+        with profile_stage('inner'):
+            pass
+    records = _records()
+    assert records['outer']['peak_mb'] >= 4
+    assert 'peak_mb' not in records['inner']
+    assert not tracemalloc.is_tracing()
+
+
+def test_concurrent_stages_measure_memory_once():
+    barrier = threading.Barrier(2)
+
+    def run(name, size_mb):
+        with profile_stage(name):
+            block = np.ones(size_mb * 2**20 // 8)
+            # 두 구간이 모두 시작된 뒤에 끝나도록 맞춥니다.
+            barrier.wait(timeout=10)
+            del block
+
+    threads = [threading.Thread(target=run, args=(f'session{k}', 2 + k)) for k in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    measured = [record for record in _records().values() if 'peak_mb' in record]
+    assert len(measured) == 1
+    assert measured[0]['peak_mb'] >= 2
+    assert not tracemalloc.is_tracing()
@@ -0,0 +1,70 @@
+# tests/test_report.py
+import json
+import numpy as np
+import pandas as pd
+import pytest
+import data_fetcher
+from config import BENCHMARK_CONFIG
+from comparison import compare_portfolios
+from data_fetcher import prefetch
+from price_store import PriceProvider, PriceStore
+from report import analyze_portfolios, load_portfolios
+
+PORTFOLIOS = [
+    {'name': '성장형', 'weights': {'AAPL': 60, 'NVDA': 40}},
+    {'name': '안정형', 'weights': {'TLT': 100}},
+    {'name': '성장형', 'weights': {'MSFT': 100}},
+]
+
+
+def test_load_portfolios_rejects_duplicate_names(tmp_path):
+    path = tmp_path / 'portfolios.json'
+    path.write_text(json.dumps(PORTFOLIOS, ensure_ascii=False), encoding='utf-8')
+    with pytest.raises(ValueError, match='성장형'):
+        load_portfolios(str(path))
+
+
+def test_compare_portfolios_rejects_duplicate_names():
+    # 이름 검사는 가격을 불러오기 전에 하므로 네트워크를 사용하지 않습니다.
+    with pytest.raises(ValueError, match='성장형'):
+        compare_portfolios(PORTFOLIOS)
+
+
+class _RecordingProvider(PriceProvider):
+    def __init__(self, frames):
+        self.frames = frames
+        self.requested = []
+
+    def download(self, tickers, start, end):
+        self.requested += list(tickers)
+        last = pd.Timestamp(end) - pd.Timedelta(days=1)
+        return {t: self.frames[t].loc[pd.Timestamp(start):last] for t in tickers if t in self.frames}
+
+
+@pytest.fixture
+def provider(tmp_path):
+    dates = pd.bdate_range('2023-01-02', periods=120)
+    rng = np.random.default_rng(0)
+    frames = {t: pd.DataFrame({'Close': 100 * np.cumprod(1 + rng.normal(0, 0.01, len(dates)))}, index=dates)
+              for t in ['AAA', 'BBB', BENCHMARK_CONFIG['ticker']]}
+    previous = data_fetcher._provider, data_fetcher._store
+    recording = _RecordingProvider(frames)
+    data_fetcher.set_provider(recording)
+    data_fetcher.set_price_store(PriceStore(str(tmp_path)))
+    yield recording
+    data_fetcher.set_provider(previous[0])
+    data_fetcher.set_price_store(previous[1] or PriceStore(str(tmp_path / 'restored')))
+
+
+def test_workers_skip_tickers_that_failed_in_prefetch(provider):
+    portfolios = [{'name': '혼합', 'weights': {'AAA': 50, 'BAD': 50}}, {'name': '단일', 'weights': {'BBB': 100}}]
+    missing = prefetch(['AAA', 'BBB', 'BAD'], include_risk_free=False)
+    assert missing == ['BAD']
+    requested = len(provider.requested)
+
+    result = analyze_portfolios(portfolios, unavailable=missing)
+    # prefetch에서 실패한 티커는 작업 단계에서 다시 요청하지 않습니다.
+    assert len(provider.requested) == requested
+    assert result.loc['혼합', 'status'] == 'renormalized'
+    assert result.loc['혼합', 'missing_tickers'] == 'BAD'
+    assert result.loc['단일', 'status'] == 'ok'